@@ -11,10 +11,11 @@ Functions to control the Pyrad data processing flow
     :toctree: generated/
 
     main
+    main_merge
     main_rt
 
 """
 
-from .flow_control import main, main_rt
+from .flow_control import main, main_merge, main_rt
 
 __all__ = [s for s in dir() if not s.startswith('_')]
@@ -0,0 +1,322 @@
+"""
+pyrad.flow.dataset_cache
+========================
+
+Persistent cache of the output of expensive datasets (e.g. COSMO,
+PHIDP_KDP_KALMAN, HYDROCLASS) marked as cacheable with the dataset keyword
+CACHE. The output of a cacheable dataset is stored in the cache directory
+with a key computed from the dataset type and configuration, the content of
+its input fields, the Pyrad and Py-ART versions and, for the datasets
+obtained from NWP model data, the name and modification time of the model
+file. Any processing that generates a dataset with the same key for the same
+radar volume gets the output from the cache instead of computing it again.
+Modifying the configuration of the dataset or its inputs changes the key and
+therefore invalidates the cached output. Datasets that accumulate data over
+several volumes cannot be cached since their accumulator would not be
+updated when the output is obtained from the cache.
+
+.. autosummary::
+    :toctree: generated/
+
+    DatasetCache
+    get_dataset_cache
+    _get_model_fname
+
+"""
+from __future__ import print_function
+import os
+import hashlib
+import pickle
+from warnings import warn
+
+from pyart import version as pyart_version
+from pyrad import version as pyrad_version
+
+from ..io.io_aux import get_datatype_fields, find_raw_cosmo_file
+from ..io.io_aux import find_hzt_file
+from .dataset_memo import _hash_inputs, _hash_value, _has_state
+
+# dataset configuration keys that only affect the naming, the products or
+# the handling of the dataset output
+_NON_CACHE_KEYS = (
+    'configpath', 'lastStateFile', 'basepath', 'procname', 'dsname',
+    'dssavename', 'timeinfo', 'initialized', 'global_data', 'products',
+    'MAKE_GLOBAL', 'SPARSE_FIELDS', 'SPARSE_MAX_DENSITY', 'CACHE')
+
+# datasets computed from NWP model data. Their global_data only keeps data
+# read from file to speed up the next volume
+_COSMO_TYPES = ('COSMO', 'COSMO_LOOKUP')
+_HZT_TYPES = ('HZT', 'HZT_LOOKUP')
+
+
+class DatasetCache(object):
+    """
+    Cache of dataset outputs stored in files. Each output is stored in its
+    own file so the cache can be shared by several processings running
+    simultaneously
+
+    Attributes
+    ----------
+    cachedir : str or None
+        directory where the outputs are stored. None if the cache is not
+        active
+    nhits, nmisses : int
+        number of outputs obtained from the cache and computed
+
+    Methods:
+    --------
+    accepts : Check whether the output of a dataset can be cached
+    get_key : Compute the cache key of a dataset
+    get : Get a dataset output from the cache
+    put : Store a dataset output in the cache
+    print_stats : Print the cache statistics
+
+    """
+
+    def __init__(self, cachedir=None):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        cachedir : str or None
+            directory where the outputs are stored
+
+        """
+        self.cachedir = cachedir
+        self.nhits = 0
+        self.nmisses = 0
+
+    @property
+    def active(self):
+        """ True if the cache is used """
+        return self.cachedir is not None
+
+    @staticmethod
+    def accepts(dscfg):
+        """
+        Check whether the output of a dataset can be cached. Datasets that
+        keep data from one volume to the next cannot be cached, except the
+        datasets obtained from model data
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+
+        Returns
+        -------
+        accepted : bool
+            True if the output of the dataset can be cached
+
+        """
+        return (dscfg['type'] in _COSMO_TYPES+_HZT_TYPES or
+                not _has_state(dscfg))
+
+    @staticmethod
+    def get_key(dscfg, radar_list):
+        """
+        Compute the cache key of a dataset
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+        radar_list : list of radar objects
+            the radar objects containing the input fields
+
+        Returns
+        -------
+        key : str
+            the cache key
+
+        """
+        hash_obj = hashlib.sha1()
+        hash_obj.update(pyrad_version.version.encode('utf-8'))
+        hash_obj.update(pyart_version.version.encode('utf-8'))
+        _hash_value(hash_obj, {
+            key: value for key, value in dscfg.items()
+            if key not in _NON_CACHE_KEYS})
+        _hash_inputs(hash_obj, dscfg, radar_list)
+
+        # the model file may be replaced by a newer run of the model
+        model_fname = _get_model_fname(dscfg)
+        if model_fname is not None:
+            try:
+                mtime = os.path.getmtime(model_fname)
+            except EnvironmentError:
+                mtime = None
+            _hash_value(hash_obj, (model_fname, mtime))
+
+        return hash_obj.hexdigest()
+
+    def get(self, dscfg, key):
+        """
+        Get a dataset output from the cache
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+        key : str
+            the cache key of the dataset
+
+        Returns
+        -------
+        new_dataset : dict or None
+            the dataset output. None if it is not in the cache
+        ind_rad : int or None
+            the index of the radar of the dataset
+
+        """
+        fname = self._get_fname(dscfg, key)
+        if not os.path.isfile(fname):
+            self.nmisses += 1
+            return None, None
+
+        try:
+            with open(fname, 'rb') as cachefile:
+                new_dataset, ind_rad = pickle.load(cachefile)
+        except (EnvironmentError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError) as ee:
+            warn(str(ee))
+            warn('Unable to read cached dataset '+fname)
+            self.nmisses += 1
+            return None, None
+
+        self.nhits += 1
+        print('---- Dataset read from cache '+fname)
+
+        return new_dataset, ind_rad
+
+    def put(self, dscfg, key, new_dataset, ind_rad):
+        """
+        Store a dataset output in the cache. The file is written under a
+        temporary name and renamed so that other processings never read a
+        partially written file
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+        key : str
+            the cache key of the dataset
+        new_dataset : dict
+            the dataset output
+        ind_rad : int
+            the index of the radar of the dataset
+
+        Returns
+        -------
+        fname : str or None
+            the name of the cache file. None if the output could not be
+            stored
+
+        """
+        fname = self._get_fname(dscfg, key)
+        fname_tmp = fname+'.'+str(os.getpid())+'.tmp'
+        try:
+            savedir = os.path.dirname(fname)
+            if not os.path.isdir(savedir):
+                os.makedirs(savedir, exist_ok=True)
+            with open(fname_tmp, 'wb') as cachefile:
+                pickle.dump(
+                    (new_dataset, ind_rad), cachefile,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(fname_tmp, fname)
+        except (EnvironmentError, pickle.PicklingError, TypeError,
+                AttributeError) as ee:
+            warn(str(ee))
+            warn('Unable to store dataset '+dscfg['dsname']+' in cache')
+            if os.path.isfile(fname_tmp):
+                os.remove(fname_tmp)
+            return None
+
+        return fname
+
+    def print_stats(self):
+        """
+        Print the cache statistics
+
+        """
+        if not self.active:
+            return
+
+        print('- Dataset cache: %d hits, %d misses' %
+              (self.nhits, self.nmisses))
+
+    def _get_fname(self, dscfg, key):
+        """
+        Gets the name of the cache file of a dataset
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+        key : str
+            the cache key of the dataset
+
+        Returns
+        -------
+        fname : str
+            the file name
+
+        """
+        voltime = dscfg['timeinfo']
+        return os.path.join(
+            self.cachedir, voltime.strftime('%Y-%m-%d'),
+            dscfg['type']+'_'+voltime.strftime('%Y%m%d%H%M%S')+'_'+key +
+            '.pkl')
+
+
+_DATASET_CACHE = DatasetCache()
+
+
+def get_dataset_cache():
+    """
+    Get the dataset cache of the process
+
+    Returns
+    -------
+    dataset_cache : DatasetCache object
+        the dataset cache
+
+    """
+    return _DATASET_CACHE
+
+
+def _get_model_fname(dscfg):
+    """
+    Gets the name of the model file used by a dataset computed from NWP
+    model data
+
+    Parameters
+    ----------
+    dscfg : dict
+        the dataset configuration
+
+    Returns
+    -------
+    fname : str or None
+        the name of the model file. None if the dataset does not use model
+        data or the file has not been found
+
+    """
+    if dscfg['type'] not in _COSMO_TYPES+_HZT_TYPES:
+        return None
+
+    datatypes = dscfg.get('datatype', [])
+    if isinstance(datatypes, str):
+        datatypes = [datatypes]
+    ind_rad = 0
+    for datatypedescr in datatypes:
+        radarnr, _, _, _, _ = get_datatype_fields(datatypedescr)
+        ind_rad = int(radarnr[5:8])-1
+        break
+
+    if dscfg['type'] in _COSMO_TYPES:
+        return find_raw_cosmo_file(
+            dscfg['timeinfo'], dscfg.get('cosmo_type', 'TEMP'), dscfg,
+            ind_rad=ind_rad)
+
+    return find_hzt_file(dscfg['timeinfo'], dscfg, ind_rad=ind_rad)
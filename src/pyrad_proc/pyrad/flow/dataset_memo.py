@@ -0,0 +1,605 @@
+"""
+pyrad.flow.dataset_memo
+=======================
+
+Memoisation of the datasets generated by the off-line processing. For each
+dataset and radar volume the memo keeps a key computed from the content of
+the input fields, the dataset configuration and the Pyrad version, and a key
+per product computed from the product configuration. When a processing is
+run again the datasets whose key has not changed are not generated and only
+the products whose configuration has changed (or whose files are missing)
+are generated again, from the radar volume saved by a SAVEALL or SAVEVOL
+product of the dataset. Datasets that accumulate data over several volumes
+are always generated. The memo file can be shared by processings running
+simultaneously (e.g. the days processed in parallel by
+main_process_data_period): each processing merges its entries with the
+ones in the file when it stops.
+
+.. autosummary::
+    :toctree: generated/
+
+    DatasetMemo
+    get_dataset_memo
+    _has_state
+    _hash_inputs
+    _hash_value
+    _get_field_digest
+    _get_file_list
+
+"""
+from __future__ import print_function
+import os
+import hashlib
+import pickle
+import fcntl
+from warnings import warn
+
+import numpy as np
+
+import pyart
+
+from pyrad import version as pyrad_version
+
+from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+
+# dataset configuration keys that do not define the dataset
+_VOLATILE_KEYS = ('timeinfo', 'global_data', 'initialized', 'products')
+
+# dataset configuration keys holding data accumulated over several volumes
+_STATE_KEYS = ('global_data', 'traj_atplane_dict', 'traj_antenna_dict')
+
+# products whose files can be used to recover the dataset
+_SAVE_PRODUCT_TYPES = ('SAVEALL', 'SAVEVOL')
+
+
+class DatasetMemo(object):
+    """
+    Keys and output files of the datasets and products generated in
+    previous runs of a processing
+
+    Attributes
+    ----------
+    fname : str or None
+        name of the file where the memo is stored. None if the memo is not
+        active
+    nskipped, nreused : int
+        number of datasets not generated and number of datasets recovered
+        from saved files
+
+    Methods:
+    --------
+    open : Read the memo of previous runs
+    close : Write the memo
+    get_dataset_key : Compute the key of a dataset
+    get_product_key : Compute the key of a product
+    get_entry : Get the memo entry of an unchanged dataset
+    get_stale_products : Get the products that have to be generated again
+    load_dataset : Recover a dataset from its saved files
+    add_dataset : Add the memo entry of a generated dataset
+    add_product : Add a generated product to the memo entry of its dataset
+
+    """
+
+    def __init__(self):
+        """
+        Initalize the object.
+
+        """
+        self.fname = None
+        self.nskipped = 0
+        self.nreused = 0
+        self._entries = dict()
+        self._modified = set()
+        self._known_digests = dict()
+        self._voltime = None
+
+    @property
+    def active(self):
+        """ True if the memo is used """
+        return self.fname is not None
+
+    def open(self, fname):
+        """
+        Read the memo of previous runs
+
+        Parameters
+        ----------
+        fname : str or None
+            name of the memo file. If None the memo is not used
+
+        """
+        self.fname = fname
+        self._entries = dict()
+        self._modified = set()
+        self._known_digests = dict()
+        self.nskipped = 0
+        self.nreused = 0
+        if fname is None or not os.path.isfile(fname):
+            return
+
+        try:
+            with open(fname, 'rb') as memofile:
+                self._entries = pickle.load(memofile)
+        except (EnvironmentError, pickle.UnpicklingError, EOFError) as ee:
+            warn(str(ee))
+            warn('Unable to read dataset memo file '+fname +
+                 '. All datasets will be generated')
+
+    def close(self):
+        """
+        Write the memo and stop using it. The entries added by this
+        processing are merged with the ones in the memo file, which may have
+        been written by other processings in the meantime. The file is
+        locked during the merge
+
+        """
+        if not self.active:
+            return
+
+        try:
+            savedir = os.path.dirname(self.fname)
+            if savedir and not os.path.isdir(savedir):
+                os.makedirs(savedir, exist_ok=True)
+            with open(self.fname+'.lock', 'w') as lockfile:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+                entries = dict()
+                if os.path.isfile(self.fname):
+                    try:
+                        with open(self.fname, 'rb') as memofile:
+                            entries = pickle.load(memofile)
+                    except (pickle.UnpicklingError, EOFError) as ee:
+                        warn(str(ee))
+                        warn('Unable to read dataset memo file ' +
+                             self.fname+'. It will be overwritten')
+                entries.update({
+                    key: self._entries[key] for key in self._modified})
+
+                fname_tmp = self.fname+'.'+str(os.getpid())+'.tmp'
+                with open(fname_tmp, 'wb') as memofile:
+                    pickle.dump(
+                        entries, memofile, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(fname_tmp, self.fname)
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+            print('- Datasets not generated: %d (%d recovered from file)' %
+                  (self.nskipped, self.nreused))
+        except EnvironmentError as ee:
+            warn(str(ee))
+            warn('Unable to write dataset memo file '+self.fname)
+
+        self.fname = None
+        self._modified = set()
+        self._known_digests = dict()
+
+    def get_dataset_key(self, dscfg, radar_list):
+        """
+        Compute the key of a dataset from its configuration and the content
+        of its input fields
+
+        Parameters
+        ----------
+        dscfg : dict
+            the dataset configuration
+        radar_list : list of radar objects
+            the radar objects containing the input fields
+
+        Returns
+        -------
+        key : str
+            the dataset key
+
+        """
+        self._set_voltime(dscfg['timeinfo'])
+
+        hash_obj = hashlib.sha1()
+        hash_obj.update(pyrad_version.version.encode('utf-8'))
+        _hash_value(hash_obj, {
+            key: value for key, value in dscfg.items()
+            if key not in _VOLATILE_KEYS})
+
+        _hash_inputs(
+            hash_obj, dscfg, radar_list, get_digest=self._get_digest)
+
+        return hash_obj.hexdigest()
+
+    @staticmethod
+    def get_product_key(prdcfg):
+        """
+        Compute the key of a product from its configuration
+
+        Parameters
+        ----------
+        prdcfg : dict
+            the product configuration
+
+        Returns
+        -------
+        key : str
+            the product key
+
+        """
+        hash_obj = hashlib.sha1()
+        _hash_value(hash_obj, {
+            key: value for key, value in prdcfg.items()
+            if key != 'timeinfo'})
+
+        return hash_obj.hexdigest()
+
+    def get_entry(self, dsname, voltime, ds_key):
+        """
+        Get the memo entry of a dataset if it has been generated before with
+        the same key
+
+        Parameters
+        ----------
+        dsname : str
+            name of the dataset
+        voltime : datetime object
+            reference time of the radar volume
+        ds_key : str
+            the current key of the dataset
+
+        Returns
+        -------
+        entry : dict or None
+            the memo entry. None if the dataset has to be generated
+
+        """
+        entry = self._entries.get((dsname, voltime), None)
+        if entry is None or entry['key'] != ds_key or not entry['stateless']:
+            return None
+
+        return entry
+
+    @staticmethod
+    def get_stale_products(entry, prd_keys):
+        """
+        Get the products that have to be generated again
+
+        Parameters
+        ----------
+        entry : dict
+            the memo entry of the dataset
+        prd_keys : dict
+            the current key of each product of the dataset
+
+        Returns
+        -------
+        stale_products : list of str
+            the names of the products whose configuration has changed or
+            whose files are missing
+
+        """
+        stale_products = []
+        for prdname, prd_key in prd_keys.items():
+            prd_entry = entry['products'].get(prdname, None)
+            if (prd_entry is None or prd_entry['key'] != prd_key or
+                    not all(os.path.isfile(fname)
+                            for fname in prd_entry['files'])):
+                stale_products.append(prdname)
+
+        return stale_products
+
+    def load_dataset(self, entry):
+        """
+        Recover a dataset from the files of its SAVEALL and SAVEVOL
+        products
+
+        Parameters
+        ----------
+        entry : dict
+            the memo entry of the dataset
+
+        Returns
+        -------
+        new_dataset : dict or None
+            dictionary containing the recovered radar object. None if the
+            dataset cannot be recovered
+
+        """
+        if not entry['fields']:
+            return None
+
+        radar = None
+        for fname in entry['saved_files']:
+            if not os.path.isfile(fname):
+                continue
+            try:
+                if fname.endswith('.h5'):
+                    radar_aux = pyart.aux_io.read_odim_h5(fname)
+                else:
+                    radar_aux = pyart.io.read_cfradial(fname)
+            except Exception as ee:
+                warn(str(ee))
+                warn('Unable to read saved dataset file '+fname)
+                continue
+            if radar is None:
+                radar = radar_aux
+                continue
+            if (radar_aux.nrays != radar.nrays or
+                    radar_aux.ngates != radar.ngates):
+                continue
+            for field_name, field_dict in radar_aux.fields.items():
+                radar.fields[field_name] = field_dict
+
+        if radar is None or any(
+                field_name not in radar.fields
+                for field_name in entry['fields']):
+            return None
+
+        # the recovered fields keep the digest of the generated fields
+        for field_name, digest in entry['fields'].items():
+            data = radar.fields[field_name]['data']
+            self._known_digests[id(data)] = (data, digest)
+        self.nreused += 1
+
+        return {'radar_out': radar}
+
+    def add_dataset(self, dsname, voltime, ds_key, dscfg, new_dataset,
+                    ind_rad):
+        """
+        Add the memo entry of a generated dataset. The products are added
+        with add_product
+
+        Parameters
+        ----------
+        dsname : str
+            name of the dataset
+        voltime : datetime object
+            reference time of the radar volume
+        ds_key : str
+            the key of the dataset
+        dscfg : dict
+            the dataset configuration after the generation of the dataset
+        new_dataset : dict or None
+            the generated dataset
+        ind_rad : int
+            index of the radar of the dataset
+
+        """
+        fields = dict()
+        if isinstance(new_dataset, dict) and 'radar_out' in new_dataset:
+            for field_name, field_dict in (
+                    new_dataset['radar_out'].fields.items()):
+                fields[field_name] = self._get_digest(field_dict['data'])
+
+        self._modified.add((dsname, voltime))
+        self._entries[(dsname, voltime)] = {
+            'key': ds_key,
+            'stateless': not _has_state(dscfg),
+            'ind_rad': ind_rad,
+            'fields': fields,
+            'saved_files': [],
+            'products': dict()}
+
+    def add_product(self, dsname, voltime, prdname, prd_key, prd_type,
+                    output):
+        """
+        Add a generated product to the memo entry of its dataset
+
+        Parameters
+        ----------
+        dsname : str
+            name of the dataset
+        voltime : datetime object
+            reference time of the radar volume
+        prdname : str
+            name of the product
+        prd_key : str
+            the key of the product
+        prd_type : str
+            the product type
+        output : str, list of str or None
+            the files generated by the product
+
+        """
+        entry = self._entries.get((dsname, voltime), None)
+        if entry is None:
+            return
+
+        self._modified.add((dsname, voltime))
+        files = _get_file_list(output)
+        entry['products'][prdname] = {'key': prd_key, 'files': files}
+        if prd_type in _SAVE_PRODUCT_TYPES:
+            entry['saved_files'] = [
+                fname for fname in entry['saved_files']
+                if fname not in files]+files
+
+    def _set_voltime(self, voltime):
+        """
+        Forget the digests of the recovered fields when a new radar volume
+        is processed
+
+        Parameters
+        ----------
+        voltime : datetime object
+            reference time of the radar volume
+
+        """
+        if voltime != self._voltime:
+            self._known_digests = dict()
+            self._voltime = voltime
+
+    def _get_digest(self, data):
+        """
+        Get the digest of the data of a field
+
+        Parameters
+        ----------
+        data : array
+            the field data
+
+        Returns
+        -------
+        digest : str
+            the digest. The digest of the generated field if the field has
+            been recovered from file
+
+        """
+        known = self._known_digests.get(id(data), None)
+        if known is not None and known[0] is data:
+            return known[1]
+
+        return _get_field_digest(data)
+
+
+_DATASET_MEMO = DatasetMemo()
+
+
+def get_dataset_memo():
+    """
+    Get the dataset memo of the process
+
+    Returns
+    -------
+    dataset_memo : DatasetMemo object
+        the dataset memo
+
+    """
+    return _DATASET_MEMO
+
+
+def _has_state(dscfg):
+    """
+    Checks whether a dataset keeps data from one volume to the next
+
+    Parameters
+    ----------
+    dscfg : dict
+        the dataset configuration after the generation of the dataset
+
+    Returns
+    -------
+    has_state : bool
+        True if any of the keys holding data accumulated over several
+        volumes is set
+
+    """
+    for key in _STATE_KEYS:
+        value = dscfg.get(key, None)
+        if value is None:
+            continue
+        if isinstance(value, (dict, list, tuple)) and not value:
+            continue
+        return True
+
+    return False
+
+
+def _hash_inputs(hash_obj, dscfg, radar_list, get_digest=None):
+    """
+    Adds the geometry and the content of the input fields of a dataset to a
+    hash
+
+    Parameters
+    ----------
+    hash_obj : hash object
+        the hash
+    dscfg : dict
+        the dataset configuration
+    radar_list : list of radar objects
+        the radar objects containing the input fields
+    get_digest : function or None
+        function computing the digest of the data of a field. If None
+        _get_field_digest is used
+
+    """
+    if get_digest is None:
+        get_digest = _get_field_digest
+
+    datatypes = dscfg.get('datatype', [])
+    if isinstance(datatypes, str):
+        datatypes = [datatypes]
+    for datatypedescr in datatypes:
+        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+        ind_rad = int(radarnr[5:8])-1
+        hash_obj.update(datatypedescr.encode('utf-8'))
+        if radar_list is None or ind_rad >= len(radar_list):
+            continue
+        radar = radar_list[ind_rad]
+        if radar is None:
+            continue
+        for coord in (radar.time, radar.range, radar.azimuth,
+                      radar.elevation):
+            _hash_value(hash_obj, coord['data'])
+        field_name = get_fieldname_pyart(datatype)
+        if field_name not in radar.fields:
+            continue
+        hash_obj.update(
+            get_digest(radar.fields[field_name]['data']).encode('utf-8'))
+
+
+def _hash_value(hash_obj, value):
+    """
+    Adds a configuration value to a hash
+
+    Parameters
+    ----------
+    hash_obj : hash object
+        the hash
+    value : object
+        the value. Dictionaries are hashed in key order
+
+    """
+    if isinstance(value, dict):
+        for key in sorted(value, key=str):
+            hash_obj.update(repr(key).encode('utf-8'))
+            _hash_value(hash_obj, value[key])
+    elif isinstance(value, (list, tuple)):
+        hash_obj.update(b'[')
+        for item in value:
+            _hash_value(hash_obj, item)
+        hash_obj.update(b']')
+    elif isinstance(value, np.ndarray):
+        hash_obj.update(_get_field_digest(value).encode('utf-8'))
+    else:
+        hash_obj.update(repr(value).encode('utf-8'))
+
+
+def _get_field_digest(data):
+    """
+    Computes the digest of the content of an array
+
+    Parameters
+    ----------
+    data : array or masked array
+        the array
+
+    Returns
+    -------
+    digest : str
+        the digest
+
+    """
+    hash_obj = hashlib.sha1()
+    hash_obj.update(str(data.shape).encode('utf-8'))
+    hash_obj.update(str(data.dtype).encode('utf-8'))
+    hash_obj.update(np.ascontiguousarray(np.ma.getdata(data)).tobytes())
+    if np.ma.is_masked(data):
+        hash_obj.update(
+            np.ascontiguousarray(np.ma.getmaskarray(data)).tobytes())
+
+    return hash_obj.hexdigest()
+
+
+def _get_file_list(output):
+    """
+    Gets the names of the files generated by a product
+
+    Parameters
+    ----------
+    output : str, list or None
+        the output of the product function
+
+    Returns
+    -------
+    files : list of str
+        the names of the existing files
+
+    """
+    if isinstance(output, str):
+        output = [output]
+    if not isinstance(output, (list, tuple)):
+        return []
+
+    return [fname for fname in output
+            if isinstance(fname, str) and os.path.isfile(fname)]
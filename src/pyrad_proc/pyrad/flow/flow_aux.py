@@ -7,15 +7,23 @@ Auxiliary functions to control the Pyrad data processing flow
 .. autosummary::
     :toctree: generated/
 
+    _start_alloc_profile
+    _alloc_profile
+    _write_alloc_profile
+    _start_product_queue
     _initialize_listener
     _user_input_listener
     _get_times_and_traj
     _initialize_datasets
     _process_datasets
     _postprocess_datasets
+    _dump_accumulators
+    _load_accumulators
     _wait_for_files
     _get_radars_data
     _generate_dataset
+    _generate_dataset_from_memo
+    _disable_cache
     _generate_prod
     _create_cfg_dict
     _create_datacfg_dict
@@ -42,7 +50,12 @@ import queue
 import time
 import threading
 import glob
+import pickle
+import tracemalloc
+from contextlib import contextmanager
+from multiprocessing import current_process
 from copy import deepcopy
+from functools import partial
 
 try:
     from memory_profiler import profile as mprofile
@@ -60,9 +73,17 @@ from ..io.io_aux import get_dataset_fields, get_datatype_fields
 from ..io.io_aux import get_new_rainbow_file_name
 from ..io.trajectory import Trajectory
 from ..io.read_data_other import read_last_state
+from .product_queue import get_product_queue
 
 from ..proc.process_aux import get_process_func
+from ..proc.accumulators import RadarAccumulator, load_accumulator
 from ..prod.product_aux import get_prodgen_func
+from ..util.sparse_field import sparsify_radar, densify_radar
+from ..util.sparse_field import densify_dataset
+from ..util.radar_utils import convert_field_dtypes, create_empty_radar
+from .memory_governor import restore_global_data
+from .dataset_memo import get_dataset_memo
+from .dataset_cache import get_dataset_cache
 
 try:
     import dask
@@ -71,6 +92,215 @@ except ImportError:
 
 PROFILE_LEVEL = 0
 
+# allocation statistics aggregated per dataset/product type when the
+# allocation profiling mode (allocProfile in main config) is active
+_ALLOC_STATS = dict()
+_PYRAD_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# datasets whose accumulator aggregates the data of the whole processing
+# period. The accumulations of consecutive periods can be merged
+MERGEABLE_DATASET_TYPES = (
+    'GC_MONITORING', 'MONITORING', 'OCCURRENCE', 'OCCURRENCE_PERIOD')
+
+
+def _start_alloc_profile(cfg):
+    """
+    starts tracing memory allocations if requested in the main config file
+
+    Parameters
+    ----------
+    cfg : dict
+        processing configuration dictionary
+
+    Returns
+    -------
+    active : bool
+        True if the allocation profiling is active
+
+    """
+    if not cfg['allocProfile']:
+        return False
+
+    if not tracemalloc.is_tracing():
+        _ALLOC_STATS.clear()
+        tracemalloc.start(cfg['allocProfileNframes'])
+        print('- Allocation profiling active')
+
+    return True
+
+
+def _start_product_queue(cfg):
+    """
+    starts the processes generating the image products asynchronously if
+    requested in the main config file
+
+    Parameters
+    ----------
+    cfg : dict
+        processing configuration dictionary
+
+    Returns
+    -------
+    active : bool
+        True if the products are generated asynchronously
+
+    """
+    prod_queue = get_product_queue()
+    if prod_queue.active:
+        return True
+    if not cfg['asyncProducts']:
+        return False
+
+    # allocations of the products would not be attributed
+    if cfg['allocProfile']:
+        warn('Allocation profiling active: The products will be ' +
+             'generated synchronously')
+        return False
+
+    # processes of a pool cannot start new processes
+    if current_process().daemon:
+        warn('Processing run by a pool process: The products will be ' +
+             'generated synchronously')
+        return False
+
+    prod_queue.nworkers = cfg['asyncProductsNworkers']
+    prod_queue.max_depth = cfg['asyncProductsQueueDepth']
+    if 'asyncProductTypes' in cfg:
+        prod_queue.prod_types = cfg['asyncProductTypes']
+    prod_queue.start()
+    print('- Asynchronous generation of products active (' +
+          str(prod_queue.nworkers)+' processes)')
+
+    return True
+
+
+@contextmanager
+def _alloc_profile(kind, name):
+    """
+    context manager that takes a tracemalloc snapshot before and after the
+    enclosed code and aggregates the memory allocated at each code site
+    under the key (kind, name). Does nothing if tracemalloc is not tracing
+
+    Parameters
+    ----------
+    kind : str
+        the kind of function profiled (e.g. 'dataset' or 'product')
+    name : str
+        the dataset or product type
+
+    """
+    if not tracemalloc.is_tracing():
+        yield
+        return
+
+    trace_filter = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>')]
+    snapshot_start = tracemalloc.take_snapshot().filter_traces(trace_filter)
+    mem_start, _ = tracemalloc.get_traced_memory()
+    # the peak can only be reset from Python 3.9
+    has_peak = hasattr(tracemalloc, 'reset_peak')
+    if has_peak:
+        tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        mem_end, mem_peak = tracemalloc.get_traced_memory()
+        if not has_peak:
+            mem_peak = mem_end
+        snapshot_end = tracemalloc.take_snapshot().filter_traces(
+            trace_filter)
+
+        stats = _ALLOC_STATS.setdefault(
+            (kind, name), {'ncalls': 0, 'peak': 0, 'retained': 0,
+                           'sites': dict()})
+        stats['ncalls'] += 1
+        stats['peak'] = max(stats['peak'], mem_peak-mem_start)
+        stats['retained'] += mem_end-mem_start
+        for stat in snapshot_end.compare_to(snapshot_start, 'traceback'):
+            if stat.size_diff <= 0:
+                continue
+            # attribute the allocation to the most recent pyrad frame
+            frame = stat.traceback[-1]
+            for frame_aux in reversed(stat.traceback):
+                if _PYRAD_PATH in frame_aux.filename:
+                    frame = frame_aux
+                    break
+            site = stats['sites'].setdefault(
+                (frame.filename, frame.lineno), [0, 0])
+            site[0] += stat.size_diff
+            site[1] += stat.count_diff
+
+
+def _write_alloc_profile(cfg):
+    """
+    writes a report of the allocation statistics aggregated during the
+    processing and stops tracing memory allocations
+
+    Parameters
+    ----------
+    cfg : dict
+        processing configuration dictionary
+
+    Returns
+    -------
+    fname : str
+        the name of the report file. None if no report was written
+
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    tracemalloc.stop()
+
+    profile_path = os.path.expanduser('~')+'/profiling/'
+    if not os.path.isdir(profile_path):
+        os.makedirs(profile_path)
+    fname = (
+        profile_path+datetime.utcnow().strftime('%Y%m%d%H%M%S')+'_' +
+        cfg['name']+'_alloc_profile.txt')
+
+    # sort the dataset and product types by peak memory
+    keys = sorted(
+        _ALLOC_STATS, key=lambda key: _ALLOC_STATS[key]['peak'],
+        reverse=True)
+
+    if hasattr(tracemalloc, 'reset_peak'):
+        peak_descr = (
+            '# peak: maximum memory allocated during a single call [MiB]\n')
+    else:
+        peak_descr = (
+            '# peak: not available with this Python version (requires ' +
+            'Python 3.9). Maximum net change of the memory allocated ' +
+            'during a single call [MiB]\n')
+
+    with open(fname, 'w') as txtfile:
+        txtfile.write(
+            '# Allocation profile of processing '+cfg['name']+'\n' +
+            peak_descr +
+            '# retained: memory still allocated after the calls [MiB]\n' +
+            '# sites: memory [MiB] and number of blocks allocated and not ' +
+            'released during the calls, summed over all calls\n\n')
+        for kind, name in keys:
+            stats = _ALLOC_STATS[(kind, name)]
+            txtfile.write(
+                '%s %s: ncalls %d, peak %.3f, retained %.3f\n' % (
+                    kind, name, stats['ncalls'], stats['peak']/1048576.,
+                    stats['retained']/1048576.))
+            sites = sorted(
+                stats['sites'].items(), key=lambda site: site[1][0],
+                reverse=True)
+            for (filename, lineno), (size, count) in sites[
+                    :cfg['allocProfileTop']]:
+                txtfile.write('    %10.3f %8d  %s:%d\n' % (
+                    size/1048576., count, filename, lineno))
+            txtfile.write('\n')
+    _ALLOC_STATS.clear()
+
+    print('saved allocation profile: '+fname)
+
+    return fname
+
+
 def profiler(level=1):
     """
     Function to be used as decorator for memory debugging. The function will
@@ -388,14 +618,10 @@ def _process_datasets(dataset_levels, cfg, dscfg, radar_list, master_voltime,
                         make_global=dscfg[dataset]['MAKE_GLOBAL'])
 
                     del new_dataset
-                    gc.collect()
                 except Exception as ee:
                     warn(str(ee))
                     traceback.print_exc()
 
-    # manual garbage collection after processing each radar volume
-    gc.collect()
-
     return dscfg, traj
 
 
@@ -443,6 +669,120 @@ def _postprocess_datasets(dataset_levels, cfg, dscfg, traj=None, infostr=None):
     return dscfg, traj
 
 
+def _dump_accumulators(dataset_levels, dscfg, accupath):
+    """
+    Stores in files the accumulators of the datasets aggregating the data of
+    the whole processing period so that they can be merged with the
+    accumulations of other periods. These datasets are not post-processed
+
+    Parameters
+    ----------
+    dataset_levels : dict
+        dictionary containing the list of data sets to be generated at each
+        processing level
+    dscfg : dict
+        dictionary containing the configuration data for each dataset
+    accupath : str
+        directory where to store the accumulators. There is one file per
+        dataset named after the dataset
+
+    Returns
+    -------
+    postproc_levels : dict
+        dictionary containing the list of data sets that still have to be
+        post-processed at each processing level
+
+    """
+    if not os.path.isdir(accupath):
+        os.makedirs(accupath)
+
+    postproc_levels = dict()
+    for level in sorted(dataset_levels):
+        postproc_levels[level] = []
+        for dataset in dataset_levels[level]:
+            if dscfg[dataset]['type'] not in MERGEABLE_DATASET_TYPES:
+                postproc_levels[level].append(dataset)
+                continue
+
+            restore_global_data(dscfg[dataset])
+            global_data = dscfg[dataset].get('global_data', None)
+            if (not isinstance(global_data, dict) or not isinstance(
+                    global_data.get('accumulator', None), RadarAccumulator)):
+                # nothing accumulated
+                continue
+
+            fname = os.path.join(accupath, dataset+'.acc')
+            try:
+                global_data['accumulator'].dump(fname)
+            except (EnvironmentError, pickle.PicklingError, TypeError) as ee:
+                warn(str(ee))
+                warn('Unable to store the accumulator of dataset ' +
+                     dataset+'. The dataset will be post-processed')
+                postproc_levels[level].append(dataset)
+                continue
+            print('--- Accumulator of dataset '+dataset+' stored in '+fname)
+
+    return postproc_levels
+
+
+def _load_accumulators(dataset_levels, dscfg, accupath_list):
+    """
+    Reads the accumulators stored by the processing of several periods and
+    merges them. The merged accumulator is put in the global data of the
+    dataset
+
+    Parameters
+    ----------
+    dataset_levels : dict
+        dictionary containing the list of data sets to be generated at each
+        processing level
+    dscfg : dict
+        dictionary containing the configuration data for each dataset
+    accupath_list : list of str
+        the directories where the accumulators of each period are stored,
+        in chronological order
+
+    Returns
+    -------
+    dscfg : dict
+        the modified configuration dictionary
+    merged_levels : dict
+        dictionary containing the list of data sets with a merged
+        accumulator at each processing level
+
+    """
+    merged_levels = dict()
+    for level in sorted(dataset_levels):
+        merged_levels[level] = []
+        for dataset in dataset_levels[level]:
+            if dscfg[dataset]['type'] not in MERGEABLE_DATASET_TYPES:
+                continue
+
+            acc = None
+            for accupath in accupath_list:
+                fname = os.path.join(accupath, dataset+'.acc')
+                if not os.path.isfile(fname):
+                    continue
+                acc_period = load_accumulator(fname)
+                if acc_period is None:
+                    continue
+                if acc is None:
+                    acc = acc_period
+                elif not acc.merge(acc_period):
+                    warn('Unable to merge the accumulator of dataset ' +
+                         dataset+' stored in '+fname)
+            if acc is None:
+                continue
+
+            if not isinstance(dscfg[dataset].get('global_data', None), dict):
+                dscfg[dataset]['global_data'] = dict()
+            dscfg[dataset]['global_data']['accumulator'] = acc
+            dscfg[dataset]['initialized'] = 1
+            merged_levels[level].append(dataset)
+
+    return dscfg, merged_levels
+
+
 def _wait_for_files(nowtime, datacfg, datatype_list, last_processed=None):
     """
     Waits for the master file and all files in a volume scan to be present
@@ -745,6 +1085,9 @@ def _generate_dataset(dsname, cfg, dscfg, proc_status=0, radar_list=None,
     """
     dscfg = deepcopy(dscfg)
 
+    # the accumulator may have been moved to disk by the memory governor
+    restore_global_data(dscfg)
+
     dscfg['timeinfo'] = voltime
     try:
         proc_ds_func, dsformat = get_process_func(dscfg['type'],
@@ -756,18 +1099,75 @@ def _generate_dataset(dsname, cfg, dscfg, proc_status=0, radar_list=None,
     if isinstance(proc_ds_func, str):
         proc_ds_func = getattr(proc, proc_ds_func)
 
+    # datasets unchanged since a previous run are not generated again
+    memo = get_dataset_memo()
+    use_memo = memo.active and proc_status == 1 and trajectory is None
+    if use_memo:
+        ds_key = memo.get_dataset_key(dscfg, radar_list)
+        memo_entry = memo.get_entry(dsname, voltime, ds_key)
+        if memo_entry is not None:
+            memo_output = _generate_dataset_from_memo(
+                memo_entry, dsname, cfg, dscfg, dsformat, voltime,
+                runinfo=runinfo)
+            if memo_output is not None:
+                return memo_output
+
+    # the output of cacheable datasets is shared by all processings
+    dataset_cache = get_dataset_cache()
+    use_traj = 'trajectory' in inspect.getfullargspec(proc_ds_func).args
+    use_cache = (
+        dscfg['CACHE'] and dataset_cache.active and proc_status == 1 and
+        not use_traj)
+    if use_cache and not dataset_cache.accepts(dscfg):
+        _disable_cache(dscfg)
+        use_cache = False
+    new_dataset = None
+    if use_cache:
+        cache_key = dataset_cache.get_key(dscfg, radar_list)
+        new_dataset, ind_rad = dataset_cache.get(dscfg, cache_key)
+
     # Create dataset
-    if 'trajectory' in inspect.getfullargspec(proc_ds_func).args:
-        new_dataset, ind_rad = proc_ds_func(proc_status, dscfg,
-                                            radar_list=radar_list,
-                                            trajectory=trajectory)
-    else:
-        new_dataset, ind_rad = proc_ds_func(proc_status, dscfg,
-                                            radar_list=radar_list)
+    if new_dataset is None:
+        with _alloc_profile('dataset', dscfg['type']):
+            if use_traj:
+                new_dataset, ind_rad = proc_ds_func(proc_status, dscfg,
+                                                    radar_list=radar_list,
+                                                    trajectory=trajectory)
+            else:
+                new_dataset, ind_rad = proc_ds_func(proc_status, dscfg,
+                                                    radar_list=radar_list)
+
+        if use_cache and new_dataset is not None:
+            if dataset_cache.accepts(dscfg):
+                dataset_cache.put(dscfg, cache_key, new_dataset, ind_rad)
+            else:
+                _disable_cache(dscfg)
 
     if new_dataset is None:
         return None, None, dsname, dscfg
 
+    if (isinstance(new_dataset, dict) and 'radar_out' in new_dataset and
+            new_dataset['radar_out'] is not None and (
+                dscfg.get('fieldDtype') is not None or
+                dscfg.get('classFieldDtype') is not None)):
+        # the output radar may be the accumulator of the dataset. The fields
+        # are converted in a shallow copy so that the accumulator is kept
+        radar_out = create_empty_radar(new_dataset['radar_out'])
+        radar_out.fields = dict(new_dataset['radar_out'].fields)
+        new_dataset = dict(new_dataset)
+        new_dataset['radar_out'] = convert_field_dtypes(
+            radar_out, float_dtype=dscfg.get('fieldDtype'),
+            class_dtype=dscfg.get('classFieldDtype'))
+
+    if (dscfg.get('SPARSE_FIELDS', 0) and isinstance(new_dataset, dict) and
+            'radar_out' in new_dataset):
+        new_dataset['radar_out'] = sparsify_radar(
+            new_dataset['radar_out'],
+            max_density=dscfg.get('SPARSE_MAX_DENSITY', 0.1))
+
+    if use_memo:
+        memo.add_dataset(dsname, voltime, ds_key, dscfg, new_dataset, ind_rad)
+
     try:
         prod_func = get_prodgen_func(dsformat, dscfg['dsname'],
                                      dscfg['type'])
@@ -792,11 +1192,95 @@ def _generate_dataset(dsname, cfg, dscfg, proc_status=0, radar_list=None,
             for product in dscfg['products']:
                 _generate_prod(new_dataset, cfg, product, prod_func,
                                dscfg['dsname'], voltime, runinfo=runinfo)
-
-                gc.collect()
     return new_dataset, ind_rad, dsname, dscfg
 
 
+def _generate_dataset_from_memo(memo_entry, dsname, cfg, dscfg, dsformat,
+                                voltime, runinfo=None):
+    """
+    generates the products of a dataset that has not changed since a
+    previous run. Only the products whose configuration has changed or whose
+    files are missing are generated, from the dataset recovered from its
+    saved files
+
+    Parameters
+    ----------
+    memo_entry : dict
+        the memo entry of the dataset
+    dsname : str
+        name of the dataset
+    cfg : dict
+        configuration data
+    dscfg : dict
+        dataset configuration data
+    dsformat : str
+        the dataset format
+    voltime : datetime
+        reference time of the radar(s)
+    runinfo : str
+        string containing run info
+
+    Returns
+    -------
+    new_dataset : dataset object
+        The recovered dataset. None if no dataset is needed
+    ind_rad : int
+        the index to the reference radar object
+    dsname : str
+        name of the dataset being generated
+    dscfg : dict
+        the dataset configuration dictionary
+    or None if the dataset has to be generated
+
+    """
+    memo = get_dataset_memo()
+    prd_keys = dict()
+    for product in dscfg.get('products', dict()):
+        prd_keys[product] = memo.get_product_key(_create_prdcfg_dict(
+            cfg, dsname, product, voltime, runinfo=runinfo))
+    stale_products = memo.get_stale_products(memo_entry, prd_keys)
+
+    if not stale_products and not dscfg['MAKE_GLOBAL']:
+        memo.nskipped += 1
+        print('---- Dataset unchanged since previous run. Not generated')
+        return None, None, dsname, dscfg
+
+    new_dataset = memo.load_dataset(memo_entry)
+    if new_dataset is None:
+        return None
+
+    memo.nskipped += 1
+    print('---- Dataset unchanged since previous run. Recovered from file')
+    try:
+        prod_func = get_prodgen_func(dsformat, dscfg['dsname'],
+                                     dscfg['type'])
+    except Exception as inst:
+        warn(str(inst))
+        raise
+
+    for product in stale_products:
+        _generate_prod(new_dataset, cfg, product, prod_func,
+                       dscfg['dsname'], voltime, runinfo=runinfo)
+
+    return new_dataset, memo_entry['ind_rad'], dsname, dscfg
+
+
+def _disable_cache(dscfg):
+    """
+    Stops using the dataset cache for a dataset that keeps data from one
+    volume to the next
+
+    Parameters
+    ----------
+    dscfg : dict
+        dataset configuration data. Modified in place
+
+    """
+    warn('Dataset '+dscfg['dsname']+' keeps data from one volume to the ' +
+         'next and cannot be cached. Keyword CACHE ignored')
+    dscfg['CACHE'] = 0
+
+
 @profiler(level=3)
 def _generate_prod(dataset, cfg, prdname, prdfunc, dsname, voltime,
                    runinfo=None):
@@ -829,8 +1313,36 @@ def _generate_prod(dataset, cfg, prdname, prdfunc, dsname, voltime,
     print('---- Processing product: ' + prdname)
     prdcfg = _create_prdcfg_dict(cfg, dsname, prdname, voltime,
                                  runinfo=runinfo)
+
+    memo = get_dataset_memo()
+    if memo.active:
+        prd_key = memo.get_product_key(prdcfg)
+
+    # image products are rendered by the product queue processes
+    prod_queue = get_product_queue()
+    if prod_queue.accepts(dataset, prdcfg):
+        # the product is added to the memo once it has been generated
+        callback = None
+        if memo.active:
+            callback = partial(
+                memo.add_product, dsname, voltime, prdname, prd_key,
+                prdcfg['type'])
+        try:
+            prod_queue.put(
+                (dsname, prdname), dataset, prdcfg, prdfunc,
+                callback=callback)
+            return False
+        except Exception as inst:
+            warn(str(inst))
+            traceback.print_exc()
+            return True
+
     try:
-        prdfunc(dataset, prdcfg)
+        with _alloc_profile('product', prdcfg['type']):
+            output = prdfunc(densify_dataset(dataset), prdcfg)
+        if memo.active:
+            memo.add_product(
+                dsname, voltime, prdname, prd_key, prdcfg['type'], output)
         return False
     except Exception as inst:
         warn(str(inst))
@@ -953,6 +1465,40 @@ def _create_cfg_dict(cfgfile):
         warn('WARNING: COSMO run frequency not specified. ' +
              'Assumed default value 3h')
         cfg.update({'CosmoRunFreq': 3})
+    if 'modelCacheSize' not in cfg:
+        cfg.update({'modelCacheSize': 2000.})
+    if 'allocProfile' not in cfg:
+        cfg.update({'allocProfile': 0})
+    if 'allocProfileTop' not in cfg:
+        cfg.update({'allocProfileTop': 10})
+    if 'allocProfileNframes' not in cfg:
+        cfg.update({'allocProfileNframes': 10})
+    if 'asyncProducts' not in cfg:
+        cfg.update({'asyncProducts': 0})
+    if 'asyncProductsNworkers' not in cfg:
+        cfg.update({'asyncProductsNworkers': 2})
+    if 'asyncProductsQueueDepth' not in cfg:
+        cfg.update({'asyncProductsQueueDepth': 8})
+    # directory where the output of the cacheable datasets is stored. None
+    # means that the outputs are not cached
+    if 'datasetCacheDir' not in cfg:
+        cfg.update({'datasetCacheDir': None})
+    # file keeping the datasets generated by previous off-line runs. None
+    # means that all datasets are generated
+    if 'datasetMemoFile' not in cfg:
+        cfg.update({'datasetMemoFile': None})
+    # memory budget of the real time processing [MB]. 0 means no budget
+    if 'memoryBudget' not in cfg:
+        cfg.update({'memoryBudget': 0.})
+    if 'memorySpillDir' not in cfg:
+        cfg.update({'memorySpillDir': None})
+    if 'memoryReport' not in cfg:
+        cfg.update({'memoryReport': 0})
+    # data type of the radar fields. None keeps the data type of the data
+    if 'fieldDtype' not in cfg:
+        cfg.update({'fieldDtype': None})
+    if 'classFieldDtype' not in cfg:
+        cfg.update({'classFieldDtype': None})
     if 'CosmoForecasted' not in cfg:
         warn('WARNING: Hours forecasted by COSMO not specified. ' +
              'Assumed default value 7h (including analysis)')
@@ -1059,6 +1605,8 @@ def _create_dscfg_dict(cfg, dataset):
     dscfg.update({'lradomev': cfg['lradomev']})
     dscfg.update({'AntennaGain': cfg['AntennaGain']})
     dscfg.update({'attg': cfg['attg']})
+    dscfg.update({'fieldDtype': cfg['fieldDtype']})
+    dscfg.update({'classFieldDtype': cfg['classFieldDtype']})
     dscfg.update({'basepath': cfg['saveimgbasepath']})
     dscfg.update({'procname': cfg['name']})
     dscfg.update({'dsname': dataset})
@@ -1081,6 +1629,16 @@ def _create_dscfg_dict(cfg, dataset):
     if 'MAKE_GLOBAL' not in dscfg:
         dscfg.update({'MAKE_GLOBAL': 0})
 
+    # keep the mostly masked output fields as sparse fields
+    if 'SPARSE_FIELDS' not in dscfg:
+        dscfg.update({'SPARSE_FIELDS': 0})
+    if 'SPARSE_MAX_DENSITY' not in dscfg:
+        dscfg.update({'SPARSE_MAX_DENSITY': 0.1})
+
+    # store the output of the dataset in the dataset cache
+    if 'CACHE' not in dscfg:
+        dscfg.update({'CACHE': 0})
+
     # Convert the following strings to string arrays
     strarr_list = ['datatype']
     for param in strarr_list:
@@ -1346,11 +1904,11 @@ def _add_dataset(new_dataset, radar_list, ind_rad, make_global=True):
     if 'radar_out' not in new_dataset:
         return None
 
-    for field in new_dataset['radar_out'].fields:
+    radar_out = densify_radar(new_dataset['radar_out'])
+    for field in radar_out.fields:
         print('Adding field: '+field)
         radar_list[ind_rad].add_field(
-            field, new_dataset['radar_out'].fields[field],
-            replace_existing=True)
+            field, radar_out.fields[field], replace_existing=True)
     return 0
 
 
@@ -8,6 +8,7 @@ functions to control the Pyrad data processing flow
     :toctree: generated/
 
     main
+    main_merge
     main_rt
 
 """
@@ -31,10 +32,19 @@ from .flow_aux import _get_datasets_list, _get_masterfile_list
 from .flow_aux import _wait_for_files, _get_radars_data
 from .flow_aux import _initialize_datasets
 from .flow_aux import _process_datasets, _postprocess_datasets
+from .flow_aux import _dump_accumulators, _load_accumulators
+from .flow_aux import _start_alloc_profile, _write_alloc_profile
+from .flow_aux import _start_product_queue
 
 from ..io.io_aux import get_datetime
 from ..io.read_data_other import read_last_state
 from ..io.write_data import write_last_state
+from ..io.model_cache import get_model_cache
+from .product_queue import get_product_queue
+from .memory_governor import get_memory_governor
+from .dataset_memo import get_dataset_memo
+from .dataset_cache import get_dataset_cache
+from ..graph.plots_anim import close_animations
 
 ALLOW_USER_BREAK = False
 
@@ -51,7 +61,8 @@ except ImportError:
 
 def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
          flashnr=0, infostr="", MULTIPROCESSING_DSET=False,
-         MULTIPROCESSING_PROD=False, PROFILE_MULTIPROCESSING=False):
+         MULTIPROCESSING_PROD=False, PROFILE_MULTIPROCESSING=False,
+         accupath=None):
     """
     Main flow control. Processes radar data off-line over a period of time
     given either by the user, a trajectory file, or determined by the last
@@ -83,6 +94,12 @@ def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
         parallelized
     PROFILE_MULTIPROCESSING : Bool
         If true and code parallelized the multiprocessing is profiled
+    accupath : str or None
+        If not None, directory where the accumulators of the datasets
+        aggregating the data of the whole period (monitoring histograms,
+        frequency of occurrence) are stored instead of being post-processed.
+        The accumulations of several periods can then be merged and
+        post-processed with main_merge
 
     """
     print("- PYRAD version: %s (compiled %s by %s)" %
@@ -98,11 +115,38 @@ def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
     if ALLOW_USER_BREAK:
         input_queue = _initialize_listener()
 
+    cfg = _create_cfg_dict(cfgfile)
+    datacfg = _create_datacfg_dict(cfg)
+
+    # model data read from file is shared by all datasets
+    model_cache = get_model_cache()
+    model_cache.max_size = cfg['modelCacheSize']*1e6
+
+    # datasets generated by previous runs of the processing
+    get_dataset_memo().open(cfg['datasetMemoFile'])
+
+    # output of expensive datasets shared by several processings
+    dataset_cache = get_dataset_cache()
+    dataset_cache.cachedir = cfg['datasetCacheDir']
+
     if not _DASK_AVAILABLE:
         MULTIPROCESSING_DSET = False
         MULTIPROCESSING_PROD = False
         PROFILE_MULTIPROCESSING = False
 
+    # allocations can only be attributed to a dataset or product if they are
+    # processed sequentially
+    if _start_alloc_profile(cfg) and (
+            MULTIPROCESSING_DSET or MULTIPROCESSING_PROD):
+        warn('Allocation profiling active: The processing will not be ' +
+             'parallelized')
+        MULTIPROCESSING_DSET = False
+        MULTIPROCESSING_PROD = False
+        PROFILE_MULTIPROCESSING = False
+
+    # image products rendered by a pool of processes
+    _start_product_queue(cfg)
+
     # check if multiprocessing profiling is necessary
     if not MULTIPROCESSING_DSET and not MULTIPROCESSING_PROD:
         PROFILE_MULTIPROCESSING = False
@@ -122,9 +166,6 @@ def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
         rprof.register()
         cprof.register()
 
-    cfg = _create_cfg_dict(cfgfile)
-    datacfg = _create_datacfg_dict(cfg)
-
     starttime, endtime, traj = _get_times_and_traj(
         trajfile, starttime, endtime, cfg['ScanPeriod'],
         last_state_file=cfg['lastStateFile'], trajtype=trajtype,
@@ -194,9 +235,17 @@ def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
         gc.collect()
 
     # post-processing of the datasets
+    postproc_levels = dataset_levels
+    if accupath is not None:
+        print('\n\n- Storing accumulators:')
+        postproc_levels = _dump_accumulators(dataset_levels, dscfg, accupath)
     print('\n\n- Post-processing datasets:')
     dscfg, traj = _postprocess_datasets(
-        dataset_levels, cfg, dscfg, traj=traj, infostr=infostr)
+        postproc_levels, cfg, dscfg, traj=traj, infostr=infostr)
+
+    # wait for the products still in the queue
+    get_product_queue().shutdown()
+    close_animations()
 
     if PROFILE_MULTIPROCESSING:
         prof.unregister()
@@ -213,6 +262,70 @@ def main(cfgfile, starttime=None, endtime=None, trajfile="", trajtype='plane',
             profile_path+datetime.utcnow().strftime('%Y%m%d%H%M%S') +
             '_profile.png'))
 
+    _write_alloc_profile(cfg)
+    model_cache.print_stats()
+    dataset_cache.print_stats()
+    get_dataset_memo().close()
+
+    print('- This is the end my friend! See you soon!')
+
+
+def main_merge(cfgfile, accupath_list, infostr=""):
+    """
+    Merges the accumulators stored by the processing of several periods
+    (see parameter accupath of main) and post-processes the corresponding
+    datasets. The output is the same as if the periods had been processed
+    by a single run
+
+    Parameters
+    ----------
+    cfgfile : str
+        path of the main config file
+    accupath_list : list of str
+        the directories where the accumulators of each period are stored,
+        in chronological order
+    infostr : str
+        Information string about the actual data processing
+        (e.g. 'RUN57'). This string is added to product files.
+
+    """
+    print("- PYRAD version: %s (compiled %s by %s)" %
+          (pyrad_version.version, pyrad_version.compile_date_time,
+           pyrad_version.username))
+    print("- PYART version: " + pyart_version.version)
+
+    # Define behaviour of warnings
+    warnings.simplefilter('always')  # always print matching warnings
+    warnings.formatwarning = _warning_format  # define format
+
+    cfg = _create_cfg_dict(cfgfile)
+
+    # image products rendered by a pool of processes
+    _start_product_queue(cfg)
+
+    if infostr:
+        print('- Info string : ' + infostr)
+
+    dataset_levels = _get_datasets_list(cfg)
+
+    # initial processing of the datasets
+    print('\n\n- Initializing datasets:')
+    dscfg, traj = _initialize_datasets(
+        dataset_levels, cfg, infostr=infostr)
+
+    print('\n\n- Merging accumulators:')
+    dscfg, merged_levels = _load_accumulators(
+        dataset_levels, dscfg, accupath_list)
+
+    # post-processing of the datasets
+    print('\n\n- Post-processing datasets:')
+    dscfg, traj = _postprocess_datasets(
+        merged_levels, cfg, dscfg, traj=traj, infostr=infostr)
+
+    # wait for the products still in the queue
+    get_product_queue().shutdown()
+    close_animations()
+
     print('- This is the end my friend! See you soon!')
 
 
@@ -279,6 +392,18 @@ def main_rt(cfgfile_list, starttime=None, endtime=None, infostr_list=None,
 
     for icfg, cfgfile in enumerate(cfgfile_list):
         cfg = _create_cfg_dict(cfgfile)
+        _start_alloc_profile(cfg)
+        _start_product_queue(cfg)
+        if icfg == 0:
+            # model data read from file is shared by all datasets
+            model_cache = get_model_cache()
+            model_cache.max_size = cfg['modelCacheSize']*1e6
+            memory_governor = get_memory_governor()
+            memory_governor.max_rss = cfg['memoryBudget']*1e6
+            memory_governor.spill_dir = cfg['memorySpillDir']
+            memory_governor.report = cfg['memoryReport']
+            dataset_cache = get_dataset_cache()
+            dataset_cache.cachedir = cfg['datasetCacheDir']
         if infostr_list is not None:
             infostr = infostr_list[icfg]
         else:
@@ -426,7 +551,10 @@ def main_rt(cfgfile_list, starttime=None, endtime=None, infostr_list=None,
             del last_processed
             del traj
 
-            gc.collect()
+            # keep the memory of the process within the budget
+            memory_governor.check(
+                dscfg_list, [cfg_aux['name'] for cfg_aux in cfg_list],
+                icfg=icfg)
 
         nowtime_new = datetime.utcnow()
         # for offline testing
@@ -470,6 +598,17 @@ def main_rt(cfgfile_list, starttime=None, endtime=None, infostr_list=None,
 
             gc.collect()
 
+    # wait for the products still in the queue
+    get_product_queue().shutdown()
+    close_animations()
+
+    for cfg in cfg_list:
+        if cfg['allocProfile']:
+            _write_alloc_profile(cfg)
+            break
+    model_cache.print_stats()
+    dataset_cache.print_stats()
+
     print('- This is the end my friend! See you soon!')
 
     return end_proc
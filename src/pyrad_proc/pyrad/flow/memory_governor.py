@@ -0,0 +1,500 @@
+"""
+pyrad.flow.memory_governor
+==========================
+
+Control of the memory used by long running processes. After each radar
+volume the memory governor estimates the memory held by the accumulators of
+the datasets (global_data) and by the data caches and, if the resident
+memory of the process exceeds the configured budget, it trims the caches
+and moves accumulators to disk, starting with the largest accumulators of
+the processings that have not been run for the longest time. The
+accumulators moved to disk are read back the next time their dataset is
+generated.
+
+.. autosummary::
+    :toctree: generated/
+
+    MemoryGovernor
+    SpilledData
+    get_memory_governor
+    restore_global_data
+    get_rss
+    _get_memsize
+
+"""
+from __future__ import print_function
+import os
+import sys
+import gc
+import pickle
+from warnings import warn
+
+import numpy as np
+
+from ..io.model_cache import get_model_cache
+from ..io.read_data_sensor import get_sensor_cache
+from ..io.timeseries_buffer import get_timeseries_buffer
+
+# accumulators smaller than this are never moved to disk [bytes]
+MIN_SPILL_SIZE = 1e6
+
+# fraction of their current size the caches are trimmed to at each step
+CACHE_TRIM_FACTOR = 0.5
+
+# relative growth of the memory required to enforce again a budget that
+# could not be met
+UNMET_BUDGET_MARGIN = 0.1
+
+
+class SpilledData(object):
+    """
+    Placeholder of dataset accumulator data that has been moved to disk
+
+    Attributes
+    ----------
+    fname : str
+        name of the file containing the data
+    nbytes : float
+        estimated size of the data in memory [bytes]
+
+    Methods:
+    --------
+    load : Read the data
+
+    """
+
+    def __init__(self, fname, nbytes=0):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        fname : str
+            name of the file containing the data
+        nbytes : float
+            estimated size of the data in memory [bytes]
+
+        """
+        self.fname = fname
+        self.nbytes = nbytes
+
+    def load(self):
+        """
+        Read the data. The file is kept so that the data is not lost if the
+        processing of the dataset fails. It is overwritten the next time the
+        accumulator is moved to disk
+
+        Returns
+        -------
+        data : object
+            the data. None if it could not be read
+
+        """
+        try:
+            with open(self.fname, 'rb') as pklfile:
+                data = pickle.load(pklfile)
+        except (EnvironmentError, pickle.UnpicklingError, EOFError) as ee:
+            warn(str(ee))
+            warn('Unable to read accumulator data from '+self.fname)
+            return None
+
+        return data
+
+
+class MemoryGovernor(object):
+    """
+    Keeps the resident memory of the process within a budget by trimming the
+    data caches and moving dataset accumulators to disk
+
+    Attributes
+    ----------
+    max_rss : float
+        memory budget [bytes]. If 0 the budget is not enforced
+    spill_dir : str or None
+        directory where the accumulators are moved. If None the accumulators
+        are kept in memory
+    report : bool
+        if True the memory used by each dataset is printed after each volume
+    nevictions, nspills : int
+        number of times the caches have been trimmed and number of
+        accumulators moved to disk
+
+    Methods:
+    --------
+    check : Report the memory use and enforce the memory budget
+    get_dataset_sizes : Estimate the memory used by each dataset
+    spill : Move the accumulator of a dataset to disk
+    evict_caches : Trim the data caches
+
+    """
+
+    def __init__(self, max_rss=0, spill_dir=None, report=False):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        max_rss : float
+            memory budget [bytes]. If 0 the budget is not enforced
+        spill_dir : str or None
+            directory where the accumulators are moved
+        report : bool
+            if True the memory used by each dataset is printed
+
+        """
+        self.max_rss = max_rss
+        self.spill_dir = spill_dir
+        self.report = report
+        self.nevictions = 0
+        self.nspills = 0
+        self._ncheck = 0
+        self._last_checked = dict()
+        self._unmet_rss = None
+
+    def check(self, dscfg_list, procname_list, icfg=None):
+        """
+        Report the memory use and enforce the memory budget. To be called
+        between radar volumes. The caches are trimmed first. If it is not
+        enough the accumulators are moved to disk, starting with the
+        largest accumulators of the processings that have not been run for
+        the longest time. If the budget cannot be met it is not enforced
+        again until the memory used grows further
+
+        Parameters
+        ----------
+        dscfg_list : list of dict
+            the configuration data of the datasets of each processing. The
+            accumulators moved to disk are replaced in place
+        procname_list : list of str
+            the name of each processing. Used to name the files of the
+            accumulators moved to disk
+        icfg : int or None
+            index of the processing that has just been run
+
+        Returns
+        -------
+        rss : float
+            resident memory of the process after enforcing the budget
+            [bytes]
+
+        """
+        self._ncheck += 1
+        if icfg is not None:
+            self._last_checked[icfg] = self._ncheck
+
+        rss = get_rss()
+        if self.report:
+            self._print_report(dscfg_list, rss)
+
+        if not self.max_rss or rss is None or rss <= self.max_rss:
+            self._unmet_rss = None
+            return rss
+        if (self._unmet_rss is not None and
+                rss <= self._unmet_rss*(1.+UNMET_BUDGET_MARGIN)):
+            return rss
+
+        # memory held by unreachable reference cycles
+        gc.collect()
+        rss = get_rss()
+
+        # trim the caches until they are empty
+        while rss > self.max_rss and self.evict_caches():
+            rss = get_rss()
+
+        # move accumulators to disk until the estimated memory fits in the
+        # budget
+        if rss > self.max_rss and self.spill_dir is not None:
+            excess = rss-self.max_rss
+            for icfg_ds, dsname, nbytes in self._get_spill_candidates(
+                    dscfg_list):
+                if excess <= 0:
+                    break
+                if self.spill(dscfg_list[icfg_ds][dsname],
+                              procname=procname_list[icfg_ds]):
+                    excess -= nbytes
+            gc.collect()
+            rss = get_rss()
+
+        if rss > self.max_rss:
+            self._unmet_rss = rss
+            warn('Memory used %.1f MB exceeds the budget of %.1f MB. ' %
+                 (rss/1e6, self.max_rss/1e6) +
+                 'The budget will be enforced again if the memory used ' +
+                 'grows by more than %d%%' % (100*UNMET_BUDGET_MARGIN))
+        else:
+            self._unmet_rss = None
+
+        return rss
+
+    def get_dataset_sizes(self, dscfg):
+        """
+        Estimate the memory used by the accumulator of each dataset
+
+        Parameters
+        ----------
+        dscfg : dict
+            dictionary containing the configuration data for each dataset
+
+        Returns
+        -------
+        ds_sizes : dict
+            the estimated size of the accumulator of each dataset in memory
+            [bytes]. Accumulators moved to disk are not included
+
+        """
+        ds_sizes = dict()
+        for dsname, dscfg_ds in dscfg.items():
+            global_data = dscfg_ds.get('global_data', None)
+            if global_data is None or isinstance(global_data, SpilledData):
+                continue
+            ds_sizes[dsname] = _get_memsize(global_data)
+
+        return ds_sizes
+
+    def spill(self, dscfg_ds, procname=''):
+        """
+        Move the accumulator of a dataset to disk
+
+        Parameters
+        ----------
+        dscfg_ds : dict
+            the dataset configuration. Its global_data is replaced by a
+            SpilledData object
+        procname : str
+            name of the processing
+
+        Returns
+        -------
+        spilled : bool
+            True if the accumulator has been moved to disk
+
+        """
+        global_data = dscfg_ds.get('global_data', None)
+        if global_data is None or isinstance(global_data, SpilledData):
+            return False
+
+        fname = os.path.join(
+            self.spill_dir, procname+'_'+dscfg_ds['dsname']+'_global_data.pkl')
+        try:
+            if not os.path.isdir(self.spill_dir):
+                os.makedirs(self.spill_dir)
+            with open(fname, 'wb') as pklfile:
+                pickle.dump(
+                    global_data, pklfile, protocol=pickle.HIGHEST_PROTOCOL)
+        except (EnvironmentError, pickle.PicklingError, TypeError,
+                AttributeError) as ee:
+            warn(str(ee))
+            warn('Unable to move accumulator data of dataset ' +
+                 dscfg_ds['dsname']+' to disk')
+            return False
+
+        dscfg_ds['global_data'] = SpilledData(
+            fname, nbytes=_get_memsize(global_data))
+        self.nspills += 1
+        print('- Accumulator data of dataset '+dscfg_ds['dsname'] +
+              ' moved to '+fname)
+
+        return True
+
+    def evict_caches(self):
+        """
+        Trim the model data, sensor data and time series caches to a
+        fraction of their current size. The least recently used entries are
+        removed
+
+        Returns
+        -------
+        trimmed : bool
+            True if any cache contained data. False if they were empty
+
+        """
+        model_cache = get_model_cache()
+        sensor_cache = get_sensor_cache()
+        timeseries_buffer = get_timeseries_buffer()
+        nentries = len(timeseries_buffer)
+        if model_cache.size == 0 and sensor_cache.size == 0 and nentries == 0:
+            return False
+
+        model_cache.trim(CACHE_TRIM_FACTOR*model_cache.size)
+        sensor_cache.trim(CACHE_TRIM_FACTOR*sensor_cache.size)
+        timeseries_buffer.trim(int(CACHE_TRIM_FACTOR*nentries))
+        gc.collect()
+        self.nevictions += 1
+        print('- Data caches trimmed to %.1f MB of model data and %.1f MB '
+              'of sensor data' % (model_cache.size/1e6,
+                                  sensor_cache.size/1e6))
+
+        return True
+
+    def _get_spill_candidates(self, dscfg_list):
+        """
+        Get the accumulators that can be moved to disk in the order they
+        should be moved: first the processings that have not been run for
+        the longest time and within each processing the largest
+        accumulators first
+
+        Parameters
+        ----------
+        dscfg_list : list of dict
+            the configuration data of the datasets of each processing
+
+        Returns
+        -------
+        candidates : list of tuples
+            the processing index, the dataset name and the estimated size
+            [bytes] of each accumulator
+
+        """
+        candidates = []
+        for icfg, dscfg in enumerate(dscfg_list):
+            if dscfg is None:
+                continue
+            for dsname, nbytes in self.get_dataset_sizes(dscfg).items():
+                if nbytes >= MIN_SPILL_SIZE:
+                    candidates.append((
+                        self._last_checked.get(icfg, 0), -nbytes, icfg,
+                        dsname))
+        candidates.sort()
+
+        return [(icfg, dsname, -nbytes)
+                for _, nbytes, icfg, dsname in candidates]
+
+    def _print_report(self, dscfg_list, rss):
+        """
+        Print the memory used by the process, the caches and each dataset
+
+        Parameters
+        ----------
+        dscfg_list : list of dict
+            the configuration data of the datasets of each processing
+        rss : float or None
+            resident memory of the process [bytes]
+
+        """
+        if rss is not None:
+            print('- Memory used: %.1f MB' % (rss/1e6))
+        print('- Memory of model data cache: %.1f MB' %
+              (get_model_cache().size/1e6))
+        print('- Memory of sensor data cache: %.1f MB' %
+              (get_sensor_cache().size/1e6))
+        for dscfg in dscfg_list:
+            if dscfg is None:
+                continue
+            for dsname, nbytes in sorted(
+                    self.get_dataset_sizes(dscfg).items()):
+                print('- Memory of dataset %s: %.1f MB' %
+                      (dsname, nbytes/1e6))
+            for dsname, dscfg_ds in sorted(dscfg.items()):
+                if isinstance(dscfg_ds.get('global_data', None), SpilledData):
+                    print('- Memory of dataset %s: %.1f MB (on disk)' %
+                          (dsname, dscfg_ds['global_data'].nbytes/1e6))
+
+
+_MEMORY_GOVERNOR = MemoryGovernor()
+
+
+def get_memory_governor():
+    """
+    Get the memory governor of the process
+
+    Returns
+    -------
+    memory_governor : MemoryGovernor object
+        the memory governor
+
+    """
+    return _MEMORY_GOVERNOR
+
+
+def restore_global_data(dscfg_ds):
+    """
+    Read back the accumulator of a dataset if it has been moved to disk
+
+    Parameters
+    ----------
+    dscfg_ds : dict
+        the dataset configuration. Modified in place
+
+    Returns
+    -------
+    dscfg_ds : dict
+        the dataset configuration with the accumulator in memory
+
+    """
+    global_data = dscfg_ds.get('global_data', None)
+    if isinstance(global_data, SpilledData):
+        dscfg_ds['global_data'] = global_data.load()
+        if dscfg_ds['global_data'] is None:
+            dscfg_ds.pop('global_data')
+
+    return dscfg_ds
+
+
+def get_rss():
+    """
+    Get the resident memory of the process
+
+    Returns
+    -------
+    rss : float or None
+        the resident memory [bytes]. If it is not available the peak
+        resident memory is returned. None if neither is available
+
+    """
+    try:
+        with open('/proc/self/statm', 'r') as statmfile:
+            return float(statmfile.read().split()[1])*os.sysconf(
+                'SC_PAGE_SIZE')
+    except (EnvironmentError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+
+        # kilobytes in linux, bytes in mac
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return float(rss)
+        return float(rss)*1024.
+    except ImportError:
+        return None
+
+
+def _get_memsize(value, seen=None):
+    """
+    Estimates the memory used by the arrays contained in an object. Arrays
+    shared by several parts of the object are counted once
+
+    Parameters
+    ----------
+    value : object
+        the object (dict, list, tuple, array, radar object...)
+    seen : set or None
+        the ids of the objects already counted
+
+    Returns
+    -------
+    nbytes : int
+        the estimated size [bytes]
+
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        nbytes = value.nbytes
+        if isinstance(value, np.ma.MaskedArray):
+            nbytes += np.ma.getmask(value).nbytes
+        return nbytes
+    if isinstance(value, dict):
+        return sum(_get_memsize(item, seen=seen) for item in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return (sys.getsizeof(value) +
+                sum(_get_memsize(item, seen=seen) for item in value))
+    if hasattr(value, '__dict__'):
+        return _get_memsize(vars(value), seen=seen)
+
+    return sys.getsizeof(value)
@@ -0,0 +1,301 @@
+"""
+pyrad.flow.product_queue
+========================
+
+Asynchronous generation of the products that are pure sinks (images). The
+products are put in a queue together with a snapshot of the data they need
+and are rendered and written by a pool of processes while the processing of
+the datasets continues.
+
+.. autosummary::
+    :toctree: generated/
+
+    ProductQueue
+    get_product_queue
+    _get_dataset_snapshot
+    _render_prod
+
+"""
+from __future__ import print_function
+from warnings import warn
+import traceback
+import threading
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from ..io.io_aux import get_fieldname_pyart
+from ..util.radar_utils import create_empty_radar
+from ..util.sparse_field import densify_dataset
+
+# products that can be generated asynchronously by default
+ASYNC_PRODUCT_TYPES = (
+    'PPI_IMAGE', 'PSEUDOPPI_IMAGE', 'PPI_MAP', 'PSEUDOPPI_MAP', 'RHI_IMAGE',
+    'PSEUDORHI_IMAGE', 'CAPPI_IMAGE', 'FIXED_RNG_IMAGE', 'BSCOPE_IMAGE')
+
+
+class ProductQueue(object):
+    """
+    Queue of products rendered by a pool of processes. The number of products
+    in the queue is bounded: if the queue is full the caller waits until a
+    product has been generated. Products with the same key (i.e. the same
+    dataset and product name, hence writing the same files) are generated in
+    the order in which they have been put in the queue.
+
+    Attributes
+    ----------
+    nworkers : int
+        number of rendering processes
+    max_depth : int
+        maximum number of products in the queue
+    prod_types : list of str
+        the product types that are generated asynchronously
+    nprods, nerrors : int
+        number of products put in the queue and number of products that
+        could not be generated
+
+    Methods:
+    --------
+    start : Start the rendering processes
+    accepts : Check whether a product can be generated asynchronously
+    put : Put a product in the queue
+    drain : Wait until all products in the queue have been generated
+    shutdown : Drain the queue and stop the rendering processes
+
+    """
+
+    def __init__(self, nworkers=2, max_depth=8, prod_types=None):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        nworkers : int
+            number of rendering processes
+        max_depth : int
+            maximum number of products in the queue
+        prod_types : list of str or None
+            the product types that are generated asynchronously. If None
+            the default types are used
+
+        """
+        self.nworkers = nworkers
+        self.max_depth = max_depth
+        if prod_types is None:
+            prod_types = ASYNC_PRODUCT_TYPES
+        self.prod_types = prod_types
+        self.nprods = 0
+        self.nerrors = 0
+        self._executor = None
+        self._pending = OrderedDict()
+        self._callbacks = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        """ True if the rendering processes have been started """
+        return self._executor is not None
+
+    def start(self):
+        """
+        Start the rendering processes
+
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.nworkers)
+
+    def accepts(self, dataset, prdcfg):
+        """
+        Check whether a product can be generated asynchronously
+
+        Parameters
+        ----------
+        dataset : object
+            the dataset object
+        prdcfg : dict
+            product configuration dictionary
+
+        Returns
+        -------
+        accepted : bool
+            True if the product can be put in the queue
+
+        """
+        return (self.active and prdcfg['type'] in self.prod_types and
+                isinstance(dataset, dict) and 'radar_out' in dataset)
+
+    def put(self, key, dataset, prdcfg, prdfunc, callback=None):
+        """
+        Put a product in the queue. The snapshot of the data is serialized
+        before the function returns so that the dataset can be modified by
+        the processing once the product is in the queue
+
+        Parameters
+        ----------
+        key : tuple
+            key identifying the files written by the product. Products with
+            the same key are generated in order
+        dataset : dict
+            the dataset object
+        prdcfg : dict
+            product configuration dictionary
+        prdfunc : func
+            the product generation function
+        callback : func or None
+            function called with the output of the product function once
+            the product has been generated successfully
+
+        """
+        # serialize here: the executor pickles the arguments later in a
+        # separate thread while the processing continues
+        payload = pickle.dumps(
+            (_get_dataset_snapshot(dataset, prdcfg), prdcfg, prdfunc),
+            protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            # keep the order of products writing the same files
+            if key in self._pending:
+                self._wait([self._pending.pop(key)])
+
+            # bound the number of products in the queue
+            while len(self._pending) >= self.max_depth:
+                done, _ = wait(
+                    list(self._pending.values()), return_when=FIRST_COMPLETED)
+                self._wait(done)
+
+            self._pending[key] = self._executor.submit(
+                _render_prod, payload)
+            if callback is not None:
+                self._callbacks[self._pending[key]] = callback
+            self.nprods += 1
+
+    def drain(self):
+        """
+        Wait until all products in the queue have been generated
+
+        """
+        with self._lock:
+            self._wait(list(self._pending.values()))
+
+    def shutdown(self):
+        """
+        Drain the queue and stop the rendering processes
+
+        """
+        if self._executor is None:
+            return
+        self.drain()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        print('- Asynchronous products: %d generated, %d errors' %
+              (self.nprods-self.nerrors, self.nerrors))
+
+    def _wait(self, futures):
+        """
+        Wait for the products to be generated and remove them from the queue
+
+        Parameters
+        ----------
+        futures : list of Future objects
+            the products to wait for
+
+        """
+        futures = set(futures)
+        wait(futures)
+        for key in [key for key, fut in self._pending.items()
+                    if fut in futures]:
+            del self._pending[key]
+        for fut in futures:
+            callback = self._callbacks.pop(fut, None)
+            try:
+                error, output = fut.result()
+            except Exception as ee:
+                warn('Unable to generate product: '+str(ee))
+                error, output = True, None
+            if error:
+                self.nerrors += 1
+            elif callback is not None:
+                callback(output)
+
+
+_PRODUCT_QUEUE = ProductQueue()
+
+
+def get_product_queue():
+    """
+    Get the product queue shared by all the datasets of the process
+
+    Returns
+    -------
+    product_queue : ProductQueue object
+        the product queue
+
+    """
+    return _PRODUCT_QUEUE
+
+
+def _get_dataset_snapshot(dataset, prdcfg):
+    """
+    Gets a shallow copy of the dataset containing only the field used by
+    the product. The snapshot shares the data of the dataset and has to be
+    serialized before the dataset is modified
+
+    Parameters
+    ----------
+    dataset : dict
+        dictionary with key radar_out containing a radar object
+    prdcfg : dict
+        product configuration dictionary
+
+    Returns
+    -------
+    snapshot : dict
+        the dataset snapshot
+
+    """
+    radar = dataset['radar_out']
+    field_name = None
+    if 'voltype' in prdcfg:
+        field_name = get_fieldname_pyart(prdcfg['voltype'])
+    if field_name not in radar.fields:
+        # the product will issue the warning
+        return dataset
+
+    snapshot = dict(dataset)
+    snapshot['radar_out'] = create_empty_radar(radar)
+    snapshot['radar_out'].add_field(field_name, radar.fields[field_name])
+
+    return snapshot
+
+
+def _render_prod(payload):
+    """
+    Generates a product in a rendering process
+
+    Parameters
+    ----------
+    payload : bytes
+        the pickled tuple with the dataset snapshot, the product
+        configuration dictionary and the product generation function
+
+    Returns
+    -------
+    error : bool
+        False if the product could be generated
+    output : list of str or None
+        the files written by the product function. None if the product
+        could not be generated
+
+    """
+    try:
+        dataset, prdcfg, prdfunc = pickle.loads(payload)
+        output = prdfunc(densify_dataset(dataset), prdcfg)
+        # only the file names are sent back to the main process
+        if isinstance(output, str):
+            output = [output]
+        if not isinstance(output, (list, tuple)):
+            output = []
+        return False, [fname for fname in output if isinstance(fname, str)]
+    except Exception as inst:
+        warn(str(inst))
+        traceback.print_exc()
+        return True, None
@@ -2,6 +2,7 @@
 def configuration(parent_package='', top_path=None):
     from numpy.distutils.misc_util import Configuration
     config = Configuration('flow', parent_package, top_path)
+    config.add_data_dir('tests')
     return config
 
 
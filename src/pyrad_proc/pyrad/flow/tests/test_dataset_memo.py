@@ -0,0 +1,102 @@
+""" Unit Tests for Pyrad's flow/dataset_memo.py module. """
+
+import datetime
+
+import pyart
+
+from pyrad.flow import flow_aux
+from pyrad.flow.dataset_memo import DatasetMemo, get_dataset_memo
+
+
+VOLTIME = datetime.datetime(2020, 1, 1, 12, 0)
+
+
+class _ProcCounter(object):
+    """ Dataset processing function counting its calls """
+
+    def __init__(self, keep_state=False):
+        self.ncalls = 0
+        self.keep_state = keep_state
+
+    def __call__(self, procstatus, dscfg, radar_list=None):
+        self.ncalls += 1
+        if self.keep_state:
+            dscfg['global_data'] = {'nvolumes': self.ncalls}
+        radar = radar_list[0]
+        new_radar = pyart.util.subset_radar(radar, ['reflectivity'])
+        return {'radar_out': new_radar}, 0
+
+
+def _make_dscfg():
+    return {
+        'type': 'TEST', 'dsname': 'test_ds', 'datatype': ['RADAR001:dBZ'],
+        'global_data': None, 'initialized': 0, 'CACHE': 0,
+        'MAKE_GLOBAL': 0}
+
+
+def _run(monkeypatch, proc_counter, dscfg):
+    monkeypatch.setattr(
+        flow_aux, 'get_process_func',
+        lambda dataset_type, dsname: (proc_counter, 'VOL'))
+    monkeypatch.setattr(
+        flow_aux, 'get_prodgen_func',
+        lambda dsformat, dsname, dstype: None)
+    radar_list = [pyart.testing.make_target_radar()]
+    return flow_aux._generate_dataset(
+        'test_ds', {}, dscfg, proc_status=1, radar_list=radar_list,
+        voltime=VOLTIME)
+
+
+def test_rerun_skips_dataset(monkeypatch, tmp_path):
+    fname = str(tmp_path / 'memo.pkl')
+    proc_counter = _ProcCounter()
+    memo = get_dataset_memo()
+
+    memo.open(fname)
+    new_dataset, _, _, _ = _run(monkeypatch, proc_counter, _make_dscfg())
+    memo.close()
+    assert proc_counter.ncalls == 1
+    assert new_dataset is not None
+
+    memo.open(fname)
+    new_dataset, _, _, _ = _run(monkeypatch, proc_counter, _make_dscfg())
+    nskipped = memo.nskipped
+    memo.close()
+    assert proc_counter.ncalls == 1
+    assert nskipped == 1
+    assert new_dataset is None
+
+
+def test_rerun_generates_stateful_dataset(monkeypatch, tmp_path):
+    fname = str(tmp_path / 'memo.pkl')
+    proc_counter = _ProcCounter(keep_state=True)
+    memo = get_dataset_memo()
+
+    memo.open(fname)
+    _run(monkeypatch, proc_counter, _make_dscfg())
+    memo.close()
+
+    memo.open(fname)
+    _run(monkeypatch, proc_counter, _make_dscfg())
+    memo.close()
+    assert proc_counter.ncalls == 2
+
+
+def test_close_merges_entries(tmp_path):
+    fname = str(tmp_path / 'memo.pkl')
+    dscfg = _make_dscfg()
+    memo1 = DatasetMemo()
+    memo2 = DatasetMemo()
+    memo1.open(fname)
+    memo2.open(fname)
+
+    memo1.add_dataset('ds1', VOLTIME, 'key1', dscfg, None, 0)
+    memo2.add_dataset('ds2', VOLTIME, 'key2', dscfg, None, 0)
+    memo1.close()
+    memo2.close()
+
+    memo = DatasetMemo()
+    memo.open(fname)
+    assert memo.get_entry('ds1', VOLTIME, 'key1') is not None
+    assert memo.get_entry('ds2', VOLTIME, 'key2') is not None
+    memo.close()
@@ -0,0 +1,113 @@
+""" Unit Tests for merging the accumulators of Pyrad's flow/flow_aux.py. """
+
+import datetime
+from multiprocessing import Pool
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pyart
+
+from pyrad.flow import flow_aux
+
+VOLTIME = datetime.datetime(2020, 1, 1, 22, 0)
+NVOLUMES = 6
+DATASET_LEVELS = {'l0': ['occurrence', 'monitoring']}
+
+
+def _make_dscfg():
+    dscfg = dict()
+    for dsname, dstype in (('occurrence', 'OCCURRENCE'),
+                           ('monitoring', 'MONITORING')):
+        dscfg[dsname] = {
+            'type': dstype, 'dsname': dsname, 'datatype': ['RADAR001:dBZ'],
+            'global_data': None, 'initialized': 0, 'CACHE': 0,
+            'MAKE_GLOBAL': 0, 'val_min': 30.}
+    return dscfg
+
+
+def _make_radar(ind_vol):
+    """ Radar object with a random reflectivity field """
+    radar = pyart.testing.make_empty_ppi_radar(20, 36, 1)
+    rng = np.random.RandomState(ind_vol)
+    field_dict = pyart.config.get_metadata('reflectivity')
+    field_dict['data'] = np.ma.masked_array(
+        rng.uniform(0., 60., (radar.nrays, radar.ngates)))
+    field_dict['data'][:, ::5] = np.ma.masked
+    radar.add_field('reflectivity', field_dict)
+    return radar
+
+
+def _process(dscfg, ind_vols):
+    """ Processes the volumes as _process_datasets does """
+    for ind_vol in ind_vols:
+        voltime = VOLTIME+datetime.timedelta(minutes=30*ind_vol)
+        radar_list = [_make_radar(ind_vol)]
+        for dsname in DATASET_LEVELS['l0']:
+            _, _, _, dscfg[dsname] = flow_aux._generate_dataset(
+                dsname, {}, dscfg[dsname], proc_status=1,
+                radar_list=radar_list, voltime=voltime)
+    return dscfg
+
+
+def _postprocess(dscfg, dataset_levels):
+    """ Post-processes the datasets as _postprocess_datasets does """
+    output = dict()
+    for dsname in dataset_levels['l0']:
+        output[dsname], _, _, _ = flow_aux._generate_dataset(
+            dsname, {}, dscfg[dsname], proc_status=2)
+    return output
+
+
+def _process_day(ind_vols, accupath):
+    """ Processes one day and stores the accumulators """
+    dscfg = _process(_make_dscfg(), ind_vols)
+    return flow_aux._dump_accumulators(DATASET_LEVELS, dscfg, accupath)
+
+
+def test_parallel_days_merged_equal_single_run(tmpdir):
+    output_single = _postprocess(
+        _process(_make_dscfg(), range(NVOLUMES)), DATASET_LEVELS)
+
+    accupath_list = [str(tmpdir.join('day1')), str(tmpdir.join('day2'))]
+    day_args_list = [
+        (range(NVOLUMES//2), accupath_list[0]),
+        (range(NVOLUMES//2, NVOLUMES), accupath_list[1])]
+    with Pool(processes=2) as pool:
+        postproc_levels_list = pool.starmap(_process_day, day_args_list)
+    for postproc_levels in postproc_levels_list:
+        assert postproc_levels == {'l0': []}
+
+    dscfg, merged_levels = flow_aux._load_accumulators(
+        DATASET_LEVELS, _make_dscfg(), accupath_list)
+    assert merged_levels == DATASET_LEVELS
+    output_merged = _postprocess(dscfg, merged_levels)
+
+    occu_single = output_single['occurrence']
+    occu_merged = output_merged['occurrence']
+    assert occu_merged['occu_final']
+    assert occu_merged['starttime'] == occu_single['starttime']
+    assert occu_merged['endtime'] == occu_single['endtime']
+    for field_name in ('occurrence', 'number_of_samples',
+                       'frequency_of_occurrence'):
+        assert_allclose(
+            occu_merged['radar_out'].fields[field_name]['data'],
+            occu_single['radar_out'].fields[field_name]['data'])
+
+    hist_single = output_single['monitoring']
+    hist_merged = output_merged['monitoring']
+    assert hist_merged['hist_type'] == 'cumulative'
+    assert hist_merged['timeinfo'] == hist_single['timeinfo']
+    assert_allclose(
+        hist_merged['hist_obj'].fields['reflectivity']['data'],
+        hist_single['hist_obj'].fields['reflectivity']['data'])
+
+
+def test_non_mergeable_dataset_postprocessed(tmpdir):
+    dataset_levels = {'l0': ['occurrence', 'time_avg']}
+    dscfg = _process(_make_dscfg(), range(NVOLUMES))
+    dscfg['time_avg'] = {'type': 'TIME_AVG', 'dsname': 'time_avg'}
+    postproc_levels = flow_aux._dump_accumulators(
+        dataset_levels, dscfg, str(tmpdir))
+    assert postproc_levels == {'l0': ['time_avg']}
+    assert tmpdir.join('occurrence.acc').check()
@@ -0,0 +1,38 @@
+""" Unit Tests for Pyrad's flow/product_queue.py module. """
+
+import numpy as np
+
+import pyart
+
+from pyrad.flow.product_queue import ProductQueue
+
+
+def _write_max(dataset, prdcfg):
+    """ Product function writing the maximum of the field to a file """
+    field = dataset['radar_out'].fields['reflectivity']['data']
+    with open(prdcfg['fname'], 'w') as txtfile:
+        txtfile.write(str(float(field.max())))
+    return prdcfg['fname']
+
+
+def test_put_snapshot_not_modified(tmpdir):
+    radar = pyart.testing.make_empty_ppi_radar(10, 36, 1)
+    field = pyart.config.get_metadata('reflectivity')
+    field['data'] = np.ma.zeros((radar.nrays, radar.ngates))
+    radar.add_field('reflectivity', field)
+    dataset = {'radar_out': radar}
+    prdcfg = {'type': 'PPI_IMAGE', 'voltype': 'dBZ',
+              'fname': str(tmpdir.join('max.txt'))}
+
+    outputs = []
+    queue = ProductQueue(nworkers=1)
+    queue.start()
+    queue.put(('max.txt', ), dataset, prdcfg, _write_max,
+              callback=outputs.append)
+    # the processing continues and modifies the dataset in place
+    radar.fields['reflectivity']['data'][:] = 50.
+    queue.shutdown()
+
+    assert queue.nerrors == 0
+    assert outputs == [[prdcfg['fname']]]
+    assert float(tmpdir.join('max.txt').read()) == 0.
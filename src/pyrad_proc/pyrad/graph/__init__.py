@@ -69,4 +69,6 @@ from .plots_timeseries import plot_sun_retrieval_ts, plot_ml_ts
 
 from .plots_aux import get_colobar_label, get_field_name
 
+from .plots_anim import add_animation_frame, close_animations
+
 __all__ = [s for s in dir() if not s.startswith('_')]
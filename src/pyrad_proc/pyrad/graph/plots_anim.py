@@ -0,0 +1,127 @@
+"""
+pyrad.graph.plots_anim
+======================
+
+Functions to generate animations. The frames are rendered by the plotting
+functions and passed to an encoder while the data is being processed. The
+animations are closed at the end of the processing.
+
+.. autosummary::
+    :toctree: generated/
+
+    add_animation_frame
+    close_animations
+
+"""
+
+import os
+from warnings import warn
+
+import numpy as np
+
+try:
+    import imageio
+    _IMAGEIO_AVAILABLE = True
+except ImportError:
+    warn('imageio not available')
+    _IMAGEIO_AVAILABLE = False
+
+import matplotlib as mpl
+mpl.use('Agg')
+
+# Increase a bit font size
+mpl.rcParams.update({'font.size': 16})
+mpl.rcParams.update({'font.family':  "sans-serif"})
+
+import matplotlib.pyplot as plt
+
+# animation writers open in the current process, by animation key
+_ANIM_WRITERS = dict()
+
+
+def add_animation_frame(fig, anim_key, fname, fps=1, dpi=72):
+    """
+    Adds the image of a figure as a new frame of an animation. The
+    animation file is created when the first frame is added. The figure is
+    closed
+
+    Parameters
+    ----------
+    fig : Figure object
+        the figure to add
+    anim_key : tuple
+        key identifying the animation (e.g. processing, dataset and product
+        names)
+    fname : str
+        name of the animation file used if the animation does not exist yet.
+        The format is given by the file extension (e.g. gif, mp4)
+    fps : float
+        number of frames per second
+    dpi : int
+        dots per inch of the frame
+
+    Returns
+    -------
+    fname : str or None
+        the name of the animation file. None if the frame could not be added
+
+    """
+    if not _IMAGEIO_AVAILABLE:
+        warn('imageio not available. Unable to generate animation '+fname)
+        plt.close(fig)
+        return None
+
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    frame = np.asarray(fig.canvas.buffer_rgba())[:, :, :3]
+    plt.close(fig)
+
+    if anim_key not in _ANIM_WRITERS:
+        try:
+            savedir = os.path.dirname(fname)
+            if savedir and not os.path.isdir(savedir):
+                os.makedirs(savedir)
+            writer = imageio.get_writer(fname, mode='I', fps=fps)
+        except Exception as ee:
+            warn(str(ee))
+            warn('Unable to create animation '+fname)
+            return None
+        _ANIM_WRITERS[anim_key] = {
+            'writer': writer,
+            'fname': fname,
+            'shape': frame.shape}
+
+    anim_dict = _ANIM_WRITERS[anim_key]
+    if frame.shape != anim_dict['shape']:
+        warn('Frame size '+str(frame.shape)+' different from animation ' +
+             'frame size '+str(anim_dict['shape']) +
+             '. Frame not added to animation '+anim_dict['fname'])
+        return None
+
+    anim_dict['writer'].append_data(frame)
+
+    return anim_dict['fname']
+
+
+def close_animations():
+    """
+    Closes all the animations being written by the current process
+
+    Returns
+    -------
+    fname_list : list of str
+        the names of the animation files closed
+
+    """
+    fname_list = []
+    for anim_dict in _ANIM_WRITERS.values():
+        try:
+            anim_dict['writer'].close()
+            fname_list.append(anim_dict['fname'])
+            print('----- saved animation '+anim_dict['fname'])
+        except Exception as ee:
+            warn(str(ee))
+            warn('Unable to close animation '+anim_dict['fname'])
+    _ANIM_WRITERS.clear()
+
+    return fname_list
@@ -22,9 +22,13 @@ Functions to plot radar volume data
     plot_along_coord
     plot_field_coverage
     _plot_time_range
+    _get_fig_key
+    _cache_fig
+    _plot_cached_fig
 
 """
 from warnings import warn
+from collections import OrderedDict
 
 import numpy as np
 
@@ -47,6 +51,11 @@ from .plots import plot_quantiles, plot_histogram
 from ..util.radar_utils import compute_quantiles_sweep, find_ang_index
 from ..util.radar_utils import compute_histogram_sweep
 
+# figures kept for reuse by the PPI and RHI plots when reuseFig is set in the
+# image configuration
+_FIG_CACHE = OrderedDict()
+_FIG_CACHE_MAXSIZE = 20
+
 
 def plot_ppi(radar, field_name, ind_el, prdcfg, fname_list, plot_type='PPI',
              titl=None, step=None, quantiles=None, save_fig=True):
@@ -93,6 +102,15 @@ def plot_ppi(radar, field_name, ind_el, prdcfg, fname_list, plot_type='PPI',
     if plot_type == 'PPI':
         dpi = prdcfg['ppiImageConfig'].get('dpi', 72)
 
+        # render with a figure from a previous call if possible
+        reuse_fig = prdcfg['ppiImageConfig'].get('reuseFig', 0) and save_fig
+        if reuse_fig:
+            fig_key = _get_fig_key(
+                'PPI', field_name, prdcfg['ppiImageConfig'], dpi)
+            if _plot_cached_fig(fig_key, radar, field_name, ind_el,
+                                fname_list, titl=titl, dpi=dpi):
+                return fname_list
+
         norm, ticks, ticklabs = get_norm(field_name)
 
         xsize = prdcfg['ppiImageConfig']['xsize']
@@ -127,7 +145,12 @@ def plot_ppi(radar, field_name, ind_el, prdcfg, fname_list, plot_type='PPI',
         if save_fig:
             for fname in fname_list:
                 fig.savefig(fname, dpi=dpi)
-            plt.close(fig)
+            if reuse_fig:
+                _cache_fig(
+                    fig_key, fig, ax, display.plots[-1], radar, ind_el,
+                    prdcfg['ppiImageConfig'], dpi)
+            else:
+                plt.close(fig)
 
             return fname_list
 
@@ -286,6 +309,15 @@ def plot_rhi(radar, field_name, ind_az, prdcfg, fname_list, plot_type='RHI',
     if plot_type == 'RHI':
         dpi = prdcfg['ppiImageConfig'].get('dpi', 72)
 
+        # render with a figure from a previous call if possible
+        reuse_fig = prdcfg['rhiImageConfig'].get('reuseFig', 0) and save_fig
+        if reuse_fig:
+            fig_key = _get_fig_key(
+                'RHI', field_name, prdcfg['rhiImageConfig'], dpi)
+            if _plot_cached_fig(fig_key, radar, field_name, ind_az,
+                                fname_list, titl=titl, dpi=dpi):
+                return fname_list
+
         norm, ticks, ticklabs = get_norm(field_name)
 
         xsize = prdcfg['rhiImageConfig']['xsize']
@@ -314,7 +346,12 @@ def plot_rhi(radar, field_name, ind_az, prdcfg, fname_list, plot_type='RHI',
         if save_fig:
             for fname in fname_list:
                 fig.savefig(fname, dpi=dpi)
-            plt.close(fig)
+            if reuse_fig:
+                _cache_fig(
+                    fig_key, fig, ax, display.plots[-1], radar, ind_az,
+                    prdcfg['rhiImageConfig'], dpi)
+            else:
+                plt.close(fig)
 
             return fname_list
 
@@ -1456,3 +1493,153 @@ def _plot_time_range(rad_time, rad_range, rad_data, field_name, fname_list,
     plt.close(fig)
 
     return fname_list
+
+
+def _get_fig_key(plot_type, field_name, imgcfg, dpi):
+    """
+    Gets the key identifying a cached figure
+
+    Parameters
+    ----------
+    plot_type : str
+        type of plot (PPI or RHI)
+    field_name : str
+        name of the radar field plotted
+    imgcfg : dict
+        image configuration
+    dpi : int
+        dots per inch of the figure
+
+    Returns
+    -------
+    fig_key : tuple
+        the key
+
+    """
+    return (plot_type, field_name, dpi,
+            tuple(sorted((key, repr(val)) for key, val in imgcfg.items())))
+
+
+def _cache_fig(fig_key, fig, ax, mesh, radar, ind_sweep, imgcfg, dpi):
+    """
+    Keeps a figure in memory so that it can be used to plot other data with
+    the same field and geometry. If the cache is full the least recently used
+    figure is closed. Figures of sweeps containing antenna transition rays
+    are closed instead of cached since the rays plotted depend on the volume
+
+    Parameters
+    ----------
+    fig_key : tuple
+        the figure key
+    fig, ax : Figure and Axes objects
+        the figure and its axes
+    mesh : QuadMesh object
+        the data artist of the figure
+    radar : Radar object
+        the radar object plotted
+    ind_sweep : int
+        the sweep plotted
+    imgcfg : dict
+        image configuration
+    dpi : int
+        dots per inch of the figure
+
+    """
+    if fig_key in _FIG_CACHE:
+        plt.close(_FIG_CACHE.pop(fig_key)['fig'])
+
+    sweep_slice = radar.get_slice(ind_sweep)
+    if radar.antenna_transition is not None:
+        if np.any(radar.antenna_transition['data'][sweep_slice]):
+            plt.close(fig)
+            return
+
+    # maximum angular difference to keep gate positions within half a pixel
+    npixels = max(imgcfg['xsize'], imgcfg['ysize'])*dpi
+    extent = max(imgcfg['xmax']-imgcfg['xmin'], imgcfg['ymax']-imgcfg['ymin'])
+    ang_tol = np.rad2deg(
+        0.5*extent/npixels/(radar.range['data'][-1]/1000.))
+
+    _FIG_CACHE[fig_key] = {
+        'fig': fig,
+        'ax': ax,
+        'mesh': mesh,
+        'azimuth': radar.azimuth['data'][sweep_slice],
+        'elevation': radar.elevation['data'][sweep_slice],
+        'range': radar.range['data'],
+        'shape': np.shape(mesh.get_array()),
+        'ang_tol': ang_tol}
+
+    while len(_FIG_CACHE) > _FIG_CACHE_MAXSIZE:
+        _, fig_dict = _FIG_CACHE.popitem(last=False)
+        plt.close(fig_dict['fig'])
+
+
+def _plot_cached_fig(fig_key, radar, field_name, ind_sweep, fname_list,
+                     titl=None, dpi=72):
+    """
+    Plots the radar data using a cached figure. Only the data and the title
+    of the figure are updated. The figure is used only if the sweep
+    geometry matches the one of the cached figure within the pixel size
+
+    Parameters
+    ----------
+    fig_key : tuple
+        the figure key
+    radar : Radar object
+        object containing the radar data to plot
+    field_name : str
+        name of the radar field to plot
+    ind_sweep : int
+        sweep index to plot
+    fname_list : list of str
+        list of names of the files where to store the plot
+    titl : str
+        Plot title
+    dpi : int
+        dots per inch of the figure
+
+    Returns
+    -------
+    plotted : bool
+        True if the cached figure has been used
+
+    """
+    if fig_key not in _FIG_CACHE:
+        return False
+    fig_dict = _FIG_CACHE[fig_key]
+
+    sweep_slice = radar.get_slice(ind_sweep)
+    azimuth = radar.azimuth['data'][sweep_slice]
+    elevation = radar.elevation['data'][sweep_slice]
+
+    # transition rays are not plotted
+    if radar.antenna_transition is not None:
+        if np.any(radar.antenna_transition['data'][sweep_slice]):
+            return False
+    if (azimuth.size != fig_dict['azimuth'].size or
+            not np.array_equal(radar.range['data'], fig_dict['range'])):
+        return False
+    dazi = np.abs(azimuth-fig_dict['azimuth'])
+    dazi = np.minimum(dazi, 360.-dazi)
+    if (np.max(dazi) > fig_dict['ang_tol'] or
+            np.max(np.abs(elevation-fig_dict['elevation'])) >
+            fig_dict['ang_tol']):
+        return False
+
+    if titl is None:
+        titl = pyart.graph.common.generate_title(radar, field_name, ind_sweep)
+
+    data = radar.get_field(ind_sweep, field_name)
+    if len(fig_dict['shape']) == 1:
+        data = data.ravel()
+    if np.shape(data) != fig_dict['shape']:
+        return False
+    fig_dict['mesh'].set_array(data)
+    fig_dict['ax'].set_title(titl)
+
+    for fname in fname_list:
+        fig_dict['fig'].savefig(fname, dpi=dpi)
+    _FIG_CACHE.move_to_end(fig_key)
+
+    return True
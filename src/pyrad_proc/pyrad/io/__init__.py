@@ -39,6 +39,24 @@ Reading cosmo data
     read_cosmo_coord
     read_hzt_data
 
+Model data cache
+================
+
+.. autosummary::
+    :toctree: generated/
+
+    ModelDataCache
+    get_model_cache
+
+Time series buffer
+==================
+
+.. autosummary::
+    :toctree: generated/
+
+    TimeSeriesBuffer
+    get_timeseries_buffer
+
 Reading other data
 ==================
 
@@ -66,6 +84,7 @@ Reading other data
     read_solar_flux
     read_selfconsistency
     read_antenna_pattern
+    read_grid_weights
     read_meteorage
     read_lightning
     read_lightning_traj
@@ -73,7 +92,9 @@ Reading other data
     read_trt_scores
     read_trt_data
     read_trt_traj_data
+    read_trt_data_period
     read_trt_cell_lightning
+    get_sensor_cache
     read_rhi_profile
     read_histogram
     read_quantiles
@@ -111,6 +132,8 @@ Writing data
     write_colocated_data_time_avg
     write_sun_hits
     write_sun_retrieval
+    write_grid_weights
+    get_hdf5_compression
 
 
 Auxiliary functions
@@ -166,6 +189,8 @@ from .read_data_cosmo import get_cosmo_fields
 from .read_data_hzt import read_hzt_data, hzt2radar_data, hzt2radar_coord
 from .read_data_hzt import get_iso0_field
 
+from .model_cache import ModelDataCache, get_model_cache
+
 from .read_data_other import read_status, read_rad4alp_cosmo, read_rad4alp_vis
 from .read_data_other import read_timeseries, read_monitoring_ts, read_ts_cum
 from .read_data_other import read_intercomp_scores_ts, read_quantiles
@@ -175,13 +200,15 @@ from .read_data_other import read_last_state, read_rhi_profile
 from .read_data_other import read_excess_gates, read_histogram
 from .read_data_other import read_profile_ts, read_histogram_ts
 from .read_data_other import read_quantiles_ts, read_ml_ts
+from .read_data_other import read_grid_weights
 
 from .read_data_sensor import read_lightning, read_lightning_traj
 from .read_data_sensor import get_sensor_data, read_smn, read_smn2
 from .read_data_sensor import read_disdro_scattering, read_trt_data
 from .read_data_sensor import read_trt_traj_data, read_lightning_all
 from .read_data_sensor import read_trt_scores, read_trt_cell_lightning
-from .read_data_sensor import read_meteorage
+from .read_data_sensor import read_trt_data_period
+from .read_data_sensor import read_meteorage, get_sensor_cache
 
 from .read_data_sun import read_sun_hits_multiple_days, read_sun_hits
 from .read_data_sun import read_sun_retrieval, read_solar_flux
@@ -196,6 +223,9 @@ from .write_data import write_last_state, write_alarm_msg, send_msg
 from .write_data import write_excess_gates, write_trt_cell_data
 from .write_data import write_histogram, write_quantiles, write_ts_lightning
 from .write_data import write_trt_cell_scores, write_trt_cell_lightning
+from .write_data import write_grid_weights, get_hdf5_compression
+
+from .timeseries_buffer import TimeSeriesBuffer, get_timeseries_buffer
 
 from .io_aux import get_save_dir, make_filename, get_new_rainbow_file_name
 from .io_aux import get_datetime, get_dataset_fields, map_hydro, map_Doppler
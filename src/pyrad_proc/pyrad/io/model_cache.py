@@ -0,0 +1,188 @@
+"""
+pyrad.io.model_cache
+====================
+
+Process-wide cache of the NWP model data (COSMO, HZT) read from file. The
+cache is shared by all datasets and radars of a processing run so that a
+model file is only read once even if several datasets need it.
+
+.. autosummary::
+    :toctree: generated/
+
+    ModelDataCache
+    get_model_cache
+
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ModelDataCache(object):
+    """
+    Size bounded least recently used cache of model data. Each entry is a
+    dictionary (or a tuple/list of dictionaries) of data and metadata and is
+    identified by a key containing the name of the model file and of the
+    variable. The cached entries are shared among users and must not be
+    modified in place.
+
+    Attributes
+    ----------
+    max_size : float
+        maximum size of the cached data [bytes]
+    size : float
+        current size of the cached data [bytes]
+    nhits, nmisses : int
+        number of cache hits and misses
+
+    Methods:
+    --------
+    get : Get an entry from the cache
+    put : Put an entry in the cache
+    trim : Remove the least recently used entries
+    clear : Remove all the entries
+    print_stats : Print the cache statistics
+
+    """
+
+    def __init__(self, max_size=2e9):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        max_size : float
+            maximum size of the cached data [bytes]
+
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.nhits = 0
+        self.nmisses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Get an entry from the cache
+
+        Parameters
+        ----------
+        key : tuple
+            the entry key
+
+        Returns
+        -------
+        value : dict or None
+            the cached entry or None if it is not in the cache
+
+        """
+        if key not in self._entries:
+            self.nmisses += 1
+            return None
+
+        self.nhits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, value):
+        """
+        Put an entry in the cache. The least recently used entries are
+        removed until the cache fits in its maximum size. Entries larger than
+        the cache maximum size are not cached
+
+        Parameters
+        ----------
+        key : tuple
+            the entry key
+        value : dict
+            the entry
+
+        """
+        nbytes = _get_nbytes(value)
+        if nbytes > self.max_size:
+            return
+
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, nbytes)
+        self.size += nbytes
+
+        while self.size > self.max_size:
+            _, (_, nbytes_old) = self._entries.popitem(last=False)
+            self.size -= nbytes_old
+
+    def trim(self, size):
+        """
+        Remove the least recently used entries until the cached data fits in
+        a given size
+
+        Parameters
+        ----------
+        size : float
+            the size to fit in [bytes]
+
+        """
+        while self._entries and self.size > size:
+            _, (_, nbytes_old) = self._entries.popitem(last=False)
+            self.size -= nbytes_old
+        if not self._entries:
+            self.size = 0
+
+    def clear(self):
+        """
+        Remove all the entries of the cache
+
+        """
+        self._entries.clear()
+        self.size = 0
+
+    def print_stats(self):
+        """
+        Print the cache statistics
+
+        """
+        print('- Model data cache: %d hits, %d misses, %d entries, %.1f MB' %
+              (self.nhits, self.nmisses, len(self._entries),
+               self.size/1e6))
+
+
+_MODEL_CACHE = ModelDataCache()
+
+
+def get_model_cache():
+    """
+    Get the model data cache shared by all the datasets of the process
+
+    Returns
+    -------
+    model_cache : ModelDataCache object
+        the model data cache
+
+    """
+    return _MODEL_CACHE
+
+
+def _get_nbytes(value):
+    """
+    Computes the size of the arrays contained in a cache entry
+
+    Parameters
+    ----------
+    value : dict, list, tuple or array
+        the cache entry
+
+    Returns
+    -------
+    nbytes : int
+        the size of the arrays [bytes]
+
+    """
+    if isinstance(value, dict):
+        return sum(_get_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_get_nbytes(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    return 0
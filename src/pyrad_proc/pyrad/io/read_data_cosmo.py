@@ -13,6 +13,7 @@ Functions for reading COSMO data
     read_cosmo_data
     read_cosmo_coord
     _ncvar_to_dict
+    _get_cosmo_window
     _prepare_for_interpolation
     _put_radar_in_swiss_coord
 
@@ -21,7 +22,6 @@ Functions for reading COSMO data
 
 from warnings import warn
 import numpy as np
-from scipy.interpolate import NearestNDInterpolator
 from scipy.spatial import cKDTree
 import netCDF4
 
@@ -29,6 +29,7 @@ from pyart.core import wgs84_to_swissCH1903
 from pyart.config import get_metadata, get_field_name
 
 from ..io.io_aux import get_fieldname_cosmo
+from ..io.model_cache import get_model_cache
 
 # from memory_profiler import profile
 
@@ -37,7 +38,7 @@ from ..io.io_aux import get_fieldname_cosmo
 
 def cosmo2radar_data(radar, cosmo_coord, cosmo_data, time_index=0,
                      slice_xy=True, slice_z=False,
-                     field_names=['temperature']):
+                     field_names=['temperature'], cosmo_ind=None):
     """
     get the COSMO value corresponding to each radar gate using nearest
     neighbour interpolation
@@ -61,6 +62,11 @@ def cosmo2radar_data(radar, cosmo_coord, cosmo_data, time_index=0,
         of the radar field
     field_names : str
         names of COSMO fields to convert (default temperature)
+    cosmo_ind : dict or None
+        dictionary containing a field of COSMO indices as returned by
+        cosmo2radar_coord. If None it is computed from the radar and COSMO
+        coordinates. The nearest neighbour search is performed only once and
+        shared by all fields
 
     Returns
     -------
@@ -68,45 +74,13 @@ def cosmo2radar_data(radar, cosmo_coord, cosmo_data, time_index=0,
         list of dictionary with the COSMO fields and metadata
 
     """
-    # debugging
-    # start_time = time.time()
-
-    x_radar, y_radar, z_radar = _put_radar_in_swiss_coord(radar)
-
-    (x_cosmo, y_cosmo, z_cosmo, ind_xmin, ind_ymin, ind_zmin, ind_xmax,
-     ind_ymax, ind_zmax) = _prepare_for_interpolation(
-         x_radar, y_radar, z_radar, cosmo_coord, slice_xy=slice_xy,
-         slice_z=slice_z)
-
-    cosmo_fields = []
-    for field in field_names:
-        if field not in cosmo_data:
-            warn('COSMO field '+field+' data not available')
-        else:
-            values = cosmo_data[field]['data'][
-                time_index, ind_zmin:ind_zmax+1, ind_ymin:ind_ymax+1,
-                ind_xmin:ind_xmax+1].flatten()
-            # find interpolation function
-            interp_func = NearestNDInterpolator(
-                (z_cosmo, y_cosmo, x_cosmo), values)
-
-            del values
-
-            # interpolate
-            data_interp = interp_func((z_radar, y_radar, x_radar))
-
-            # put field
-            field_dict = get_metadata(field)
-            field_dict['data'] = data_interp.astype(float)
-            cosmo_fields.append({field: field_dict})
-
-            del data_interp
-
-    if not cosmo_fields:
-        warn('COSMO data not available')
-        return None
+    if cosmo_ind is None:
+        cosmo_ind = cosmo2radar_coord(
+            radar, cosmo_coord, slice_xy=slice_xy, slice_z=slice_z)
 
-    return cosmo_fields
+    return get_cosmo_fields(
+        cosmo_data, cosmo_ind, time_index=time_index,
+        field_names=field_names)
 
 
 def cosmo2radar_coord(radar, cosmo_coord, slice_xy=True, slice_z=False,
@@ -161,10 +135,11 @@ def cosmo2radar_coord(radar, cosmo_coord, slice_xy=True, slice_z=False,
     nx = ind_xmax-ind_xmin+1
     ny = ind_ymax-ind_ymin+1
 
-    ind_z = (ind_vec/(nx*ny)).astype(int)+ind_zmin
-    ind_y = ((ind_vec-nx*ny*ind_z)/nx).astype(int)+ind_ymin
-    ind_x = ((ind_vec-nx*ny*ind_z) % nx).astype(int)+ind_xmin
-    ind_cosmo = (ind_x+nx_cosmo*ind_y+nx_cosmo*ny_cosmo*ind_z).astype(int)
+    ind_z, ind_yx = np.divmod(ind_vec, nx*ny)
+    ind_y, ind_x = np.divmod(ind_yx, nx)
+    ind_cosmo = (
+        (ind_x+ind_xmin)+nx_cosmo*(ind_y+ind_ymin) +
+        nx_cosmo*ny_cosmo*(ind_z+ind_zmin)).astype(int)
 
     cosmo_ind_field = get_metadata(field_name)
     cosmo_ind_field['data'] = ind_cosmo.reshape(radar.nrays, radar.ngates)
@@ -200,16 +175,37 @@ def get_cosmo_fields(cosmo_data, cosmo_ind, time_index=0,
 
     """
     nrays, ngates = np.shape(cosmo_ind['data'])
+    ind_vec = np.asarray(cosmo_ind['data']).ravel()
+
+    # put the indices in the coordinates of the hyperslab read
+    window = cosmo_data.get('window', None)
+    if window is not None:
+        nx_cosmo = cosmo_data['x']['data'].size
+        ny_cosmo = cosmo_data['y']['data'].size
+        ind_xmin, ind_ymin, ind_zmin, ind_xmax, ind_ymax, _ = window
+        nx = ind_xmax-ind_xmin+1
+        ny = ind_ymax-ind_ymin+1
+
+        ind_z, ind_yx = np.divmod(ind_vec, nx_cosmo*ny_cosmo)
+        ind_y, ind_x = np.divmod(ind_yx, nx_cosmo)
+        if (ind_x.min() < ind_xmin or ind_x.max() > ind_xmax or
+                ind_y.min() < ind_ymin or ind_y.max() > ind_ymax or
+                ind_z.min() < ind_zmin or ind_z.max() > window[5]):
+            warn('COSMO indices outside of the COSMO data read')
+            return None
+        ind_vec = (
+            (ind_x-ind_xmin)+nx*(ind_y-ind_ymin)+nx*ny*(ind_z-ind_zmin))
+
     cosmo_fields = []
     for field in field_names:
         if field not in cosmo_data:
             warn('COSMO field '+field+' data not available')
         else:
-            values = cosmo_data[field]['data'][time_index, :, :, :].flatten()
+            values = cosmo_data[field]['data'][time_index, :, :, :].ravel()
 
             # put field
             field_dict = get_metadata(field)
-            field_dict['data'] = values[cosmo_ind['data'].flatten()].reshape(
+            field_dict['data'] = values[ind_vec].reshape(
                 nrays, ngates).astype(float)
             cosmo_fields.append({field: field_dict})
 
@@ -220,7 +216,8 @@ def get_cosmo_fields(cosmo_data, cosmo_ind, time_index=0,
     return cosmo_fields
 
 # @profile
-def read_cosmo_data(fname, field_names=['temperature'], celsius=True):
+def read_cosmo_data(fname, field_names=['temperature'], celsius=True,
+                    cosmo_ind=None, timeinfo=None):
     """
     Reads COSMO data from a netcdf file
 
@@ -233,11 +230,20 @@ def read_cosmo_data(fname, field_names=['temperature'], celsius=True):
     celsius : Boolean
         if True and variable temperature converts data from Kelvin
         to Centigrade
+    cosmo_ind : dict or None
+        dictionary containing a field of COSMO indices as returned by
+        cosmo2radar_coord. If not None only the smallest hyperslab of the
+        COSMO domain containing all the indexed cells is read
+    timeinfo : datetime or None
+        if not None only the forecast time step closest to timeinfo is read
 
     Returns
     -------
     cosmo_data : dictionary
-        dictionary with the data and metadata
+        dictionary with the data and metadata. If only a hyperslab has been
+        read the key 'window' contains its limits (ind_xmin, ind_ymin,
+        ind_zmin, ind_xmax, ind_ymax, ind_zmax). The coordinates always refer
+        to the full COSMO domain
 
     """
     # read the data
@@ -247,41 +253,69 @@ def read_cosmo_data(fname, field_names=['temperature'], celsius=True):
     # 4.1 Global attribute -> move to metadata dictionary
     metadata = dict([(k, getattr(ncobj, k)) for k in ncobj.ncattrs()])
 
-    # read data for requested fields
+    # 4.2 put variables in dictionary
+    x_1 = _ncvar_to_dict(ncvars['x_1'])
+    y_1 = _ncvar_to_dict(ncvars['y_1'])
+    lon_1 = _ncvar_to_dict(ncvars['lon_1'])
+    lat_1 = _ncvar_to_dict(ncvars['lat_1'])
+    z_1 = _ncvar_to_dict(ncvars['z_1'])
+    z_bnds_1 = _ncvar_to_dict(ncvars['z_bnds_1'])
+    time_data = _ncvar_to_dict(ncvars['time'])
+
+    # hyperslab to read
+    ind_time = slice(None)
+    if timeinfo is not None:
+        dtcosmo = netCDF4.num2date(time_data['data'], time_data['units'])
+        ind_aux = np.argmin(abs(dtcosmo-timeinfo))
+        ind_time = slice(ind_aux, ind_aux+1)
+        time_data['data'] = time_data['data'][ind_time]
+
+    window = None
+    ind_zyx = (slice(None), slice(None), slice(None))
+    if cosmo_ind is not None:
+        window = _get_cosmo_window(
+            cosmo_ind['data'], x_1['data'].size, y_1['data'].size)
+        ind_xmin, ind_ymin, ind_zmin, ind_xmax, ind_ymax, ind_zmax = window
+        ind_zyx = (slice(ind_zmin, ind_zmax+1), slice(ind_ymin, ind_ymax+1),
+                   slice(ind_xmin, ind_xmax+1))
+
+    # read data for requested fields. The fields already read by other
+    # datasets are taken from the shared model data cache
+    model_cache = get_model_cache()
     cosmo_data = dict()
     found = False
     for field in field_names:
         cosmo_name = get_fieldname_cosmo(field)
         if cosmo_name not in ncvars:
             warn(field+' data not present in COSMO file '+fname)
-        else:
-            var_data = _ncvar_to_dict(ncvars[cosmo_name], dtype='float16')
+            continue
+
+        cache_key = (
+            fname, field, celsius, window,
+            (ind_time.start, ind_time.stop))
+        var_data = model_cache.get(cache_key)
+        if var_data is None:
+            var_data = _ncvar_to_dict(
+                ncvars[cosmo_name], dtype='float16',
+                ind=(ind_time, )+ind_zyx)
             if field == 'temperature' and celsius:
                 var_data['data'] -= 273.15
                 var_data['units'] = 'degrees Celsius'
             if field == 'vertical_wind_shear':
                 var_data['data'] *= 1000.
                 var_data['units'] = 'meters_per_second_per_km'
-            cosmo_data.update({field: var_data})
-            found = True
-            del var_data
-    if not found:
-        warn('No field available in COSMO file '+fname)
-        ncobj.close()
-        return None
-
-    # 4.2 put variables in dictionary
-    x_1 = _ncvar_to_dict(ncvars['x_1'])
-    y_1 = _ncvar_to_dict(ncvars['y_1'])
-    lon_1 = _ncvar_to_dict(ncvars['lon_1'])
-    lat_1 = _ncvar_to_dict(ncvars['lat_1'])
-    z_1 = _ncvar_to_dict(ncvars['z_1'])
-    z_bnds_1 = _ncvar_to_dict(ncvars['z_bnds_1'])
-    time_data = _ncvar_to_dict(ncvars['time'])
+            model_cache.put(cache_key, var_data)
+        cosmo_data.update({field: var_data})
+        found = True
+        del var_data
 
     # close object
     ncobj.close()
 
+    if not found:
+        warn('No field available in COSMO file '+fname)
+        return None
+
     cosmo_data.update({
         'metadata': metadata,
         'time': time_data,
@@ -290,7 +324,8 @@ def read_cosmo_data(fname, field_names=['temperature'], celsius=True):
         'z': z_1,
         'z_bnds': z_bnds_1,
         'lon': lon_1,
-        'lat': lat_1
+        'lat': lat_1,
+        'window': window
     })
 
     return cosmo_data
@@ -311,6 +346,13 @@ def read_cosmo_coord(fname, zmin=None):
         dictionary with the data and metadata
 
     """
+    # coordinates shared with other datasets
+    model_cache = get_model_cache()
+    cache_key = (fname, 'cosmo_coord', zmin)
+    cosmo_coord = model_cache.get(cache_key)
+    if cosmo_coord is not None:
+        return cosmo_coord
+
     # read the data
     try:
         ncobj = netCDF4.Dataset(fname)
@@ -349,6 +391,7 @@ def read_cosmo_coord(fname, zmin=None):
             'hsurf': hsurf,
             'fr_land': fr_land,
         }
+        model_cache.put(cache_key, cosmo_coord)
 
         return cosmo_coord
     except EnvironmentError:
@@ -356,11 +399,17 @@ def read_cosmo_coord(fname, zmin=None):
         return None
 
 
-def _ncvar_to_dict(ncvar, dtype='float64'):
-    """ Convert a NetCDF Dataset variable to a dictionary. """
+def _ncvar_to_dict(ncvar, dtype='float64', ind=None):
+    """
+    Convert a NetCDF Dataset variable to a dictionary. If ind is not None
+    only the hyperslab defined by the tuple of slices ind is read
+    """
     # copy all attributes
     d = dict((k, getattr(ncvar, k)) for k in ncvar.ncattrs())
-    d.update({'data': ncvar[:]})
+    if ind is None:
+        d.update({'data': ncvar[:]})
+    else:
+        d.update({'data': ncvar[ind]})
     if '_FillValue' in d:
         d['data'] = np.ma.asarray(d['data'], dtype=dtype)
         d['data'] = np.ma.masked_values(d['data'], float(d['_FillValue']))
@@ -370,6 +419,32 @@ def _ncvar_to_dict(ncvar, dtype='float64'):
     return d
 
 
+def _get_cosmo_window(ind_cosmo, nx_cosmo, ny_cosmo):
+    """
+    gets the limits of the smallest COSMO hyperslab containing a set of
+    COSMO cells
+
+    Parameters
+    ----------
+    ind_cosmo : int array
+        flat indices of the cells in the COSMO domain
+    nx_cosmo, ny_cosmo : int
+        size of the COSMO domain in the x and y dimensions
+
+    Returns
+    -------
+    ind_xmin, ind_ymin, ind_zmin, ind_xmax, ind_ymax, ind_zmax : ints
+        the minimum and maximum indices of each dimension
+
+    """
+    ind_z, ind_yx = np.divmod(np.asarray(ind_cosmo).ravel(),
+                              nx_cosmo*ny_cosmo)
+    ind_y, ind_x = np.divmod(ind_yx, nx_cosmo)
+
+    return (int(ind_x.min()), int(ind_y.min()), int(ind_z.min()),
+            int(ind_x.max()), int(ind_y.max()), int(ind_z.max()))
+
+
 def _prepare_for_interpolation(x_radar, y_radar, z_radar, cosmo_coord,
                                slice_xy=True, slice_z=False):
     """
@@ -23,6 +23,7 @@ from scipy.spatial import cKDTree
 from pyart.config import get_metadata, get_field_name
 from pyart.aux_io import read_product
 from ..io.read_data_cosmo import _put_radar_in_swiss_coord
+from ..io.model_cache import get_model_cache
 
 
 def hzt2radar_data(radar, hzt_coord, hzt_data, slice_xy=True,
@@ -172,6 +173,13 @@ def read_hzt_data(fname, chy0=255., chx0=-160.):
         dictionary with the data and metadata
 
     """
+    # data shared with other datasets
+    model_cache = get_model_cache()
+    cache_key = (fname, 'HZT', chy0, chx0)
+    hzt_data = model_cache.get(cache_key)
+    if hzt_data is not None:
+        return hzt_data
+
     ret = read_product(fname, physic_value=True, masked_array=True)
     if ret is None:
         warn('Unable to read HZT file '+fname)
@@ -217,6 +225,7 @@ def read_hzt_data(fname, chy0=255., chx0=-160.):
         'x': x_1,
         'y': y_1
     }
+    model_cache.put(cache_key, hzt_data)
 
     return hzt_data
 
@@ -31,6 +31,9 @@ Functions for reading auxiliary data
     read_intercomp_scores_ts_old_v0
     read_selfconsistency
     read_antenna_pattern
+    read_grid_weights
+    _read_csv_columns
+    _str_to_datetime
 
 """
 
@@ -45,6 +48,7 @@ import time
 import errno
 
 import numpy as np
+from scipy.sparse import load_npz
 
 from pyart.config import get_fillvalue, get_metadata
 
@@ -619,41 +623,20 @@ def read_colocated_gates(fname):
     """
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            nrows = sum(1 for row in reader)
-            rad1_ray_ind = np.empty(nrows, dtype=int)
-            rad1_rng_ind = np.empty(nrows, dtype=int)
-            rad1_ele = np.empty(nrows, dtype=float)
-            rad1_azi = np.empty(nrows, dtype=float)
-            rad1_rng = np.empty(nrows, dtype=float)
-            rad2_ray_ind = np.empty(nrows, dtype=int)
-            rad2_rng_ind = np.empty(nrows, dtype=int)
-            rad2_ele = np.empty(nrows, dtype=float)
-            rad2_azi = np.empty(nrows, dtype=float)
-            rad2_rng = np.empty(nrows, dtype=float)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            for i, row in enumerate(reader):
-                rad1_ray_ind[i] = int(row['rad1_ray_ind'])
-                rad1_rng_ind[i] = int(row['rad1_rng_ind'])
-                rad1_ele[i] = float(row['rad1_ele'])
-                rad1_azi[i] = float(row['rad1_azi'])
-                rad1_rng[i] = float(row['rad1_rng'])
-                rad2_ray_ind[i] = int(row['rad2_ray_ind'])
-                rad2_rng_ind[i] = int(row['rad2_rng_ind'])
-                rad2_ele[i] = float(row['rad2_ele'])
-                rad2_azi[i] = float(row['rad2_azi'])
-                rad2_rng[i] = float(row['rad2_rng'])
-
+            columns = _read_csv_columns(csvfile)
             csvfile.close()
 
-            return (rad1_ray_ind, rad1_rng_ind, rad1_ele, rad1_azi, rad1_rng,
-                    rad2_ray_ind, rad2_rng_ind, rad2_ele, rad2_azi, rad2_rng)
+            return (
+                columns['rad1_ray_ind'].astype(int),
+                columns['rad1_rng_ind'].astype(int),
+                columns['rad1_ele'].astype(float),
+                columns['rad1_azi'].astype(float),
+                columns['rad1_rng'].astype(float),
+                columns['rad2_ray_ind'].astype(int),
+                columns['rad2_rng_ind'].astype(int),
+                columns['rad2_ele'].astype(float),
+                columns['rad2_azi'].astype(float),
+                columns['rad2_rng'].astype(float))
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
@@ -679,52 +662,24 @@ def read_colocated_data(fname):
     """
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            nrows = sum(1 for row in reader)
-            rad1_time = np.empty(nrows, dtype=datetime.datetime)
-            rad1_ray_ind = np.empty(nrows, dtype=int)
-            rad1_rng_ind = np.empty(nrows, dtype=int)
-            rad1_ele = np.empty(nrows, dtype=float)
-            rad1_azi = np.empty(nrows, dtype=float)
-            rad1_rng = np.empty(nrows, dtype=float)
-            rad1_val = np.empty(nrows, dtype=float)
-            rad2_time = np.empty(nrows, dtype=datetime.datetime)
-            rad2_ray_ind = np.empty(nrows, dtype=int)
-            rad2_rng_ind = np.empty(nrows, dtype=int)
-            rad2_ele = np.empty(nrows, dtype=float)
-            rad2_azi = np.empty(nrows, dtype=float)
-            rad2_rng = np.empty(nrows, dtype=float)
-            rad2_val = np.empty(nrows, dtype=float)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            for i, row in enumerate(reader):
-                rad1_time[i] = datetime.datetime.strptime(
-                    row['rad1_time'], '%Y%m%d%H%M%S')
-                rad1_ray_ind[i] = int(row['rad1_ray_ind'])
-                rad1_rng_ind[i] = int(row['rad1_rng_ind'])
-                rad1_ele[i] = float(row['rad1_ele'])
-                rad1_azi[i] = float(row['rad1_azi'])
-                rad1_rng[i] = float(row['rad1_rng'])
-                rad1_val[i] = float(row['rad1_val'])
-                rad2_time[i] = datetime.datetime.strptime(
-                    row['rad2_time'], '%Y%m%d%H%M%S')
-                rad2_ray_ind[i] = int(row['rad2_ray_ind'])
-                rad2_rng_ind[i] = int(row['rad2_rng_ind'])
-                rad2_ele[i] = float(row['rad2_ele'])
-                rad2_azi[i] = float(row['rad2_azi'])
-                rad2_rng[i] = float(row['rad2_rng'])
-                rad2_val[i] = float(row['rad2_val'])
-
+            columns = _read_csv_columns(csvfile)
             csvfile.close()
 
-            return (rad1_time, rad1_ray_ind, rad1_rng_ind, rad1_ele, rad1_azi,
-                    rad1_rng, rad1_val, rad2_time, rad2_ray_ind, rad2_rng_ind,
-                    rad2_ele, rad2_azi, rad2_rng, rad2_val)
+            return (
+                _str_to_datetime(columns['rad1_time']),
+                columns['rad1_ray_ind'].astype(int),
+                columns['rad1_rng_ind'].astype(int),
+                columns['rad1_ele'].astype(float),
+                columns['rad1_azi'].astype(float),
+                columns['rad1_rng'].astype(float),
+                columns['rad1_val'].astype(float),
+                _str_to_datetime(columns['rad2_time']),
+                columns['rad2_ray_ind'].astype(int),
+                columns['rad2_rng_ind'].astype(int),
+                columns['rad2_ele'].astype(float),
+                columns['rad2_azi'].astype(float),
+                columns['rad2_rng'].astype(float),
+                columns['rad2_val'].astype(float))
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
@@ -751,61 +706,28 @@ def read_colocated_data_time_avg(fname):
     """
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            nrows = sum(1 for row in reader)
-            rad1_time = np.empty(nrows, dtype=datetime.datetime)
-            rad1_ray_ind = np.empty(nrows, dtype=int)
-            rad1_rng_ind = np.empty(nrows, dtype=int)
-            rad1_ele = np.empty(nrows, dtype=float)
-            rad1_azi = np.empty(nrows, dtype=float)
-            rad1_rng = np.empty(nrows, dtype=float)
-            rad1_dBZavg = np.empty(nrows, dtype=float)
-            rad1_PhiDPavg = np.empty(nrows, dtype=float)
-            rad1_Flagavg = np.empty(nrows, dtype=float)
-            rad2_time = np.empty(nrows, dtype=datetime.datetime)
-            rad2_ray_ind = np.empty(nrows, dtype=int)
-            rad2_rng_ind = np.empty(nrows, dtype=int)
-            rad2_ele = np.empty(nrows, dtype=float)
-            rad2_azi = np.empty(nrows, dtype=float)
-            rad2_rng = np.empty(nrows, dtype=float)
-            rad2_dBZavg = np.empty(nrows, dtype=float)
-            rad2_PhiDPavg = np.empty(nrows, dtype=float)
-            rad2_Flagavg = np.empty(nrows, dtype=float)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            for i, row in enumerate(reader):
-                rad1_time[i] = datetime.datetime.strptime(
-                    row['rad1_time'], '%Y%m%d%H%M%S')
-                rad1_ray_ind[i] = int(row['rad1_ray_ind'])
-                rad1_rng_ind[i] = int(row['rad1_rng_ind'])
-                rad1_ele[i] = float(row['rad1_ele'])
-                rad1_azi[i] = float(row['rad1_azi'])
-                rad1_rng[i] = float(row['rad1_rng'])
-                rad1_dBZavg[i] = float(row['rad1_dBZavg'])
-                rad1_PhiDPavg[i] = float(row['rad1_PhiDPavg'])
-                rad1_Flagavg[i] = float(row['rad1_Flagavg'])
-                rad2_time[i] = datetime.datetime.strptime(
-                    row['rad2_time'], '%Y%m%d%H%M%S')
-                rad2_ray_ind[i] = int(row['rad2_ray_ind'])
-                rad2_rng_ind[i] = int(row['rad2_rng_ind'])
-                rad2_ele[i] = float(row['rad2_ele'])
-                rad2_azi[i] = float(row['rad2_azi'])
-                rad2_rng[i] = float(row['rad2_rng'])
-                rad2_dBZavg[i] = float(row['rad2_dBZavg'])
-                rad2_PhiDPavg[i] = float(row['rad2_PhiDPavg'])
-                rad2_Flagavg[i] = float(row['rad2_Flagavg'])
-
+            columns = _read_csv_columns(csvfile)
             csvfile.close()
 
-            return (rad1_time, rad1_ray_ind, rad1_rng_ind, rad1_ele, rad1_azi,
-                    rad1_rng, rad1_dBZavg, rad1_PhiDPavg, rad1_Flagavg,
-                    rad2_time, rad2_ray_ind, rad2_rng_ind, rad2_ele, rad2_azi,
-                    rad2_rng, rad2_dBZavg, rad2_PhiDPavg, rad2_Flagavg)
+            return (
+                _str_to_datetime(columns['rad1_time']),
+                columns['rad1_ray_ind'].astype(int),
+                columns['rad1_rng_ind'].astype(int),
+                columns['rad1_ele'].astype(float),
+                columns['rad1_azi'].astype(float),
+                columns['rad1_rng'].astype(float),
+                columns['rad1_dBZavg'].astype(float),
+                columns['rad1_PhiDPavg'].astype(float),
+                columns['rad1_Flagavg'].astype(float),
+                _str_to_datetime(columns['rad2_time']),
+                columns['rad2_ray_ind'].astype(int),
+                columns['rad2_rng_ind'].astype(int),
+                columns['rad2_ele'].astype(float),
+                columns['rad2_azi'].astype(float),
+                columns['rad2_rng'].astype(float),
+                columns['rad2_dBZavg'].astype(float),
+                columns['rad2_PhiDPavg'].astype(float),
+                columns['rad2_Flagavg'].astype(float))
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
@@ -1494,3 +1416,81 @@ def read_antenna_pattern(fname, linear=False, twoway=False):
         pattern['attenuation'] = 10.**(pattern['attenuation']/10.)
 
     return pattern
+
+
+def read_grid_weights(fname):
+    """
+    Reads a file containing the sparse matrix of weights that maps radar
+    gates onto a grid
+
+    Parameters
+    ----------
+    fname : str
+        path of the weights file
+
+    Returns
+    -------
+    weights : scipy sparse matrix
+        the weights matrix. None if the file could not be read
+
+    """
+    try:
+        return load_npz(fname).tocsr()
+    except EnvironmentError as ee:
+        warn(str(ee))
+        warn('Unable to read file '+fname)
+        return None
+
+
+def _read_csv_columns(csvfile):
+    """
+    Reads a csv file with a header line into columns. Lines starting with
+    '#' are considered comments
+
+    Parameters
+    ----------
+    csvfile : file object
+        the opened csv file
+
+    Returns
+    -------
+    columns : dict
+        dictionary containing a numpy array of strings for each column of
+        the file
+
+    """
+    reader = csv.reader(row for row in csvfile if not row.startswith('#'))
+    fieldnames = next(reader)
+    rows = list(reader)
+    if not rows:
+        return {
+            fieldname: np.empty(0, dtype=str) for fieldname in fieldnames}
+
+    data = np.array(rows, dtype=str)
+    return {
+        fieldname: data[:, i] for i, fieldname in enumerate(fieldnames)}
+
+
+def _str_to_datetime(time_str, time_format='%Y%m%d%H%M%S'):
+    """
+    Converts an array of time strings into an array of datetime objects
+
+    Parameters
+    ----------
+    time_str : array of str
+        the time strings
+    time_format : str
+        the format of the time strings
+
+    Returns
+    -------
+    time_data : array of datetime objects
+        the converted times
+
+    """
+    time_data = np.empty(time_str.size, dtype=datetime.datetime)
+    time_data[:] = [
+        datetime.datetime.strptime(time_aux, time_format)
+        for time_aux in time_str]
+
+    return time_data
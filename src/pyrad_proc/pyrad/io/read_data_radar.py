@@ -53,6 +53,8 @@ from .io_aux import get_datatype_odim, find_date_in_file_name
 from .io_aux import get_datatype_fields, get_datetime, map_hydro, map_Doppler
 from .io_aux import find_cosmo_file, find_rad4alpcosmo_file
 
+from ..util.radar_utils import convert_field_dtypes
+
 
 def get_data(voltime, datatypesdescr, cfg):
     """
@@ -363,6 +365,11 @@ def get_data(voltime, datatypesdescr, cfg):
         radar.init_gate_longitude_latitude()
         radar.init_gate_altitude()
 
+    # apply the data type policy
+    convert_field_dtypes(
+        radar, float_dtype=cfg.get('fieldDtype', None),
+        class_dtype=cfg.get('classFieldDtype', None))
+
     return radar
 
 
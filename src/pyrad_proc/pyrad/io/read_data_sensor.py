@@ -11,29 +11,48 @@ Functions for reading data from other sensors
     read_trt_cell_lightning
     read_trt_data
     read_trt_traj_data
+    read_trt_data_period
     read_lightning
     read_meteorage
     read_lightning_traj
     read_lightning_all
+    get_sensor_cache
     get_sensor_data
     read_smn
     read_smn2
     read_disdro_scattering
     read_disdro
+    _get_csv_column
+    _get_sensor_file_data
+    _read_lightning_file
+    _read_meteorage_file
 
 """
 
 import os
 import datetime
 import csv
+import warnings
 from warnings import warn
-from copy import deepcopy
 import re
+from multiprocessing import Pool
 
 import numpy as np
 
 from pyart.config import get_fillvalue
 
+from .model_cache import ModelDataCache
+
+# names of the TRT data fields in the order returned by read_trt_data
+TRT_FIELD_NAMES = [
+    'traj_ID', 'yyyymmddHHMM', 'lon', 'lat', 'ell_L', 'ell_S', 'ell_or',
+    'area', 'vel_x', 'vel_y', 'det', 'RANKr', 'CG_n', 'CG_p', 'CG',
+    'CG_percent_p', 'ET45', 'ET45m', 'ET15', 'ET15m', 'VIL', 'maxH', 'maxHm',
+    'POH', 'RANK', 'Dvel_x', 'Dvel_y', 'cell_contour']
+
+# sensor data parsed from file
+_SENSOR_CACHE = ModelDataCache(max_size=500e6)
+
 
 def read_trt_scores(fname):
     """
@@ -574,7 +593,71 @@ def read_trt_traj_data(fname):
             None, None, None, None, None, None)
 
 
-def read_lightning(fname, filter_data=True):
+def read_trt_data_period(flist, nprocesses=1):
+    """
+    Reads the TRT data contained in a list of text files (typically the files
+    of a period of time) and puts them in a single table. The table is
+    sorted by trajectory ID, keeping the time order within each cell, so
+    that the data of a cell is a contiguous slice of the table
+
+    Parameters
+    ----------
+    flist : list of str
+        list of paths of the TRT data files
+    nprocesses : int
+        number of processes used to parse the files
+
+    Returns
+    -------
+    trt_data : dict
+        dictionary with the TRT data fields (see read_trt_data). None if no
+        data could be read
+    cell_slices : dict
+        dictionary with the trajectory ID of each cell as key and the slice
+        of the table containing the cell data as value
+
+    """
+    if nprocesses > 1:
+        with Pool(processes=nprocesses) as pool:
+            file_data_list = pool.map(read_trt_data, flist)
+    else:
+        file_data_list = [read_trt_data(fname) for fname in flist]
+
+    file_data_list = [
+        file_data for file_data in file_data_list if file_data[0] is not None]
+    if not file_data_list:
+        return None, None
+
+    # sort by trajectory ID. The sort is stable to keep the time order
+    traj_ID = np.concatenate(
+        [file_data[0] for file_data in file_data_list])
+    ind_sort = np.argsort(traj_ID, kind='stable')
+
+    trt_data = dict()
+    for i, field_name in enumerate(TRT_FIELD_NAMES):
+        col_list = [file_data[i] for file_data in file_data_list]
+        if field_name == 'cell_contour':
+            cell_contour = [
+                contour for col in col_list for contour in col]
+            trt_data[field_name] = [cell_contour[ind] for ind in ind_sort]
+        elif isinstance(col_list[0], np.ma.MaskedArray):
+            trt_data[field_name] = np.ma.concatenate(col_list)[ind_sort]
+        else:
+            trt_data[field_name] = np.concatenate(col_list)[ind_sort]
+
+    traj_ID_unique, ind_start, nsteps = np.unique(
+        trt_data['traj_ID'], return_index=True, return_counts=True)
+    cell_slices = dict()
+    for traj_ID_cell, ind_start_cell, nsteps_cell in zip(
+            traj_ID_unique, ind_start, nsteps):
+        cell_slices[traj_ID_cell] = slice(
+            ind_start_cell, ind_start_cell+nsteps_cell)
+
+    return trt_data, cell_slices
+
+
+def read_lightning(fname, filter_data=True, starttime=None, endtime=None,
+                   latmin=None, latmax=None, lonmin=None, lonmax=None):
     """
     Reads lightning data contained in a text file. The file has the following
     fields:
@@ -586,12 +669,19 @@ def read_lightning(fname, filter_data=True):
         Altitude (m MSL)
         Power (dBm)
 
+    The parsed content of the file is kept in memory so that reading again
+    the same file (e.g. another time window) does not require parsing it
+
     Parameters
     ----------
     fname : str
         path of time series file
     filter_data : Boolean
         if True filter noise (flashnr = 0)
+    starttime, endtime : datetime object or None
+        if set only the sources within this time window are returned
+    latmin, latmax, lonmin, lonmax : float or None
+        if set only the sources within these limits are returned
 
     Returns
     -------
@@ -599,67 +689,47 @@ def read_lightning(fname, filter_data=True):
         A tupple containing the read values. None otherwise
 
     """
-    try:
-        # get date from file name
-        bfile = os.path.basename(fname)
-        datetimestr = bfile[0:6]
-        fdatetime = datetime.datetime.strptime(datetimestr, '%y%m%d')
-
-        with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                csvfile, fieldnames=['flashnr', 'time', 'time_in_flash',
-                                     'lat', 'lon', 'alt', 'dBm'],
-                delimiter=' ')
-            nrows = sum(1 for row in reader)
-
-            flashnr = np.ma.empty(nrows, dtype=int)
-            time_in_flash = np.ma.empty(nrows, dtype=float)
-            lat = np.ma.empty(nrows, dtype=float)
-            lon = np.ma.empty(nrows, dtype=float)
-            alt = np.ma.empty(nrows, dtype=float)
-            dBm = np.ma.empty(nrows, dtype=float)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                csvfile, fieldnames=['flashnr', 'time', 'time_in_flash',
-                                     'lat', 'lon', 'alt', 'dBm'],
-                delimiter=' ')
-
-            time_data = list()
-            for i, row in enumerate(reader):
-                flashnr[i] = int(row['flashnr'])
-                time_data.append(fdatetime+datetime.timedelta(
-                    seconds=float(row['time'])))
-                time_in_flash[i] = float(row['time_in_flash'])
-                lat[i] = float(row['lat'])
-                lon[i] = float(row['lon'])
-                alt[i] = float(row['alt'])
-                dBm[i] = float(row['dBm'])
-
-            time_data = np.array(time_data)
-
-            if filter_data:
-                flashnr_aux = deepcopy(flashnr)
-                flashnr = flashnr[flashnr_aux > 0]
-                time_data = time_data[flashnr_aux > 0]
-                time_in_flash = time_in_flash[flashnr_aux > 0]
-                lat = lat[flashnr_aux > 0]
-                lon = lon[flashnr_aux > 0]
-                alt = alt[flashnr_aux > 0]
-                dBm = dBm[flashnr_aux > 0]
-
-            csvfile.close()
-
-            return flashnr, time_data, time_in_flash, lat, lon, alt, dBm
-    except EnvironmentError as ee:
-        warn(str(ee))
-        warn('Unable to read file '+fname)
+    lightning_data = _read_lightning_file(fname)
+    if lightning_data is None:
         return None, None, None, None, None, None, None
 
-
-def read_meteorage(fname):
+    fdatetime = lightning_data['fdatetime']
+    secs = lightning_data['time']
+    lat = lightning_data['lat']
+    lon = lightning_data['lon']
+
+    is_valid = np.ones(secs.size, dtype=bool)
+    if filter_data:
+        is_valid &= lightning_data['flashnr'] > 0
+    if starttime is not None:
+        is_valid &= secs >= (starttime-fdatetime).total_seconds()
+    if endtime is not None:
+        is_valid &= secs <= (endtime-fdatetime).total_seconds()
+    if latmin is not None:
+        is_valid &= lat >= latmin
+    if latmax is not None:
+        is_valid &= lat <= latmax
+    if lonmin is not None:
+        is_valid &= lon >= lonmin
+    if lonmax is not None:
+        is_valid &= lon <= lonmax
+    ind = np.where(is_valid)[0]
+
+    # datetime objects are only created for the selected sources
+    time_data = (
+        np.datetime64(fdatetime, 'us') +
+        np.round(secs[ind]*1e6).astype('timedelta64[us]')).astype(object)
+
+    return (
+        np.ma.asarray(lightning_data['flashnr'][ind]), time_data,
+        np.ma.asarray(lightning_data['time_in_flash'][ind]),
+        np.ma.asarray(lat[ind]), np.ma.asarray(lon[ind]),
+        np.ma.asarray(lightning_data['alt'][ind]),
+        np.ma.asarray(lightning_data['dBm'][ind]))
+
+
+def read_meteorage(fname, starttime=None, endtime=None, latmin=None,
+                   latmax=None, lonmin=None, lonmax=None):
     """
     Reads METEORAGE lightning data contained in a text file. The file has the
     following fields:
@@ -677,10 +747,17 @@ def read_meteorage(fname):
             East) [degrees]
         sind: stroke index within the flash
 
+    The parsed content of the file is kept in memory so that reading again
+    the same file (e.g. another time window) does not require parsing it
+
     Parameters
     ----------
     fname : str
         path of time series file
+    starttime, endtime : datetime object or None
+        if set only the strokes within this time window are returned
+    latmin, latmax, lonmin, lonmax : float or None
+        if set only the strokes within these limits are returned
 
     Returns
     -------
@@ -689,66 +766,36 @@ def read_meteorage(fname):
         A tupple containing the read values. None otherwise
 
     """
-    try:
-        with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                csvfile, fieldnames=['date', 'lon', 'lat', 'intens', 'ns',
-                                     'mode', 'intra', 'ax', 'ki2', 'ecc',
-                                     'incl', 'sind', 'par1', 'par2', 'par3',
-                                     'par4'],
-                delimiter='|')
-            nrows = sum(1 for row in reader)
-
-            stroke_time = np.empty(nrows, dtype=datetime.datetime)
-            lon = np.empty(nrows, dtype=float)
-            lat = np.empty(nrows, dtype=float)
-            intens = np.empty(nrows, dtype=float)
-            ns = np.empty(nrows, dtype=int)
-            mode = np.empty(nrows, dtype=int)
-            intra = np.empty(nrows, dtype=int)
-            ax = np.empty(nrows, dtype=float)
-            ki2 = np.empty(nrows, dtype=float)
-            ecc = np.empty(nrows, dtype=float)
-            incl = np.empty(nrows, dtype=float)
-            sind = np.empty(nrows, dtype=int)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                csvfile, fieldnames=['date', 'lon', 'lat', 'intens', 'ns',
-                                     'mode', 'intra', 'ax', 'ki2', 'ecc',
-                                     'incl', 'sind', 'par1', 'par2', 'par3',
-                                     'par4'],
-                delimiter='|')
-
-            for i, row in enumerate(reader):
-                stroke_time[i] = datetime.datetime.strptime(
-                    row['date'], '%d.%m.%Y %H:%M:%S.%f UTC')
-                lon[i] = float(row['lon'])
-                lat[i] = float(row['lat'])
-                intens[i] = float(row['intens'])
-                ns[i] = int(row['ns'])
-                mode[i] = int(row['mode'])
-                intra[i] = int(row['intra'])
-                ax[i] = float(row['ax'])
-                ki2[i] = float(row['ki2'])
-                ecc[i] = float(row['ecc'])
-                incl[i] = float(row['incl'])
-                sind[i] = int(float(row['sind']))-1
-
-            csvfile.close()
-
-            return (
-                stroke_time, lon, lat, intens, ns, mode, intra, ax, ki2, ecc,
-                incl, sind)
-    except EnvironmentError as ee:
-        warn(str(ee))
-        warn('Unable to read file '+fname)
+    meteorage_data = _read_meteorage_file(fname)
+    if meteorage_data is None:
         return (
             None, None, None, None, None, None, None, None, None, None, None,
             None)
 
+    stroke_time = meteorage_data['stroke_time']
+    lat = meteorage_data['lat']
+    lon = meteorage_data['lon']
+
+    is_valid = np.ones(stroke_time.size, dtype=bool)
+    if starttime is not None:
+        is_valid &= stroke_time >= starttime
+    if endtime is not None:
+        is_valid &= stroke_time <= endtime
+    if latmin is not None:
+        is_valid &= lat >= latmin
+    if latmax is not None:
+        is_valid &= lat <= latmax
+    if lonmin is not None:
+        is_valid &= lon >= lonmin
+    if lonmax is not None:
+        is_valid &= lon <= lonmax
+    ind = np.where(is_valid)[0]
+
+    return tuple(
+        meteorage_data[field_name][ind] for field_name in (
+            'stroke_time', 'lon', 'lat', 'intens', 'ns', 'mode', 'intra',
+            'ax', 'ki2', 'ecc', 'incl', 'sind'))
+
 
 def read_lightning_traj(fname):
     """
@@ -778,55 +825,26 @@ def read_lightning_traj(fname):
     """
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
+            rows = list(csv.DictReader(
                 (row for row in csvfile if not row.startswith('#')),
                 fieldnames=['Date', 'UTC', 'flashnr', 'dBm', 'at_flash',
                             'mean', 'min', 'max', 'nvalid'],
-                delimiter=',')
-            nrows = sum(1 for row in reader)
-
-            time_flash = np.empty(nrows, dtype=datetime.datetime)
-            flashnr = np.empty(nrows, dtype=int)
-            dBm = np.empty(nrows, dtype=float)
-            val_at_flash = np.ma.empty(nrows, dtype=float)
-            val_mean = np.ma.empty(nrows, dtype=float)
-            val_min = np.ma.empty(nrows, dtype=float)
-            val_max = np.ma.empty(nrows, dtype=float)
-            nval = np.empty(nrows, dtype=int)
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                (row for row in csvfile if not row.startswith('#')),
-                fieldnames=['Date', 'UTC', 'flashnr', 'dBm', 'at_flash',
-                            'mean', 'min', 'max', 'nvalid'],
-                delimiter=',')
-
-            for i, row in enumerate(reader):
-                date_flash_aux = datetime.datetime.strptime(
-                    row['Date'], '%d-%b-%Y')
-                time_flash_aux = float(row['UTC'])
-                time_flash[i] = date_flash_aux+datetime.timedelta(
-                    seconds=time_flash_aux)
-
-                flashnr[i] = int(float(row['flashnr']))
-                dBm[i] = float(row['dBm'])
-                val_at_flash[i] = float(row['at_flash'])
-                val_mean[i] = float(row['mean'])
-                val_min[i] = float(row['min'])
-                val_max[i] = float(row['max'])
-                nval[i] = int(float(row['nvalid']))
-
-            csvfile.close()
-
-            val_at_flash = np.ma.masked_invalid(val_at_flash)
-            val_mean = np.ma.masked_invalid(val_mean)
-            val_min = np.ma.masked_invalid(val_min)
-            val_max = np.ma.masked_invalid(val_max)
-
-            return (time_flash, flashnr, dBm, val_at_flash, val_mean, val_min,
-                    val_max, nval)
+                delimiter=','))
+
+        time_flash = np.array(
+            [datetime.datetime.strptime(row['Date'], '%d-%b-%Y') +
+             datetime.timedelta(seconds=float(row['UTC'])) for row in rows],
+            dtype=datetime.datetime)
+        flashnr = _get_csv_column(rows, 'flashnr', dtype=int).data
+        dBm = _get_csv_column(rows, 'dBm').data
+        val_at_flash = np.ma.masked_invalid(_get_csv_column(rows, 'at_flash'))
+        val_mean = np.ma.masked_invalid(_get_csv_column(rows, 'mean'))
+        val_min = np.ma.masked_invalid(_get_csv_column(rows, 'min'))
+        val_max = np.ma.masked_invalid(_get_csv_column(rows, 'max'))
+        nval = _get_csv_column(rows, 'nvalid', dtype=int).data
+
+        return (time_flash, flashnr, dBm, val_at_flash, val_mean, val_min,
+                val_max, nval)
 
     except EnvironmentError as ee:
         warn(str(ee))
@@ -865,54 +883,51 @@ def read_lightning_all(fname,
     """
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-            nrows = sum(1 for row in reader)
-
-            flashnr = np.ma.empty(nrows, dtype=int)
-            time_data = np.ma.empty(nrows, dtype=datetime.datetime)
-            time_in_flash = np.ma.empty(nrows, dtype=float)
-            lat = np.ma.empty(nrows, dtype=float)
-            lon = np.ma.empty(nrows, dtype=float)
-            alt = np.ma.empty(nrows, dtype=float)
-            dBm = np.ma.empty(nrows, dtype=float)
-            pol_vals_dict = dict()
-            for label in labels:
-                pol_vals_dict.update({label: np.ma.empty(nrows, dtype=float)})
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                row for row in csvfile if not row.startswith('#'))
-
-            for i, row in enumerate(reader):
-                flashnr[i] = int(row['flashnr'])
-                time_data[i] = datetime.datetime.strptime(row['time_data'], '%Y-%m-%d %H:%M:%S.%f')
-                time_in_flash[i] = float(row['time_in_flash'])
-                lat[i] = float(row['lat'])
-                lon[i] = float(row['lon'])
-                alt[i] = float(row['alt'])
-                dBm[i] = float(row['dBm'])
-
-                for label in labels:
-                    pol_vals_dict[label][i] = float(row[label])
-
-            csvfile.close()
-
-            for label in labels:
-                pol_vals_dict[label] = np.ma.masked_values(pol_vals_dict[label], get_fillvalue())
-
-            return flashnr, time_data, time_in_flash, lat, lon, alt, dBm, pol_vals_dict
+            rows = list(csv.DictReader(
+                row for row in csvfile if not row.startswith('#')))
+
+        flashnr = _get_csv_column(rows, 'flashnr', dtype=int)
+        time_data = np.ma.asarray(np.array(
+            [datetime.datetime.strptime(
+                row['time_data'], '%Y-%m-%d %H:%M:%S.%f') for row in rows],
+            dtype=datetime.datetime))
+        time_in_flash = _get_csv_column(rows, 'time_in_flash')
+        lat = _get_csv_column(rows, 'lat')
+        lon = _get_csv_column(rows, 'lon')
+        alt = _get_csv_column(rows, 'alt')
+        dBm = _get_csv_column(rows, 'dBm')
+        pol_vals_dict = dict()
+        for label in labels:
+            pol_vals_dict[label] = np.ma.masked_values(
+                _get_csv_column(rows, label), get_fillvalue())
+
+        return (flashnr, time_data, time_in_flash, lat, lon, alt, dBm,
+                pol_vals_dict)
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
         return None, None, None, None, None, None, None, None
 
 
-def get_sensor_data(date, datatype, cfg):
+def get_sensor_cache():
+    """
+    Get the cache of the sensor data parsed from file shared by all the
+    datasets of the process
+
+    Returns
+    -------
+    sensor_cache : ModelDataCache object
+        the sensor data cache
+
+    """
+    return _SENSOR_CACHE
+
+
+def get_sensor_data(date, datatype, cfg, starttime=None, endtime=None):
     """
-    Gets data from a point measurement sensor (rain gauge or disdrometer)
+    Gets data from a point measurement sensor (rain gauge or disdrometer).
+    The data of each sensor file is kept in memory so that the file is only
+    parsed once
 
     Parameters
     ----------
@@ -925,6 +940,9 @@ def get_sensor_data(date, datatype, cfg):
     cfg : dictionary
         dictionary containing sensor information
 
+    starttime, endtime : datetime object or None
+        if set only the data within this time window are returned
+
     Returns
     -------
     sensordate , sensorvalue, label, period : tupple
@@ -934,12 +952,7 @@ def get_sensor_data(date, datatype, cfg):
     if cfg['sensor'] == 'rgage':
         datapath = cfg['smnpath']+date.strftime('%Y%m')+'/'
         datafile = date.strftime('%Y%m%d')+'_' + cfg['sensorid']+'.csv'
-        _, sensordate, _, _, _, sensorvalue, _, _ = read_smn(
-            datapath+datafile)
-        if sensordate is None:
-            return None, None, None, None
         label = 'RG'
-        period = (sensordate[1]-sensordate[0]).total_seconds()
     elif cfg['sensor'] == 'disdro':
         if (datatype == 'dBZ') or (datatype == 'dBZc'):
             sensor_datatype = 'dBZ'
@@ -953,18 +966,37 @@ def get_sensor_data(date, datatype, cfg):
             date.strftime('%Y%m%d')+'_'+cfg['sensorid']+'_'+cfg['location'] +
             '_'+str(cfg['freq'])+'GHz_'+sensor_datatype+'_el'+str(cfg['ele']) +
             '.csv')
-
-        sensordate, _, sensorvalue, _ = read_disdro(datapath+datafile)
-        if sensordate is None:
-            return None, None, None, None
         label = 'Disdro'
-        period = (sensordate[1]-sensordate[0]).total_seconds()
-
     else:
         warn('Unknown sensor: '+cfg['sensor'])
         return None, None, None, None
 
-    return sensordate, sensorvalue, label, period
+    sensor_data = _get_sensor_file_data(datapath+datafile, cfg['sensor'])
+    if sensor_data is None:
+        return None, None, None, None
+
+    sensordate = sensor_data['date']
+    period = (sensordate[1]-sensordate[0]).total_seconds()
+
+    # select the time window using the sorted time index
+    ind_start = 0
+    ind_end = sensordate.size
+    if starttime is not None:
+        ind_start = np.searchsorted(
+            sensor_data['time_index'], np.datetime64(starttime, 'us'),
+            side='left')
+    if endtime is not None:
+        ind_end = np.searchsorted(
+            sensor_data['time_index'], np.datetime64(endtime, 'us'),
+            side='right')
+
+    if ind_end <= ind_start:
+        warn('No sensor data within the time window')
+        return None, None, None, None
+
+    return (
+        list(sensordate[ind_start:ind_end]),
+        sensor_data['value'][ind_start:ind_end].copy(), label, period)
 
 
 def read_smn(fname):
@@ -985,45 +1017,32 @@ def read_smn(fname):
     fill_value = 10000000.0
     try:
         with open(fname, 'r', newline='') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(csvfile)
-            nrows = sum(1 for row in reader)
-            smn_id = np.ma.empty(nrows, dtype='float32')
-            pressure = np.ma.empty(nrows, dtype='float32')
-            temp = np.ma.empty(nrows, dtype='float32')
-            rh = np.ma.empty(nrows, dtype='float32')
-            precip = np.ma.empty(nrows, dtype='float32')
-            wspeed = np.ma.empty(nrows, dtype='float32')
-            wdir = np.ma.empty(nrows, dtype='float32')
-
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(csvfile)
-            date = list()
-            for i, row in enumerate(reader):
-                smn_id[i] = float(row['StationID'])
-                date.append(datetime.datetime.strptime(
-                    row['DateTime'], '%Y%m%d%H%M%S'))
-                pressure[i] = float(row['AirPressure'])
-                temp[i] = float(row['2mTemperature'])
-                rh[i] = float(row['RH'])
-                precip[i] = float(row['Precipitation'])
-                wspeed[i] = float(row['Windspeed'])
-                wdir[i] = float(row['Winddirection'])
-
-            pressure = np.ma.masked_values(pressure, fill_value)
-            temp = np.ma.masked_values(temp, fill_value)
-            rh = np.ma.masked_values(rh, fill_value)
-            precip = np.ma.masked_values(precip, fill_value)
-            wspeed = np.ma.masked_values(wspeed, fill_value)
-            wdir = np.ma.masked_values(wdir, fill_value)
-
-            # convert precip from mm/10min to mm/h
-            precip *= 6.
-
-            csvfile.close()
-
-            return smn_id, date, pressure, temp, rh, precip, wspeed, wdir
+            rows = list(csv.DictReader(csvfile))
+
+        smn_id = _get_csv_column(rows, 'StationID', dtype='float32')
+        date = [
+            datetime.datetime.strptime(row['DateTime'], '%Y%m%d%H%M%S')
+            for row in rows]
+        pressure = np.ma.masked_values(
+            _get_csv_column(rows, 'AirPressure', dtype='float32'), fill_value)
+        temp = np.ma.masked_values(
+            _get_csv_column(rows, '2mTemperature', dtype='float32'),
+            fill_value)
+        rh = np.ma.masked_values(
+            _get_csv_column(rows, 'RH', dtype='float32'), fill_value)
+        precip = np.ma.masked_values(
+            _get_csv_column(rows, 'Precipitation', dtype='float32'),
+            fill_value)
+        wspeed = np.ma.masked_values(
+            _get_csv_column(rows, 'Windspeed', dtype='float32'), fill_value)
+        wdir = np.ma.masked_values(
+            _get_csv_column(rows, 'Winddirection', dtype='float32'),
+            fill_value)
+
+        # convert precip from mm/10min to mm/h
+        precip *= 6.
+
+        return smn_id, date, pressure, temp, rh, precip, wspeed, wdir
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
@@ -1194,36 +1213,207 @@ def read_disdro(fname):
         var = '' # apply your error handling
     try:
         with open(fname, 'r', newline='', encoding='utf-8', errors='ignore') as csvfile:
-            # first count the lines
-            reader = csv.DictReader(
+            rows = list(csv.DictReader(
                 (row for row in csvfile if not row.startswith('#')),
-                delimiter=',')
-            nrows = sum(1 for row in reader)
+                delimiter=','))
+
+        date = [
+            datetime.datetime.strptime(row['date'], '%Y-%m-%d %H:%M:%S')
+            for row in rows]
+        preciptype = [row['Precip Code'] for row in rows]
+        variable = np.ma.masked_values(
+            _get_csv_column(rows, var, dtype='float32'), get_fillvalue())
+        np.ma.set_fill_value(variable, get_fillvalue())
+        scatt_temp = _get_csv_column(
+            rows, 'Scattering Temp [deg C]', dtype='float32')
+
+        return (date, preciptype, variable, scatt_temp)
+    except EnvironmentError as ee:
+        warn(str(ee))
+        warn('Unable to read file '+fname)
+        return (None, None, None, None)
 
-            variable = np.ma.empty(nrows, dtype='float32')
-            scatt_temp = np.ma.empty(nrows, dtype='float32')
 
-            # now read the data
-            csvfile.seek(0)
-            reader = csv.DictReader(
-                (row for row in csvfile if not row.startswith('#')),
-                delimiter=',')
-            i = 0
-            date = list()
-            preciptype = list()
-            for row in reader:
-                date.append(datetime.datetime.strptime(
-                    row['date'], '%Y-%m-%d %H:%M:%S'))
-                preciptype.append(row['Precip Code'])
-                variable[i] = float(row[var])
-                scatt_temp[i] = float(row['Scattering Temp [deg C]'])
-                i += 1
-            variable = np.ma.masked_values(variable, get_fillvalue())
-            np.ma.set_fill_value(variable, get_fillvalue())
-            csvfile.close()
+def _get_csv_column(rows, field_name, dtype=float):
+    """
+    Gets a column of the rows read by a csv DictReader as a masked array
+
+    Parameters
+    ----------
+    rows : list of dict
+        the rows read
+    field_name : str
+        the name of the column
+    dtype : data type
+        the data type of the output array
 
-            return (date, preciptype, variable, scatt_temp)
+    Returns
+    -------
+    column : masked array
+        the column values
+
+    """
+    return np.ma.asarray(np.array(
+        [row[field_name] for row in rows], dtype=float).astype(dtype))
+
+
+def _get_sensor_file_data(fname, sensor):
+    """
+    Gets the data of a rain gauge or disdrometer file. The data is cached
+    until the file is modified
+
+    Parameters
+    ----------
+    fname : str
+        path of the sensor file
+    sensor : str
+        the sensor type. Can be 'rgage' or 'disdro'
+
+    Returns
+    -------
+    sensor_data : dict
+        dictionary containing the date and value arrays sorted in time and
+        the corresponding datetime64 time index. None if the file could not
+        be read
+
+    """
+    try:
+        fstat = os.stat(fname)
     except EnvironmentError as ee:
         warn(str(ee))
         warn('Unable to read file '+fname)
-        return (None, None, None, None)
+        return None
+
+    key = (fname, sensor, fstat.st_mtime, fstat.st_size)
+    sensor_data = _SENSOR_CACHE.get(key)
+    if sensor_data is not None:
+        return sensor_data
+
+    if sensor == 'rgage':
+        _, sensordate, _, _, _, sensorvalue, _, _ = read_smn(fname)
+    else:
+        sensordate, _, sensorvalue, _ = read_disdro(fname)
+    if sensordate is None:
+        return None
+
+    sensordate = np.array(sensordate, dtype=datetime.datetime)
+    time_index = sensordate.astype('datetime64[us]')
+    ind = np.argsort(time_index, kind='mergesort')
+
+    sensor_data = {
+        'date': sensordate[ind],
+        'value': sensorvalue[ind],
+        'time_index': time_index[ind]}
+    _SENSOR_CACHE.put(key, sensor_data)
+
+    return sensor_data
+
+
+def _read_lightning_file(fname):
+    """
+    Parses a lightning data file (see read_lightning). The parsed data is
+    cached until the file is modified
+
+    Parameters
+    ----------
+    fname : str
+        path of time series file
+
+    Returns
+    -------
+    lightning_data : dict
+        dictionary containing the file date and an array for each field.
+        None if the file could not be read
+
+    """
+    try:
+        fstat = os.stat(fname)
+        key = (fname, 'lightning', fstat.st_mtime, fstat.st_size)
+        lightning_data = _SENSOR_CACHE.get(key)
+        if lightning_data is not None:
+            return lightning_data
+
+        # get date from file name
+        bfile = os.path.basename(fname)
+        datetimestr = bfile[0:6]
+        fdatetime = datetime.datetime.strptime(datetimestr, '%y%m%d')
+
+        with warnings.catch_warnings():
+            # empty files are valid
+            warnings.simplefilter('ignore', UserWarning)
+            data = np.loadtxt(fname, dtype=float, ndmin=2)
+        if data.size == 0:
+            data = np.empty((0, 7), dtype=float)
+
+        lightning_data = {
+            'fdatetime': fdatetime,
+            'flashnr': data[:, 0].astype(int),
+            'time': data[:, 1],
+            'time_in_flash': data[:, 2],
+            'lat': data[:, 3],
+            'lon': data[:, 4],
+            'alt': data[:, 5],
+            'dBm': data[:, 6]}
+        _SENSOR_CACHE.put(key, lightning_data)
+
+        return lightning_data
+    except EnvironmentError as ee:
+        warn(str(ee))
+        warn('Unable to read file '+fname)
+        return None
+
+
+def _read_meteorage_file(fname):
+    """
+    Parses a METEORAGE lightning data file (see read_meteorage). The file is
+    read in a single pass and the parsed data is cached until the file is
+    modified
+
+    Parameters
+    ----------
+    fname : str
+        path of time series file
+
+    Returns
+    -------
+    meteorage_data : dict
+        dictionary containing an array for each field. None if the file could
+        not be read
+
+    """
+    try:
+        fstat = os.stat(fname)
+        key = (fname, 'meteorage', fstat.st_mtime, fstat.st_size)
+        meteorage_data = _SENSOR_CACHE.get(key)
+        if meteorage_data is not None:
+            return meteorage_data
+
+        with open(fname, 'r', newline='') as csvfile:
+            rows = [row[:12] for row in csv.reader(csvfile, delimiter='|')]
+
+        cols = list(zip(*rows))
+        if not cols:
+            cols = [()]*12
+
+        meteorage_data = {
+            'stroke_time': np.array([
+                datetime.datetime.strptime(date, '%d.%m.%Y %H:%M:%S.%f UTC')
+                for date in cols[0]], dtype=datetime.datetime),
+            'lon': np.array(cols[1], dtype=float),
+            'lat': np.array(cols[2], dtype=float),
+            'intens': np.array(cols[3], dtype=float),
+            'ns': np.array(cols[4], dtype=int),
+            'mode': np.array(cols[5], dtype=int),
+            'intra': np.array(cols[6], dtype=int),
+            'ax': np.array(cols[7], dtype=float),
+            'ki2': np.array(cols[8], dtype=float),
+            'ecc': np.array(cols[9], dtype=float),
+            'incl': np.array(cols[10], dtype=float),
+            'sind': np.array(cols[11], dtype=float).astype(int)-1}
+        _SENSOR_CACHE.put(key, meteorage_data)
+
+        return meteorage_data
+    except EnvironmentError as ee:
+        warn(str(ee))
+        warn('Unable to read file '+fname)
+        return None
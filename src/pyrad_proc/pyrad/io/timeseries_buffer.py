@@ -0,0 +1,228 @@
+"""
+pyrad.io.timeseries_buffer
+==========================
+
+Process-wide buffer of the point time series written by the time series
+products. The time series files are append-only: each new value is written
+to the file and added to the buffer, and the products plot the time series
+kept in the buffer instead of reading the whole file again. A time series is
+read from file only the first time it is needed (e.g. after a restart) or if
+the file has been modified by someone else.
+
+.. autosummary::
+    :toctree: generated/
+
+    TimeSeriesBuffer
+    get_timeseries_buffer
+    _to_datetime
+
+"""
+
+import os
+import datetime
+from collections import OrderedDict
+
+import numpy as np
+
+from pyart.config import get_fillvalue
+
+from .read_data_other import read_timeseries
+from .write_data import write_ts_polar_data
+
+
+class TimeSeriesBuffer(object):
+    """
+    Least recently used buffer of point time series. Each time series is
+    identified by the name of the file where it is stored.
+
+    Attributes
+    ----------
+    max_entries : int
+        maximum number of time series kept in the buffer
+    nhits, nmisses : int
+        number of time series obtained from the buffer and from file
+
+    Methods:
+    --------
+    append : Write a new value of a time series
+    read : Get a time series
+    trim : Remove the least recently used time series
+    clear : Remove all the time series
+
+    """
+
+    def __init__(self, max_entries=100):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        max_entries : int
+            maximum number of time series kept in the buffer
+
+        """
+        self.max_entries = max_entries
+        self.nhits = 0
+        self.nmisses = 0
+        self._entries = OrderedDict()
+
+    def append(self, dataset, fname):
+        """
+        Write a new value of a time series in its file and add it to the
+        buffer
+
+        Parameters
+        ----------
+        dataset : dict
+            dictionary containing the time series parameters
+        fname : str
+            file name where to store the data
+
+        Returns
+        -------
+        fname : str
+            the name of the file where data has written
+
+        """
+        is_current = self._is_current(fname)
+        fname = write_ts_polar_data(dataset, fname)
+
+        if not is_current:
+            # the time series will be read from file when needed
+            self._entries.pop(fname, None)
+            return fname
+
+        entry = self._entries[fname]
+        entry['date'].append(_to_datetime(dataset['time']))
+        entry['value'].append(float(dataset['value']))
+        entry['fsize'] = os.path.getsize(fname)
+
+        return fname
+
+    def read(self, fname):
+        """
+        Get a time series. The time series is read from file if it is not in
+        the buffer
+
+        Parameters
+        ----------
+        fname : str
+            path of time series file
+
+        Returns
+        -------
+        date , value : tupple
+            A list of datetime objects containing the time and a numpy masked
+            array containing the value. None otherwise
+
+        """
+        if self._is_current(fname):
+            self.nhits += 1
+            self._entries.move_to_end(fname)
+        else:
+            self.nmisses += 1
+            self._entries.pop(fname, None)
+            date, value = read_timeseries(fname)
+            if date is None:
+                return None, None
+
+            self._entries[fname] = {
+                'date': [_to_datetime(dt) for dt in date],
+                'value': list(value.filled(fill_value=get_fillvalue())),
+                'fsize': os.path.getsize(fname)}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        entry = self._entries[fname]
+        return list(entry['date']), np.ma.masked_values(
+            np.array(entry['value'], dtype=float), get_fillvalue())
+
+    def __len__(self):
+        """ Number of time series in the buffer """
+        return len(self._entries)
+
+    def trim(self, nentries):
+        """
+        Remove the least recently used time series until the buffer contains
+        at most a given number of time series
+
+        Parameters
+        ----------
+        nentries : int
+            the maximum number of time series kept
+
+        """
+        while len(self._entries) > max(nentries, 0):
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all the time series of the buffer
+
+        """
+        self._entries.clear()
+
+    def _is_current(self, fname):
+        """
+        Checks whether the buffered time series is the same as the one
+        stored in file
+
+        Parameters
+        ----------
+        fname : str
+            path of time series file
+
+        Returns
+        -------
+        is_current : bool
+            True if the time series is in the buffer and the file has not
+            been modified since
+
+        """
+        if fname not in self._entries:
+            return False
+        try:
+            return os.path.getsize(fname) == self._entries[fname]['fsize']
+        except EnvironmentError:
+            return False
+
+
+_TIMESERIES_BUFFER = TimeSeriesBuffer()
+
+
+def get_timeseries_buffer():
+    """
+    Get the time series buffer shared by all the datasets of the process
+
+    Returns
+    -------
+    timeseries_buffer : TimeSeriesBuffer object
+        the time series buffer
+
+    """
+    return _TIMESERIES_BUFFER
+
+
+def _to_datetime(dt):
+    """
+    Converts a date to a datetime object. The dates obtained with netCDF4
+    num2date may be cftime objects while the dates read from the time series
+    files are datetime objects
+
+    Parameters
+    ----------
+    dt : datetime or cftime object
+        the date
+
+    Returns
+    -------
+    dt : datetime object
+        the date as datetime object
+
+    """
+    if type(dt) is datetime.datetime:
+        return dt
+
+    return datetime.datetime(
+        dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second,
+        dt.microsecond)
@@ -18,7 +18,6 @@ import re
 import datetime
 import locale
 from warnings import warn
-from copy import deepcopy
 
 import numpy as np
 
@@ -401,52 +400,35 @@ class Trajectory(object):
             the flash number to keep. If 0 data from all flashes will be kept
 
         """
+        # the time window is applied while reading
         flashnr_vec, time, time_in_flash, lat, lon, alt, dBm = read_lightning(
-            self.filename)
+            self.filename, starttime=self.starttime, endtime=self.endtime)
 
         if flashnr_vec is None:
             raise Exception("ERROR: Could not find|open trajectory file '" +
                             self.filename+"'")
 
-        recording_started = True
-        if self.starttime is not None:
-            recording_started = False
-        recording_check_stop = False
-        if self.endtime is not None:
-            recording_check_stop = True
-
         if flashnr > 0:
-            flashnr_vec_aux = deepcopy(flashnr_vec)
-            flashnr_vec = flashnr_vec[flashnr_vec_aux == flashnr]
-            time = time[flashnr_vec_aux == flashnr]
-            time_in_flash = time_in_flash[flashnr_vec_aux == flashnr]
-            lat = lat[flashnr_vec_aux == flashnr]
-            lon = lon[flashnr_vec_aux == flashnr]
-            alt = alt[flashnr_vec_aux == flashnr]
-            dBm = dBm[flashnr_vec_aux == flashnr]
-
-        for i, dBm_val in enumerate(dBm):
-
-            if not recording_started:
-                if time[i] < self.starttime:
-                    continue
-                else:
-                    recording_started = True
-
-            if recording_check_stop:
-                if time[i] > self.endtime:
-                    break
-
-            self.flashnr_vec = np.append(self.flashnr_vec, [flashnr_vec[i]])
-            self.time_vector = np.append(self.time_vector, [time[i]])
-            self.time_in_flash = np.append(
-                self.time_in_flash, [time_in_flash[i]])
-
-            self.wgs84_lat_deg = np.append(self.wgs84_lat_deg, [lat[i]])
-            self.wgs84_lon_deg = np.append(self.wgs84_lon_deg, [lon[i]])
-            self.wgs84_alt_m = np.append(self.wgs84_alt_m, [alt[i]])
-
-            self.dBm = np.append(self.dBm, [dBm_val])
+            ind = np.where(flashnr_vec == flashnr)[0]
+            flashnr_vec = flashnr_vec[ind]
+            time = time[ind]
+            time_in_flash = time_in_flash[ind]
+            lat = lat[ind]
+            lon = lon[ind]
+            alt = alt[ind]
+            dBm = dBm[ind]
+
+        self.flashnr_vec = np.append(
+            self.flashnr_vec, np.ma.getdata(flashnr_vec))
+        self.time_vector = np.append(self.time_vector, time)
+        self.time_in_flash = np.append(
+            self.time_in_flash, np.ma.getdata(time_in_flash))
+
+        self.wgs84_lat_deg = np.append(self.wgs84_lat_deg, np.ma.getdata(lat))
+        self.wgs84_lon_deg = np.append(self.wgs84_lon_deg, np.ma.getdata(lon))
+        self.wgs84_alt_m = np.append(self.wgs84_alt_m, np.ma.getdata(alt))
+
+        self.dBm = np.append(self.dBm, np.ma.getdata(dBm))
 
         self.nsamples = len(self.time_vector)
 
@@ -31,6 +31,8 @@ Functions for writing pyrad output data
     write_colocated_data_time_avg
     write_sun_hits
     write_sun_retrieval
+    write_grid_weights
+    get_hdf5_compression
 
 """
 
@@ -45,6 +47,13 @@ import errno
 import time
 
 import numpy as np
+from scipy.sparse import save_npz
+
+try:
+    import hdf5plugin
+    _HDF5PLUGIN_AVAILABLE = True
+except ImportError:
+    _HDF5PLUGIN_AVAILABLE = False
 
 from pyart.config import get_fillvalue
 
@@ -1439,6 +1448,21 @@ def write_colocated_data(coloc_data, fname):
         the name of the file where data has written
 
     """
+    fieldnames = [
+        'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele', 'rad1_azi',
+        'rad1_rng', 'rad1_val', 'rad2_time', 'rad2_ray_ind', 'rad2_rng_ind',
+        'rad2_ele', 'rad2_azi', 'rad2_rng', 'rad2_val']
+
+    # all gates are written at once. The time columns are the only ones that
+    # have to be converted
+    columns = [coloc_data[fieldname] for fieldname in fieldnames]
+    columns[0] = [
+        rad1_time.strftime('%Y%m%d%H%M%S')
+        for rad1_time in coloc_data['rad1_time']]
+    columns[7] = [
+        rad2_time.strftime('%Y%m%d%H%M%S')
+        for rad2_time in coloc_data['rad2_time']]
+
     filelist = glob.glob(fname)
     if not filelist:
         with open(fname, 'w', newline='') as csvfile:
@@ -1446,57 +1470,15 @@ def write_colocated_data(coloc_data, fname):
             csvfile.write('# Comment lines are preceded by "#"\n')
             csvfile.write('#\n')
 
-            fieldnames = [
-                'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele',
-                'rad1_azi', 'rad1_rng', 'rad1_val', 'rad2_time',
-                'rad2_ray_ind', 'rad2_rng_ind', 'rad2_ele', 'rad2_azi',
-                'rad2_rng', 'rad2_val']
-            writer = csv.DictWriter(csvfile, fieldnames)
-            writer.writeheader()
-            for i, rad1_time in enumerate(coloc_data['rad1_time']):
-                writer.writerow({
-                    'rad1_time': rad1_time.strftime('%Y%m%d%H%M%S'),
-                    'rad1_ray_ind': coloc_data['rad1_ray_ind'][i],
-                    'rad1_rng_ind': coloc_data['rad1_rng_ind'][i],
-                    'rad1_ele': coloc_data['rad1_ele'][i],
-                    'rad1_azi': coloc_data['rad1_azi'][i],
-                    'rad1_rng': coloc_data['rad1_rng'][i],
-                    'rad1_val': coloc_data['rad1_val'][i],
-                    'rad2_time': (
-                        coloc_data['rad2_time'][i].strftime('%Y%m%d%H%M%S')),
-                    'rad2_ray_ind': coloc_data['rad2_ray_ind'][i],
-                    'rad2_rng_ind': coloc_data['rad2_rng_ind'][i],
-                    'rad2_ele': coloc_data['rad2_ele'][i],
-                    'rad2_azi': coloc_data['rad2_azi'][i],
-                    'rad2_rng': coloc_data['rad2_rng'][i],
-                    'rad2_val': coloc_data['rad2_val'][i]})
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(zip(*columns))
 
             csvfile.close()
     else:
         with open(fname, 'a', newline='') as csvfile:
-            fieldnames = [
-                'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele',
-                'rad1_azi', 'rad1_rng', 'rad1_val', 'rad2_time',
-                'rad2_ray_ind', 'rad2_rng_ind', 'rad2_ele', 'rad2_azi',
-                'rad2_rng', 'rad2_val']
-            writer = csv.DictWriter(csvfile, fieldnames)
-            for i, rad1_time in enumerate(coloc_data['rad1_time']):
-                writer.writerow({
-                    'rad1_time': rad1_time.strftime('%Y%m%d%H%M%S'),
-                    'rad1_ray_ind': coloc_data['rad1_ray_ind'][i],
-                    'rad1_rng_ind': coloc_data['rad1_rng_ind'][i],
-                    'rad1_ele': coloc_data['rad1_ele'][i],
-                    'rad1_azi': coloc_data['rad1_azi'][i],
-                    'rad1_rng': coloc_data['rad1_rng'][i],
-                    'rad1_val': coloc_data['rad1_val'][i],
-                    'rad2_time': (
-                        coloc_data['rad2_time'][i].strftime('%Y%m%d%H%M%S')),
-                    'rad2_ray_ind': coloc_data['rad2_ray_ind'][i],
-                    'rad2_rng_ind': coloc_data['rad2_rng_ind'][i],
-                    'rad2_ele': coloc_data['rad2_ele'][i],
-                    'rad2_azi': coloc_data['rad2_azi'][i],
-                    'rad2_rng': coloc_data['rad2_rng'][i],
-                    'rad2_val': coloc_data['rad2_val'][i]})
+            writer = csv.writer(csvfile)
+            writer.writerows(zip(*columns))
             csvfile.close()
 
     return fname
@@ -1519,6 +1501,22 @@ def write_colocated_data_time_avg(coloc_data, fname):
         the name of the file where data has written
 
     """
+    fieldnames = [
+        'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele', 'rad1_azi',
+        'rad1_rng', 'rad1_dBZavg', 'rad1_PhiDPavg', 'rad1_Flagavg',
+        'rad2_time', 'rad2_ray_ind', 'rad2_rng_ind', 'rad2_ele', 'rad2_azi',
+        'rad2_rng', 'rad2_dBZavg', 'rad2_PhiDPavg', 'rad2_Flagavg']
+
+    # all gates are written at once. The time columns are the only ones that
+    # have to be converted
+    columns = [coloc_data[fieldname] for fieldname in fieldnames]
+    columns[0] = [
+        rad1_time.strftime('%Y%m%d%H%M%S')
+        for rad1_time in coloc_data['rad1_time']]
+    columns[9] = [
+        rad2_time.strftime('%Y%m%d%H%M%S')
+        for rad2_time in coloc_data['rad2_time']]
+
     filelist = glob.glob(fname)
     if not filelist:
         with open(fname, 'w', newline='') as csvfile:
@@ -1526,67 +1524,15 @@ def write_colocated_data_time_avg(coloc_data, fname):
             csvfile.write('# Comment lines are preceded by "#"\n')
             csvfile.write('#\n')
 
-            fieldnames = [
-                'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele',
-                'rad1_azi', 'rad1_rng', 'rad1_dBZavg', 'rad1_PhiDPavg',
-                'rad1_Flagavg', 'rad2_time', 'rad2_ray_ind', 'rad2_rng_ind',
-                'rad2_ele', 'rad2_azi', 'rad2_rng', 'rad2_dBZavg',
-                'rad2_PhiDPavg', 'rad2_Flagavg']
-            writer = csv.DictWriter(csvfile, fieldnames)
-            writer.writeheader()
-            for i, rad1_time in enumerate(coloc_data['rad1_time']):
-                writer.writerow({
-                    'rad1_time': rad1_time.strftime('%Y%m%d%H%M%S'),
-                    'rad1_ray_ind': coloc_data['rad1_ray_ind'][i],
-                    'rad1_rng_ind': coloc_data['rad1_rng_ind'][i],
-                    'rad1_ele': coloc_data['rad1_ele'][i],
-                    'rad1_azi': coloc_data['rad1_azi'][i],
-                    'rad1_rng': coloc_data['rad1_rng'][i],
-                    'rad1_dBZavg': coloc_data['rad1_dBZavg'][i],
-                    'rad1_PhiDPavg': coloc_data['rad1_PhiDPavg'][i],
-                    'rad1_Flagavg': coloc_data['rad1_Flagavg'][i],
-                    'rad2_time': (
-                        coloc_data['rad2_time'][i].strftime('%Y%m%d%H%M%S')),
-                    'rad2_ray_ind': coloc_data['rad2_ray_ind'][i],
-                    'rad2_rng_ind': coloc_data['rad2_rng_ind'][i],
-                    'rad2_ele': coloc_data['rad2_ele'][i],
-                    'rad2_azi': coloc_data['rad2_azi'][i],
-                    'rad2_rng': coloc_data['rad2_rng'][i],
-                    'rad2_dBZavg': coloc_data['rad2_dBZavg'][i],
-                    'rad2_PhiDPavg': coloc_data['rad2_PhiDPavg'][i],
-                    'rad2_Flagavg': coloc_data['rad2_Flagavg'][i]})
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(zip(*columns))
 
             csvfile.close()
     else:
         with open(fname, 'a', newline='') as csvfile:
-            fieldnames = [
-                'rad1_time', 'rad1_ray_ind', 'rad1_rng_ind', 'rad1_ele',
-                'rad1_azi', 'rad1_rng', 'rad1_dBZavg', 'rad1_PhiDPavg',
-                'rad1_Flagavg', 'rad2_time', 'rad2_ray_ind', 'rad2_rng_ind',
-                'rad2_ele', 'rad2_azi', 'rad2_rng', 'rad2_dBZavg',
-                'rad2_PhiDPavg', 'rad2_Flagavg']
-            writer = csv.DictWriter(csvfile, fieldnames)
-            for i, rad1_time in enumerate(coloc_data['rad1_time']):
-                writer.writerow({
-                    'rad1_time': rad1_time.strftime('%Y%m%d%H%M%S'),
-                    'rad1_ray_ind': coloc_data['rad1_ray_ind'][i],
-                    'rad1_rng_ind': coloc_data['rad1_rng_ind'][i],
-                    'rad1_ele': coloc_data['rad1_ele'][i],
-                    'rad1_azi': coloc_data['rad1_azi'][i],
-                    'rad1_rng': coloc_data['rad1_rng'][i],
-                    'rad1_dBZavg': coloc_data['rad1_dBZavg'][i],
-                    'rad1_PhiDPavg': coloc_data['rad1_PhiDPavg'][i],
-                    'rad1_Flagavg': coloc_data['rad1_Flagavg'][i],
-                    'rad2_time': (
-                        coloc_data['rad2_time'][i].strftime('%Y%m%d%H%M%S')),
-                    'rad2_ray_ind': coloc_data['rad2_ray_ind'][i],
-                    'rad2_rng_ind': coloc_data['rad2_rng_ind'][i],
-                    'rad2_ele': coloc_data['rad2_ele'][i],
-                    'rad2_azi': coloc_data['rad2_azi'][i],
-                    'rad2_rng': coloc_data['rad2_rng'][i],
-                    'rad2_dBZavg': coloc_data['rad2_dBZavg'][i],
-                    'rad2_PhiDPavg': coloc_data['rad2_PhiDPavg'][i],
-                    'rad2_Flagavg': coloc_data['rad2_Flagavg'][i]})
+            writer = csv.writer(csvfile)
+            writer.writerows(zip(*columns))
             csvfile.close()
 
     return fname
@@ -1830,3 +1776,71 @@ def write_sun_retrieval(sun_retrieval, fname):
             csvfile.close()
 
     return fname
+
+
+def write_grid_weights(weights, fname):
+    """
+    writes the sparse matrix of weights that maps radar gates onto a grid
+
+    Parameters
+    ----------
+    weights : scipy sparse matrix
+        the weights matrix
+    fname : str
+        file name where to store the data
+
+    Returns
+    -------
+    fname : str
+        the name of the file where data has written
+
+    """
+    try:
+        save_npz(fname, weights)
+        return fname
+    except EnvironmentError:
+        warn('Unable to write on file '+fname)
+        return None
+
+
+def get_hdf5_compression(compression='gzip', compression_opts=6):
+    """
+    Gets the HDF5 filter parameters corresponding to a compression type.
+    Besides the filters of the HDF5 library (gzip, lzf, szip) the
+    compressors lz4, zstd and blosc (lz4 with byte shuffling) are supported
+    if the hdf5plugin package is available
+
+    Parameters
+    ----------
+    compression : str or None
+        the compression type. None means no compression
+    compression_opts : any
+        the compression options. For gzip, zstd and blosc the compression
+        level
+
+    Returns
+    -------
+    compression : str, int or None
+        the compression filter to pass to h5py
+    compression_opts : any
+        the filter options to pass to h5py
+
+    """
+    if compression not in ('lz4', 'zstd', 'blosc'):
+        return compression, compression_opts
+
+    if not _HDF5PLUGIN_AVAILABLE:
+        warn('hdf5plugin not available. Unable to use compression ' +
+             compression+'. gzip compression will be used instead')
+        return 'gzip', 6
+
+    if compression == 'lz4':
+        hdf5_filter = hdf5plugin.LZ4()
+    elif compression == 'zstd':
+        hdf5_filter = hdf5plugin.Zstd(clevel=int(compression_opts))
+    else:
+        hdf5_filter = hdf5plugin.Blosc(
+            cname='lz4', clevel=int(compression_opts),
+            shuffle=hdf5plugin.Blosc.SHUFFLE)
+
+    return hdf5_filter['compression'], hdf5_filter['compression_opts']
@@ -99,6 +99,7 @@ Retrievals
     process_rainrate
     process_vol_refl
     process_bird_density
+    process_fused_retrieval
 
 Doppler processing
 ==================
@@ -151,6 +152,27 @@ COSMO data
     process_hzt_lookup_table
     process_hzt_coord
 
+Accumulators
+============
+
+.. autosummary::
+    :toctree: generated/
+
+    RadarAccumulator
+    TimeAvgAccumulator
+    WeightedTimeAvgAccumulator
+    OccurrenceAccumulator
+    load_accumulator
+
+Ray-chunked execution
+=====================
+
+.. autosummary::
+    :toctree: generated/
+
+    apply_ray_chunked
+    get_ray_chunks
+
 
 """
 
@@ -202,7 +224,7 @@ from .process_monitoring import process_monitoring
 from .process_retrieve import process_signal_power, process_snr
 from .process_retrieve import process_l, process_cdr, process_bird_density
 from .process_retrieve import process_rainrate, process_vol_refl, process_rcs
-from .process_retrieve import process_rcs_pr
+from .process_retrieve import process_rcs_pr, process_fused_retrieval
 
 from .process_Doppler import process_wind_vel, process_windshear
 from .process_Doppler import process_dealias_fourdd
@@ -214,4 +236,10 @@ from .process_cosmo import process_cosmo, process_cosmo_lookup_table
 from .process_cosmo import process_cosmo_coord, process_hzt
 from .process_cosmo import process_hzt_lookup_table, process_hzt_coord
 
+from .accumulators import RadarAccumulator, TimeAvgAccumulator
+from .accumulators import WeightedTimeAvgAccumulator, OccurrenceAccumulator
+from .accumulators import load_accumulator
+
+from .ray_chunks import apply_ray_chunked, get_ray_chunks
+
 __all__ = [s for s in dir() if not s.startswith('_')]
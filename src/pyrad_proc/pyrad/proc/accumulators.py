@@ -0,0 +1,380 @@
+"""
+pyrad.proc.accumulators
+=======================
+
+Accumulators of the radar fields used by the datasets that aggregate data
+over time (time averages, frequency of occurrence, monitoring histograms).
+All accumulators share the same interface: they are initialized with a
+first radar object, updated with the following ones, can merge a partial
+accumulation computed elsewhere (e.g. over another time chunk or by another
+process), are finalized to obtain the output radar object and can be
+stored in and loaded from a file.
+
+.. autosummary::
+    :toctree: generated/
+
+    RadarAccumulator
+    TimeAvgAccumulator
+    WeightedTimeAvgAccumulator
+    OccurrenceAccumulator
+    load_accumulator
+
+"""
+
+from copy import deepcopy
+from warnings import warn
+import pickle
+
+import numpy as np
+
+import pyart
+
+from ..io.read_data_radar import interpol_field
+
+
+class RadarAccumulator(object):
+    """
+    Accumulator adding together the fields of radar objects. The fields are
+    accumulated on the geometry of the first radar object.
+
+    Attributes
+    ----------
+    field_names : list of str
+        the names of the accumulated fields
+    regular_grid : bool
+        If True the radar objects are assumed to have the same geometry and
+        the fields are added without interpolation
+    fill_value : float or None
+        the fill value used when interpolating the fields. If None the
+        Py-ART default is used
+    radar : radar object or None
+        the radar object containing the accumulated fields
+    starttime, endtime : datetime object or None
+        time of the first and last accumulated radar object
+    nvolumes : int
+        number of accumulated radar objects
+
+    Methods:
+    --------
+    init : Initialize the accumulation with a radar object
+    update : Add a radar object to the accumulation
+    merge : Add another accumulation to the accumulation
+    finalize : Get the output radar object
+    dump : Store the accumulation in a file
+
+    """
+
+    def __init__(self, field_names, regular_grid=False, fill_value=None):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        field_names : list of str
+            the names of the accumulated fields
+        regular_grid : bool
+            If True the fields are added without interpolation
+        fill_value : float or None
+            the fill value used when interpolating the fields
+
+        """
+        self.field_names = field_names
+        self.regular_grid = regular_grid
+        self.fill_value = fill_value
+        self.radar = None
+        self.starttime = None
+        self.endtime = None
+        self.nvolumes = 0
+
+    def init(self, radar, timeinfo=None):
+        """
+        Initialize the accumulation with a radar object. The radar object
+        becomes the accumulation and should not be used elsewhere
+
+        Parameters
+        ----------
+        radar : radar object
+            radar object containing the fields to accumulate
+        timeinfo : datetime object
+            the time of the radar object
+
+        """
+        self.radar = radar
+        self.starttime = timeinfo
+        self.endtime = timeinfo
+        self.nvolumes = 1
+
+    def update(self, radar, timeinfo=None):
+        """
+        Add a radar object to the accumulation
+
+        Parameters
+        ----------
+        radar : radar object
+            radar object containing the fields to accumulate
+        timeinfo : datetime object
+            the time of the radar object
+
+        Returns
+        -------
+        accumulated : bool
+            True if the radar object could be accumulated
+
+        """
+        if self.radar is None:
+            self.init(radar, timeinfo=timeinfo)
+            return True
+
+        if not self._add_fields(radar):
+            return False
+
+        self.nvolumes += 1
+        if timeinfo is not None:
+            self.endtime = timeinfo
+
+        return True
+
+    def merge(self, other):
+        """
+        Add another accumulation to the accumulation. If both accumulations
+        have the same geometry the result is the same as if all the radar
+        objects had been accumulated by a single accumulator
+
+        Parameters
+        ----------
+        other : RadarAccumulator object
+            the accumulation to add
+
+        Returns
+        -------
+        merged : bool
+            True if the accumulation could be merged
+
+        """
+        if other.radar is None:
+            return True
+
+        if self.radar is None:
+            self.radar = deepcopy(other.radar)
+            self.starttime = other.starttime
+            self.endtime = other.endtime
+            self.nvolumes = other.nvolumes
+            return True
+
+        if not self._add_fields(other.radar):
+            return False
+
+        self.nvolumes += other.nvolumes
+        if other.starttime is not None:
+            if self.starttime is None or other.starttime < self.starttime:
+                self.starttime = other.starttime
+        if other.endtime is not None:
+            if self.endtime is None or other.endtime > self.endtime:
+                self.endtime = other.endtime
+
+        return True
+
+    def finalize(self):
+        """
+        Get the output radar object. The accumulation is not modified so that
+        it can be further updated
+
+        Returns
+        -------
+        radar : radar object or None
+            the output radar object. None if nothing has been accumulated
+
+        """
+        if self.radar is None:
+            return None
+
+        radar = deepcopy(self.radar)
+        self._finalize_fields(radar)
+
+        return radar
+
+    def dump(self, fname):
+        """
+        Store the accumulation in a file
+
+        Parameters
+        ----------
+        fname : str
+            path of the file
+
+        Returns
+        -------
+        fname : str
+            the path of the file written
+
+        """
+        with open(fname, 'wb') as accfile:
+            pickle.dump(self, accfile, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return fname
+
+    def _add_fields(self, radar):
+        """
+        Adds the fields of a radar object to the accumulated fields
+
+        Parameters
+        ----------
+        radar : radar object
+            radar object containing the fields to accumulate
+
+        Returns
+        -------
+        accumulated : bool
+            True if the fields could be added
+
+        """
+        if self.regular_grid and radar.nrays != self.radar.nrays:
+            warn('Unable to accumulate radar object. ' +
+                 'Number of rays of current radar different from ' +
+                 'reference. nrays current: '+str(radar.nrays) +
+                 ' nrays ref: '+str(self.radar.nrays))
+            return False
+
+        for field_name in self.field_names:
+            if self.regular_grid:
+                data = radar.fields[field_name]['data']
+            else:
+                data = interpol_field(
+                    self.radar, radar, field_name,
+                    fill_value=self.fill_value)['data']
+
+            acc_data = self.radar.fields[field_name]['data']
+            acc_data += np.ma.asarray(
+                data.filled(fill_value=0)).astype(acc_data.dtype)
+
+        return True
+
+    def _finalize_fields(self, radar):
+        """
+        Computes the output fields from the accumulated fields
+
+        Parameters
+        ----------
+        radar : radar object
+            copy of the accumulated radar object. It is modified in place
+
+        """
+        return
+
+
+class TimeAvgAccumulator(RadarAccumulator):
+    """
+    Accumulator computing the time average of a field. The field is
+    accumulated together with the number of samples
+
+    """
+
+    def __init__(self, field_name, lin_trans=False, regular_grid=False):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        field_name : str
+            name of the averaged field
+        lin_trans : bool
+            If True the accumulated field is in linear units and the average
+            is transformed back to logarithmic units
+        regular_grid : bool
+            If True the fields are added without interpolation
+
+        """
+        super().__init__(
+            [field_name, 'number_of_samples'], regular_grid=regular_grid)
+        self.field_name = field_name
+        self.lin_trans = lin_trans
+
+    def _finalize_fields(self, radar):
+        radar.fields[self.field_name]['data'] /= (
+            radar.fields['number_of_samples']['data'])
+        if self.lin_trans:
+            radar.fields[self.field_name]['data'] = 10.*np.ma.log10(
+                radar.fields[self.field_name]['data'])
+
+
+class WeightedTimeAvgAccumulator(RadarAccumulator):
+    """
+    Accumulator computing the time average of a field weighted by the
+    reflectivity. The weighted field is accumulated together with the
+    linear reflectivity
+
+    """
+
+    def __init__(self, field_name, refl_name, regular_grid=False):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        field_name : str
+            name of the averaged field
+        refl_name : str
+            name of the reflectivity field used as weight
+        regular_grid : bool
+            If True the fields are added without interpolation
+
+        """
+        super().__init__([field_name, refl_name], regular_grid=regular_grid)
+        self.field_name = field_name
+        self.refl_name = refl_name
+
+    def _finalize_fields(self, radar):
+        radar.fields[self.field_name]['data'] /= (
+            radar.fields[self.refl_name]['data'])
+
+
+class OccurrenceAccumulator(RadarAccumulator):
+    """
+    Accumulator computing the frequency of occurrence of data. The
+    occurrence is accumulated together with the number of samples
+
+    """
+
+    def __init__(self, regular_grid=False):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        regular_grid : bool
+            If True the fields are added without interpolation
+
+        """
+        super().__init__(
+            ['occurrence', 'number_of_samples'], regular_grid=regular_grid)
+
+    def _finalize_fields(self, radar):
+        freq_occu_dict = pyart.config.get_metadata('frequency_of_occurrence')
+        freq_occu_dict['data'] = (
+            100.*radar.fields['occurrence']['data'] /
+            radar.fields['number_of_samples']['data'])
+        radar.add_field('frequency_of_occurrence', freq_occu_dict)
+
+
+def load_accumulator(fname):
+    """
+    Loads an accumulation stored in a file
+
+    Parameters
+    ----------
+    fname : str
+        path of the file
+
+    Returns
+    -------
+    accumulator : RadarAccumulator object or None
+        the accumulation. None if the file could not be read
+
+    """
+    try:
+        with open(fname, 'rb') as accfile:
+            return pickle.load(accfile)
+    except EnvironmentError as ee:
+        warn(str(ee))
+        warn('Unable to read file '+fname)
+        return None
@@ -16,7 +16,6 @@ Functions for processing Doppler related parameters
 
 """
 
-from copy import deepcopy
 from warnings import warn
 
 import numpy as np
@@ -24,6 +23,7 @@ import numpy as np
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..util.radar_utils import create_empty_radar
 
 
 def process_dealias_fourdd(procstatus, dscfg, radar_list=None):
@@ -119,8 +119,7 @@ def process_dealias_fourdd(procstatus, dscfg, radar_list=None):
                 mask, corr_vel_dict['data'])
 
     # prepare for exit
-    radar_out = deepcopy(radar)
-    radar_out.fields = dict()
+    radar_out = create_empty_radar(radar)
     radar_out.add_field(corr_vel_field, corr_vel_dict)
     new_dataset = {'radar_out': radar_out}
 
@@ -206,8 +205,7 @@ def process_dealias_region_based(procstatus, dscfg, radar_list=None):
         vel_field=vel_field, corr_vel_field=corr_vel_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(corr_vel_field, corr_vel_dict)
 
     return new_dataset, ind_rad
@@ -275,8 +273,7 @@ def process_dealias_unwrap_phase(procstatus, dscfg, radar_list=None):
         vel_field=vel_field, corr_vel_field=corr_vel_field, skip_checks=False)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(corr_vel_field, corr_vel_dict)
 
     return new_dataset, ind_rad
@@ -337,8 +334,7 @@ def process_wind_vel(procstatus, dscfg, radar_list=None):
         wind_field=wind_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(wind_field, wind)
 
     return new_dataset, ind_rad
@@ -397,8 +393,7 @@ def process_windshear(procstatus, dscfg, radar_list=None):
         windshear_field=windshear_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(windshear_field, windshear)
 
     return new_dataset, ind_rad
@@ -463,8 +458,7 @@ def process_vad(procstatus, dscfg, radar_list=None):
          vel_diff_field='velocity_difference')
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('eastward_wind_component', u_vel_dict)
     new_dataset['radar_out'].add_field('northward_wind_component', v_vel_dict)
     new_dataset['radar_out'].add_field('vertical_wind_component', w_vel_dict)
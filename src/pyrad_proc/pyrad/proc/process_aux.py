@@ -16,20 +16,29 @@ determined points or regions of interest.
     process_roi
     process_grid
     process_azimuthal_average
+    _get_grid_weights_key
+    _grid_from_weights
 
 """
 
 from copy import deepcopy
 from warnings import warn
+import os
+import hashlib
 import numpy as np
 
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..io.io_aux import get_save_dir
 from ..io.read_data_sensor import read_trt_traj_data
+from ..io.read_data_other import read_grid_weights
+from ..io.write_data import write_grid_weights
 from ..util.radar_utils import belongs_roi_indices, get_target_elevations
 from ..util.radar_utils import find_neighbour_gates, compute_directional_stats
 from ..util.radar_utils import get_fixed_rng_data
+from ..util.radar_utils import compute_grid_weights, apply_grid_weights
+from ..util.radar_utils import create_empty_radar
 
 
 def get_process_func(dataset_type, dsname):
@@ -59,6 +68,7 @@ def get_process_func(dataset_type, dsname):
                 'DEALIAS_UNWRAP': process_dealias_unwrap_phase
                 'ECHO_FILTER': process_echo_filter
                 'FIXED_RNG': process_fixed_rng
+                'FUSED_RETRIEVAL': process_fused_retrieval
                 'HYDROCLASS': process_hydroclass
                 'HZT': process_hzt
                 'HZT_LOOKUP': process_hzt_lookup_table
@@ -187,6 +197,8 @@ def get_process_func(dataset_type, dsname):
         func_name = 'process_vol_refl'
     elif dataset_type == 'BIRD_DENSITY':
         func_name = 'process_bird_density'
+    elif dataset_type == 'FUSED_RETRIEVAL':
+        func_name = 'process_fused_retrieval'
     elif dataset_type == 'RHOHV_CORRECTION':
         func_name = 'process_correct_noise_rhohv'
     elif dataset_type == 'BIAS_CORRECTION':
@@ -604,7 +616,7 @@ def process_roi(procstatus, dscfg, radar_list=None):
     alt = radar.gate_altitude['data'][inds_ray, inds_rng].T
 
     # prepare new radar object output
-    new_dataset = {'radar_out': deepcopy(radar)}
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].range['data'] = radar.range['data'][inds_rng]
     new_dataset['radar_out'].ngates = inds_rng.size
@@ -645,8 +657,9 @@ def process_roi(procstatus, dscfg, radar_list=None):
     new_dataset['radar_out'].gate_z['data'] = (
         radar.gate_z['data'][inds_ray, inds_rng].T)
 
-    new_dataset['radar_out'].fields = dict()
-    field_dict = deepcopy(radar.fields[field_name])
+    field_dict = {
+        key: deepcopy(value) for key, value in radar.fields[field_name].items()
+        if key != 'data'}
     field_dict['data'] = radar.fields[field_name]['data'][inds_ray, inds_rng].T
     new_dataset['radar_out'].add_field(field_name, field_dict)
 
@@ -690,6 +703,12 @@ def process_grid(procstatus, dscfg, radar_list=None):
         roi : float
              the (minimum) radius of the region of interest in m. Default half
              the largest resolution
+        cache_weights : boolean. Dataset keyword
+            If True the weights of each radar gate for each grid point are
+            computed only once and then applied to each new volume as a
+            sparse matrix product. The weights are stored in the dataset
+            directory and reused in later runs as long as the radar geometry
+            and the grid definition do not change. Default False
 
     radar_list : list of Radar objects
         Optional. list of radar objects
@@ -777,17 +796,55 @@ def process_grid(procstatus, dscfg, radar_list=None):
     if radar.ray_angle_res is not None:
         beam_spacing = radar.ray_angle_res['data'][0]
 
-    # cartesian mapping
-    grid = pyart.map.grid_from_radars(
-        (radar,), gridding_algo='map_to_grid',
-        weighting_function=wfunc,
-        roi_func=roi_func, h_factor=1.0, nb=beamwidth, bsp=beam_spacing,
-        min_radius=min_radius, constant_roi=min_radius,
-        grid_shape=(nz, ny, nx),
-        grid_limits=((zmin, zmax), (ymin*1000., ymax*1000.),
-                     (xmin*1000., xmax*1000.)),
-        grid_origin=(lat, lon), grid_origin_alt=alt,
-        fields=[field_name])
+    grid_shape = (nz, ny, nx)
+    grid_limits = ((zmin, zmax), (ymin*1000., ymax*1000.),
+                   (xmin*1000., xmax*1000.))
+
+    if not dscfg.get('cache_weights', False):
+        # cartesian mapping
+        grid = pyart.map.grid_from_radars(
+            (radar,), gridding_algo='map_to_grid',
+            weighting_function=wfunc,
+            roi_func=roi_func, h_factor=1.0, nb=beamwidth, bsp=beam_spacing,
+            min_radius=min_radius, constant_roi=min_radius,
+            grid_shape=grid_shape, grid_limits=grid_limits,
+            grid_origin=(lat, lon), grid_origin_alt=alt,
+            fields=[field_name])
+
+        return grid, ind_rad
+
+    # get the weights of the gates for each grid point. They are only
+    # computed if the radar geometry or the grid have changed
+    weights_key = _get_grid_weights_key(
+        radar, grid_shape, grid_limits, (lat, lon), alt, wfunc, roi_func,
+        beamwidth, beam_spacing, min_radius)
+
+    if (dscfg['global_data'] is None or
+            dscfg['global_data']['weights_key'] != weights_key):
+        savedir = get_save_dir(
+            dscfg['basepath'], dscfg['procname'], dscfg['dsname'],
+            'grid_weights')
+        fname = savedir+'grid_weights_'+weights_key+'.npz'
+
+        weights = None
+        if os.path.isfile(fname):
+            weights = read_grid_weights(fname)
+        if weights is None:
+            weights = compute_grid_weights(
+                radar, grid_shape, grid_limits, grid_origin=(lat, lon),
+                grid_origin_alt=alt, wfunc=wfunc, roi_func=roi_func,
+                constant_roi=min_radius, h_factor=1.0, nb=beamwidth,
+                bsp=beam_spacing, min_radius=min_radius)
+            write_grid_weights(weights, fname)
+
+        dscfg['global_data'] = {
+            'weights_key': weights_key,
+            'weights': weights}
+
+    grid = _grid_from_weights(
+        radar, field_name, dscfg['global_data']['weights'], grid_shape,
+        grid_limits, (lat, lon), alt,
+        nearest=wfunc.upper() == 'NEAREST_NEIGHBOUR')
 
     return grid, ind_rad
 
@@ -888,8 +945,7 @@ def process_azimuthal_average(procstatus, dscfg, radar_list=None):
 
     # range, metadata, radar position are the same as the original
     # time
-    radar_rhi = deepcopy(radar)
-    radar_rhi.fields = dict()
+    radar_rhi = create_empty_radar(radar)
     radar_rhi.scan_type = 'rhi'
     radar_rhi.sweep_number['data'] = np.array([0])
     radar_rhi.sweep_mode['data'] = np.array(['rhi'])
@@ -938,3 +994,127 @@ def process_azimuthal_average(procstatus, dscfg, radar_list=None):
     new_dataset = {'radar_out': radar_rhi}
 
     return new_dataset, ind_rad
+
+
+def _get_grid_weights_key(radar, grid_shape, grid_limits, grid_origin,
+                          grid_origin_alt, wfunc, roi_func, beamwidth,
+                          beam_spacing, min_radius):
+    """
+    Computes a key identifying a combination of radar geometry and grid
+    definition. Ray angles are rounded to 0.1 deg so that small variations
+    in the antenna position between volumes do not invalidate the weights
+
+    Parameters
+    ----------
+    radar : radar object
+        the radar object
+    grid_shape, grid_limits, grid_origin, grid_origin_alt : tuples and float
+        the grid definition
+    wfunc, roi_func : str
+        the weighting and region of interest functions
+    beamwidth, beam_spacing, min_radius : floats
+        the region of interest parameters
+
+    Returns
+    -------
+    weights_key : str
+        the key
+
+    """
+    hasher = hashlib.md5()
+    # version of the weights definition
+    hasher.update(b'2')
+    hasher.update(repr((
+        grid_shape, grid_limits, grid_origin, grid_origin_alt, wfunc,
+        roi_func, float(beamwidth), float(beam_spacing), float(min_radius),
+        float(radar.latitude['data'][0]), float(radar.longitude['data'][0]),
+        float(radar.altitude['data'][0]), radar.nrays,
+        radar.ngates)).encode())
+    hasher.update(np.asarray(radar.range['data'], dtype=float).tobytes())
+    hasher.update(
+        np.round(np.asarray(radar.azimuth['data'], dtype=float), 1).tobytes())
+    hasher.update(
+        np.round(np.asarray(
+            radar.elevation['data'], dtype=float), 1).tobytes())
+
+    return hasher.hexdigest()
+
+
+def _grid_from_weights(radar, field_name, weights, grid_shape, grid_limits,
+                       grid_origin, grid_origin_alt, nearest=False):
+    """
+    Creates a grid object from a radar field using precomputed weights. As in
+    pyart.map.grid_from_radars, masked gates and the gates of antenna
+    transition rays are not used
+
+    Parameters
+    ----------
+    radar : radar object
+        the radar object
+    field_name : str
+        name of the field to grid
+    weights : scipy sparse matrix
+        the gate weights for each grid point
+    grid_shape, grid_limits, grid_origin, grid_origin_alt : tuples and float
+        the grid definition
+    nearest : bool
+        if True the weights have been computed with NEAREST_NEIGHBOUR
+
+    Returns
+    -------
+    grid : grid object
+        the gridded field
+
+    """
+    field_data = radar.fields[field_name]['data']
+    if radar.antenna_transition is not None:
+        is_transition = radar.antenna_transition['data'].astype(bool)
+        if np.any(is_transition):
+            field_data = np.ma.masked_where(
+                np.broadcast_to(is_transition[:, np.newaxis],
+                                field_data.shape), field_data)
+
+    field_dict = {
+        key: value for key, value in radar.fields[field_name].items()
+        if key != 'data'}
+    field_dict['data'] = apply_grid_weights(
+        weights, field_data, grid_shape, nearest=nearest)
+
+    time = pyart.config.get_metadata('grid_time')
+    time['data'] = np.array([radar.time['data'][0]])
+    time['units'] = radar.time['units']
+
+    origin_latitude = pyart.config.get_metadata('origin_latitude')
+    origin_latitude['data'] = np.array([grid_origin[0]], dtype=float)
+    origin_longitude = pyart.config.get_metadata('origin_longitude')
+    origin_longitude['data'] = np.array([grid_origin[1]], dtype=float)
+    origin_altitude = pyart.config.get_metadata('origin_altitude')
+    origin_altitude['data'] = np.array([grid_origin_alt], dtype=float)
+
+    nz, ny, nx = grid_shape
+    z = pyart.config.get_metadata('z')
+    z['data'] = np.linspace(grid_limits[0][0], grid_limits[0][1], nz)
+    y = pyart.config.get_metadata('y')
+    y['data'] = np.linspace(grid_limits[1][0], grid_limits[1][1], ny)
+    x = pyart.config.get_metadata('x')
+    x['data'] = np.linspace(grid_limits[2][0], grid_limits[2][1], nx)
+
+    radar_latitude = pyart.config.get_metadata('radar_latitude')
+    radar_latitude['data'] = np.array([radar.latitude['data'][0]])
+    radar_longitude = pyart.config.get_metadata('radar_longitude')
+    radar_longitude['data'] = np.array([radar.longitude['data'][0]])
+    radar_altitude = pyart.config.get_metadata('radar_altitude')
+    radar_altitude['data'] = np.array([radar.altitude['data'][0]])
+    radar_time = pyart.config.get_metadata('radar_time')
+    radar_time['data'] = np.array([radar.time['data'][0]])
+    radar_time['units'] = radar.time['units']
+    radar_name = pyart.config.get_metadata('radar_name')
+    radar_name['data'] = np.array(
+        [radar.metadata.get('instrument_name', '')])
+
+    return pyart.core.Grid(
+        time, {field_name: field_dict}, dict(radar.metadata),
+        origin_latitude, origin_longitude, origin_altitude, x, y, z,
+        radar_latitude=radar_latitude, radar_longitude=radar_longitude,
+        radar_altitude=radar_altitude, radar_time=radar_time,
+        radar_name=radar_name)
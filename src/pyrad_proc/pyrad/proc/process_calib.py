@@ -14,6 +14,7 @@ Functions for monitoring data quality and correct bias and noise effects
     process_time_avg_std
     process_occurrence_period
     process_sun_hits
+    _get_sun_candidate_rays
 
 """
 
@@ -30,6 +31,11 @@ from ..io.read_data_radar import interpol_field
 
 from ..util.radar_utils import get_closest_solar_flux, get_histogram_bins
 from ..util.radar_utils import find_ray_index, find_rng_index
+from ..util.radar_utils import compute_sun_position, subset_radar_rays
+from ..util.sparse_field import SparseField
+from ..util.radar_utils import create_empty_radar
+
+from .accumulators import RadarAccumulator, OccurrenceAccumulator
 
 
 def process_correct_bias(procstatus, dscfg, radar_list=None):
@@ -89,8 +95,7 @@ def process_correct_bias(procstatus, dscfg, radar_list=None):
         new_field_name = 'corrected_'+field_name
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(new_field_name, corrected_field)
 
     return new_dataset, ind_rad
@@ -160,8 +165,7 @@ def process_correct_noise_rhohv(procstatus, dscfg, radar_list=None):
         nh_field=nh, nv_field=nv, rhohv_field='cross_correlation_ratio')
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('cross_correlation_ratio', rhohv)
 
     return new_dataset, ind_rad
@@ -306,8 +310,7 @@ def process_gc_monitoring(procstatus, dscfg, radar_list=None):
         bin_centers = bin_edges[:-1]+step/2.
 
         # create histogram object from radar object
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.range['data'] = bin_centers
         radar_aux.ngates = nbins
         radar_aux.nrays = 1
@@ -361,13 +364,13 @@ def process_gc_monitoring(procstatus, dscfg, radar_list=None):
 
         # Put histogram in Memory or add to existing histogram
         if dscfg['initialized'] == 0:
-            dscfg['global_data'].update({
-                'hist_obj': radar_aux,
-                'timeinfo': start_time})
+            acc = RadarAccumulator([field_name], regular_grid=True)
+            acc.init(radar_aux, timeinfo=start_time)
+            dscfg['global_data'].update({'accumulator': acc})
             dscfg['initialized'] = 1
         else:
-            dscfg['global_data']['hist_obj'].fields[field_name]['data'] += (
-                field_dict['data'].filled(fill_value=0)).astype('int64')
+            dscfg['global_data']['accumulator'].update(
+                radar_aux, timeinfo=start_time)
 
         #    dscfg['global_data']['timeinfo'] = dscfg['timeinfo']
 
@@ -382,10 +385,12 @@ def process_gc_monitoring(procstatus, dscfg, radar_list=None):
         if dscfg['initialized'] == 0:
             return None, None
 
+        acc = dscfg['global_data']['accumulator']
+
         dataset = dict()
-        dataset.update({'hist_obj': dscfg['global_data']['hist_obj']})
+        dataset.update({'hist_obj': acc.finalize()})
         dataset.update({'hist_type': 'cumulative'})
-        dataset.update({'timeinfo': dscfg['global_data']['timeinfo']})
+        dataset.update({'timeinfo': acc.starttime})
 
         return dataset, ind_rad
 
@@ -497,8 +502,7 @@ def process_occurrence(procstatus, dscfg, radar_list=None):
                     return None, None
 
         # prepare field number of samples and occurrence
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
 
         npoints_dict = pyart.config.get_metadata('number_of_samples')
         npoints_dict['data'] = np.ma.ones(
@@ -526,53 +530,32 @@ def process_occurrence(procstatus, dscfg, radar_list=None):
 
         radar_aux.add_field('occurrence', occu_dict)
 
-        # first volume: initialize radar object
+        # first volume: initialize accumulation
         if dscfg['initialized'] == 0:
-            new_dataset = {
-                'radar_out': radar_aux,
-                'starttime': dscfg['timeinfo'],
-                'endtime': dscfg['timeinfo'],
-                'occu_final': False}
+            acc = OccurrenceAccumulator(
+                regular_grid=dscfg.get('regular_grid', False))
+            acc.init(radar_aux, timeinfo=dscfg['timeinfo'])
 
-            dscfg['global_data'] = new_dataset
+            dscfg['global_data'] = {'accumulator': acc}
             dscfg['initialized'] = 1
 
+            new_dataset = {
+                'radar_out': acc.radar,
+                'starttime': acc.starttime,
+                'endtime': acc.endtime,
+                'occu_final': False}
+
             return new_dataset, ind_rad
 
         # accumulate data
-        regular_grid = False
-        if 'regular_grid' in dscfg:
-            regular_grid = dscfg['regular_grid']
-
-        if not regular_grid:
-            occu_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, 'occurrence')
-            npoints_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux,
-                'number_of_samples')
-        else:
-            if radar_aux.nrays != dscfg['global_data']['radar_out'].nrays:
-                warn('Unable to accumulate radar object. ' +
-                     'Number of rays of current radar different from ' +
-                     'reference. nrays current: '+str(radar_aux.nrays) +
-                     ' nrays ref: ' +
-                     str(dscfg['global_data']['radar_out'].nrays))
-                return None, None
-            occu_interp = radar_aux.fields['occurrence']
-            npoints_interp = radar_aux.fields['number_of_samples']
-
-        dscfg['global_data']['radar_out'].fields['occurrence']['data'] += (
-            np.ma.asarray(
-                occu_interp['data'].filled(fill_value=0)).astype('int'))
-        dscfg['global_data']['radar_out'].fields['number_of_samples'][
-            'data'] += (np.ma.asarray(
-                npoints_interp['data'].filled(fill_value=0)).astype('int'))
-        dscfg['global_data']['endtime'] = dscfg['timeinfo']
+        acc = dscfg['global_data']['accumulator']
+        if not acc.update(radar_aux, timeinfo=dscfg['timeinfo']):
+            return None, None
 
         new_dataset = {
-            'radar_out': dscfg['global_data']['radar_out'],
-            'starttime': dscfg['global_data']['starttime'],
-            'endtime': dscfg['global_data']['endtime'],
+            'radar_out': acc.radar,
+            'starttime': acc.starttime,
+            'endtime': acc.endtime,
             'occu_final': False}
 
         return new_dataset, ind_rad
@@ -581,21 +564,14 @@ def process_occurrence(procstatus, dscfg, radar_list=None):
     if procstatus == 2:
         if dscfg['initialized'] == 0:
             return None, None
-        if 'radar_out' not in dscfg['global_data']:
+        if 'accumulator' not in dscfg['global_data']:
             return None, None
 
-        radar = dscfg['global_data']['radar_out']
-
-        freq_occu_dict = pyart.config.get_metadata('frequency_of_occurrence')
-        freq_occu_dict['data'] = (100.*radar.fields['occurrence']['data'] /
-                                  radar.fields['number_of_samples']['data'])
-
-        radar.add_field('frequency_of_occurrence', freq_occu_dict)
-
+        acc = dscfg['global_data']['accumulator']
         new_dataset = {
-            'radar_out': dscfg['global_data']['radar_out'],
-            'starttime': dscfg['global_data']['starttime'],
-            'endtime': dscfg['global_data']['endtime'],
+            'radar_out': acc.finalize(),
+            'starttime': acc.starttime,
+            'endtime': acc.endtime,
             'occu_final': True}
 
         return new_dataset, ind_rad
@@ -739,8 +715,7 @@ def process_time_avg_std(procstatus, dscfg, radar_list=None):
         field = np.ma.masked_where(mask, field)
         field = np.ma.asarray(field)
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
 
         sum_dict = pyart.config.get_metadata('sum')
         sum_dict['data'] = field
@@ -901,8 +876,7 @@ def process_occurrence_period(procstatus, dscfg, radar_list=None):
             warn('Unable to compute frequency of occurrence. Missing data')
             return None, None
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.add_field('occurrence', radar.fields['occurrence'])
         radar_aux.add_field(
             'number_of_samples', radar.fields['number_of_samples'])
@@ -922,53 +896,32 @@ def process_occurrence_period(procstatus, dscfg, radar_list=None):
                 radar_aux.fields['occurrence']['data'][
                     :, ind_max:radar_aux.ngates] = 0
 
-        # first volume: initialize radar object
+        # first volume: initialize accumulation
         if dscfg['initialized'] == 0:
-            new_dataset = {
-                'radar_out': radar_aux,
-                'starttime': dscfg['timeinfo'],
-                'endtime': dscfg['timeinfo'],
-                'occu_final': False}
+            acc = OccurrenceAccumulator(
+                regular_grid=dscfg.get('regular_grid', False))
+            acc.init(radar_aux, timeinfo=dscfg['timeinfo'])
 
-            dscfg['global_data'] = new_dataset
+            dscfg['global_data'] = {'accumulator': acc}
             dscfg['initialized'] = 1
 
+            new_dataset = {
+                'radar_out': acc.radar,
+                'starttime': acc.starttime,
+                'endtime': acc.endtime,
+                'occu_final': False}
+
             return new_dataset, ind_rad
 
         # accumulate data
-        regular_grid = False
-        if 'regular_grid' in dscfg:
-            regular_grid = dscfg['regular_grid']
-
-        if not regular_grid:
-            occu_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, 'occurrence')
-            npoints_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux,
-                'number_of_samples')
-        else:
-            if radar_aux.nrays != dscfg['global_data']['radar_out'].nrays:
-                warn('Unable to accumulate radar object. ' +
-                     'Number of rays of current radar different from ' +
-                     'reference. nrays current: '+str(radar_aux.nrays) +
-                     ' nrays ref: ' +
-                     str(dscfg['global_data']['radar_out'].nrays))
-                return None, None
-            occu_interp = radar_aux.fields['occurrence']
-            npoints_interp = radar_aux.fields['number_of_samples']
-
-        dscfg['global_data']['radar_out'].fields['occurrence']['data'] += (
-            np.ma.asarray(
-                occu_interp['data'].filled(fill_value=0)).astype('int'))
-        dscfg['global_data']['radar_out'].fields['number_of_samples'][
-            'data'] += np.ma.asarray(
-                npoints_interp['data'].filled(fill_value=0)).astype('int')
-        dscfg['global_data']['endtime'] = dscfg['timeinfo']
+        acc = dscfg['global_data']['accumulator']
+        if not acc.update(radar_aux, timeinfo=dscfg['timeinfo']):
+            return None, None
 
         new_dataset = {
-            'radar_out': dscfg['global_data']['radar_out'],
-            'starttime': dscfg['global_data']['starttime'],
-            'endtime': dscfg['global_data']['endtime'],
+            'radar_out': acc.radar,
+            'starttime': acc.starttime,
+            'endtime': acc.endtime,
             'occu_final': False}
 
         return new_dataset, ind_rad
@@ -977,21 +930,14 @@ def process_occurrence_period(procstatus, dscfg, radar_list=None):
     if procstatus == 2:
         if dscfg['initialized'] == 0:
             return None, None
-        if 'radar_out' not in dscfg['global_data']:
+        if 'accumulator' not in dscfg['global_data']:
             return None, None
 
-        radar = dscfg['global_data']['radar_out']
-
-        freq_occu_dict = pyart.config.get_metadata('frequency_of_occurrence')
-        freq_occu_dict['data'] = (100.*radar.fields['occurrence']['data'] /
-                                  radar.fields['number_of_samples']['data'])
-
-        radar.add_field('frequency_of_occurrence', freq_occu_dict)
-
+        acc = dscfg['global_data']['accumulator']
         new_dataset = {
-            'radar_out': dscfg['global_data']['radar_out'],
-            'starttime': dscfg['global_data']['starttime'],
-            'endtime': dscfg['global_data']['endtime'],
+            'radar_out': acc.finalize(),
+            'starttime': acc.starttime,
+            'endtime': acc.endtime,
             'occu_final': True}
 
         return new_dataset, ind_rad
@@ -1056,6 +1002,15 @@ def process_sun_hits(procstatus, dscfg, radar_list=None):
         coeff_band : float. Dataset keyword
             multiplicate coefficient to transform pulse width into receiver
             bandwidth
+        sun_prefilter : bool. Dataset keyword
+            If True the sun position is computed for all rays at once and
+            only the rays close to the sun are passed to the sun hits
+            detection. If no ray is close to the sun the detection is
+            skipped altogether. The gates of the other rays are masked in
+            the output fields. Default True
+        sun_prefilter_margin : float. Dataset keyword
+            margin added to delev_max and dazim_max when selecting the rays
+            close to the sun [deg]. Default 0.5
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -1149,10 +1104,24 @@ def process_sun_hits(procstatus, dscfg, radar_list=None):
         attg = dscfg.get('attg', None)
         max_std_pwr = dscfg.get('max_std_pwr', 2.)
         max_std_zdr = dscfg.get('max_std_zdr', 2.)
+        sun_prefilter = dscfg.get('sun_prefilter', True)
+        sun_prefilter_margin = dscfg.get('sun_prefilter_margin', 0.5)
+
+        radar_aux = radar
+        if sun_prefilter:
+            # keep only the rays that may contain a sun hit
+            ind_rays = _get_sun_candidate_rays(
+                radar, delev_max+sun_prefilter_margin,
+                dazim_max+sun_prefilter_margin, elmin=elmin)
+            if ind_rays.size == 0:
+                return None, None
+            radar_aux = subset_radar_rays(
+                radar, ind_rays,
+                field_names=[pwrh_field, pwrv_field, zdr_field])
 
         sun_hits, new_radar = pyart.correct.get_sun_hits(
-            radar, delev_max=delev_max, dazim_max=dazim_max, elmin=elmin,
-            rmin=rmin, hmin=hmin, nbins_min=nbins_min,
+            radar_aux, delev_max=delev_max, dazim_max=dazim_max,
+            elmin=elmin, rmin=rmin, hmin=hmin, nbins_min=nbins_min,
             max_std_pwr=max_std_pwr, max_std_zdr=max_std_zdr,
             attg=attg, pwrh_field=pwrh_field, pwrv_field=pwrv_field,
             zdr_field=zdr_field)
@@ -1160,6 +1129,23 @@ def process_sun_hits(procstatus, dscfg, radar_list=None):
         if sun_hits is None:
             return None, None
 
+        if sun_prefilter:
+            # refer the ray indices to the full radar volume
+            sun_hits['ray'] = ind_rays[np.asarray(sun_hits['ray'], dtype=int)]
+
+            # put the output fields back into the full radar volume. Only
+            # the candidate rays contain data: the fields are kept sparse
+            radar_out = create_empty_radar(radar)
+            for field_name, field_dict in new_radar.fields.items():
+                field_out = {
+                    key: value for key, value in field_dict.items()
+                    if key != 'data'}
+                field_out['data'] = SparseField.from_rays(
+                    (radar.nrays, radar.ngates), ind_rays,
+                    field_dict['data'])
+                radar_out.add_field(field_name, field_out)
+            new_radar = radar_out
+
         sun_hits_dataset = dict()
         sun_hits_dataset.update({'sun_hits': sun_hits})
         sun_hits_dataset.update({'radar_out': new_radar})
@@ -1400,3 +1386,35 @@ def process_sun_hits(procstatus, dscfg, radar_list=None):
             {'timeinfo': dscfg['global_data']['timeinfo']})
 
         return sun_hits_dataset, ind_rad
+
+
+def _get_sun_candidate_rays(radar, delev_max, dazim_max, elmin=1.):
+    """
+    Gets the indices of the rays that are close enough to the position of
+    the sun to potentially contain a sun hit
+
+    Parameters
+    ----------
+    radar : Radar object
+        radar object
+    delev_max, dazim_max : float
+        maximum elevation and azimuth distance between the ray and the sun
+        [deg]
+    elmin : float
+        minimum radar elevation [deg]
+
+    Returns
+    -------
+    ind_rays : int array
+        the indices of the candidate rays
+
+    """
+    sun_el, sun_az = compute_sun_position(radar)
+
+    delev = np.abs(radar.elevation['data']-sun_el)
+    dazim = np.abs(radar.azimuth['data']-sun_az)
+    dazim = np.minimum(dazim, 360.-dazim)*np.cos(np.deg2rad(sun_el))
+
+    return np.where(
+        (radar.elevation['data'] >= elmin) & (sun_el >= 0.) &
+        (delev <= delev_max) & (dazim <= dazim_max))[0]
@@ -13,12 +13,15 @@ Functions to manage COSMO data
     process_hzt_lookup_table
     process_cosmo_coord
     process_hzt_coord
+    _get_geometry_key
+    _same_ray_angles
+    _cosmo_window_covers
 
 """
 
-from copy import deepcopy
 from warnings import warn
 import glob
+import hashlib
 
 import numpy as np
 from netCDF4 import num2date
@@ -28,11 +31,12 @@ import pyart
 from ..io.io_aux import get_datatype_fields, find_raw_cosmo_file
 from ..io.io_aux import find_hzt_file, get_fieldname_pyart
 from ..io.read_data_cosmo import read_cosmo_data, read_cosmo_coord
-from ..io.read_data_cosmo import cosmo2radar_data, cosmo2radar_coord
-from ..io.read_data_cosmo import get_cosmo_fields
+from ..io.read_data_cosmo import cosmo2radar_coord
+from ..io.read_data_cosmo import get_cosmo_fields, _get_cosmo_window
 from ..io.read_data_radar import interpol_field
 from ..io.read_data_hzt import read_hzt_data, hzt2radar_data, hzt2radar_coord
 from ..io.read_data_hzt import get_iso0_field
+from ..util.radar_utils import create_empty_radar
 
 # from memory_profiler import profile
 
@@ -129,13 +133,47 @@ def process_cosmo(procstatus, dscfg, radar_list=None):
                 'time_index': None,
                 'cosmo_coord': cosmo_coord}
             dscfg['initialized'] = 1
-
         cosmo_coord = dscfg['global_data']['cosmo_coord']
+    elif dscfg['global_data'] is None:
+        dscfg['global_data'] = dict()
+
+    # nearest COSMO cell of each radar gate. Computed only when the radar
+    # geometry changes and shared by all fields and time steps
+    geom_key = _get_geometry_key(radar)
+    if (geom_key != dscfg['global_data'].get('cosmo_ind_key', None) or
+            not _same_ray_angles(
+                radar, dscfg['global_data'].get('cosmo_ind_azimuth', None),
+                dscfg['global_data'].get('cosmo_ind_elevation', None))):
+        if not keep_in_memory:
+            cosmo_coord = read_cosmo_coord(
+                dscfg['cosmopath'][ind_rad] +
+                'rad2cosmo1/cosmo-1_MDR_3D_const.nc', zmin=zmin)
+        dscfg['global_data']['cosmo_ind'] = cosmo2radar_coord(
+            radar, cosmo_coord)
+        dscfg['global_data']['cosmo_ind_key'] = geom_key
+        dscfg['global_data']['cosmo_ind_azimuth'] = np.array(
+            radar.azimuth['data'], dtype=np.float64)
+        dscfg['global_data']['cosmo_ind_elevation'] = np.array(
+            radar.elevation['data'], dtype=np.float64)
+
+        # the COSMO fields have to be recomputed for the new geometry. The
+        # COSMO data in memory is read again only if it does not cover it
+        if keep_in_memory:
+            dscfg['global_data']['time_index'] = None
+            if not _cosmo_window_covers(
+                    dscfg['global_data']['cosmo_data'],
+                    dscfg['global_data']['cosmo_ind']):
+                dscfg['global_data']['cosmo_fname'] = None
+    cosmo_ind = dscfg['global_data']['cosmo_ind']
+
+    # only the part of the COSMO domain seen by the radar is read
+    if keep_in_memory:
         if fname != dscfg['global_data']['cosmo_fname']:
             # debugging
             # start_time2 = time.time()
             cosmo_data = read_cosmo_data(
-                fname, field_names=field_names, celsius=True)
+                fname, field_names=field_names, celsius=True,
+                cosmo_ind=cosmo_ind)
             # print(" reading COSMO takes %s seconds " %
             #      (time.time() - start_time2))
             if cosmo_data is None:
@@ -144,18 +182,16 @@ def process_cosmo(procstatus, dscfg, radar_list=None):
 
             dscfg['global_data']['cosmo_data'] = cosmo_data
             dscfg['global_data']['cosmo_fname'] = fname
+            dscfg['global_data']['time_index'] = None
         else:
             print('raw COSMO data already in memory')
             cosmo_data = dscfg['global_data']['cosmo_data']
     else:
-        cosmo_coord = read_cosmo_coord(
-            dscfg['cosmopath'][ind_rad]+'rad2cosmo1/cosmo-1_MDR_3D_const.nc',
-            zmin=zmin)
-
         # debugging
         # start_time2 = time.time()
         cosmo_data = read_cosmo_data(
-            fname, field_names=field_names, celsius=True)
+            fname, field_names=field_names, celsius=True,
+            cosmo_ind=cosmo_ind, timeinfo=dscfg['timeinfo'])
         # print(" reading COSMO takes %s seconds " %
         #      (time.time() - start_time2))
         if cosmo_data is None:
@@ -168,8 +204,8 @@ def process_cosmo(procstatus, dscfg, radar_list=None):
 
     if keep_in_memory and regular_grid:
         if time_index != dscfg['global_data']['time_index']:
-            cosmo_fields = cosmo2radar_data(
-                radar, cosmo_coord, cosmo_data, time_index=time_index,
+            cosmo_fields = get_cosmo_fields(
+                cosmo_data, cosmo_ind, time_index=time_index,
                 field_names=field_names)
             if cosmo_fields is None:
                 warn('Unable to obtain COSMO fields')
@@ -181,16 +217,15 @@ def process_cosmo(procstatus, dscfg, radar_list=None):
             print('COSMO field already in memory')
             cosmo_fields = dscfg['global_data']['cosmo_fields']
     else:
-        cosmo_fields = cosmo2radar_data(
-            radar, cosmo_coord, cosmo_data, time_index=time_index,
+        cosmo_fields = get_cosmo_fields(
+            cosmo_data, cosmo_ind, time_index=time_index,
             field_names=field_names)
         if cosmo_fields is None:
             warn('Unable to obtain COSMO fields')
             return None, None
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     for field in cosmo_fields:
         for field_name in field:
@@ -325,8 +360,7 @@ def process_hzt(procstatus, dscfg, radar_list=None):
             return None, None
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('height_over_iso0', iso0_field)
 
     return new_dataset, ind_rad
@@ -429,8 +463,7 @@ def process_cosmo_lookup_table(procstatus, dscfg, radar_list=None):
                 dscfg['cosmopath'][ind_rad] +
                 'rad2cosmo1/cosmo-1_MDR_3D_const.nc', zmin=zmin)
             cosmo_ind_field = cosmo2radar_coord(radar, cosmo_coord)
-            cosmo_radar = deepcopy(radar)
-            cosmo_radar.fields = dict()
+            cosmo_radar = create_empty_radar(radar)
             cosmo_radar.add_field('cosmo_index', cosmo_ind_field)
 
         dscfg['global_data'] = {
@@ -445,7 +478,9 @@ def process_cosmo_lookup_table(procstatus, dscfg, radar_list=None):
         # debugging
         # start_time2 = time.time()
         cosmo_data = read_cosmo_data(
-            fname, field_names=field_names, celsius=True)
+            fname, field_names=field_names, celsius=True,
+            cosmo_ind=dscfg['global_data']['cosmo_radar'].fields[
+                'cosmo_index'])
         # print(" reading COSMO takes %s seconds " %
         #      (time.time() - start_time2))
         if cosmo_data is None:
@@ -486,12 +521,10 @@ def process_cosmo_lookup_table(procstatus, dscfg, radar_list=None):
     dscfg['global_data']['cosmo_fname'] = fname
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     if not regular_grid:
-        radar_aux = deepcopy(dscfg['global_data']['cosmo_radar'])
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(dscfg['global_data']['cosmo_radar'])
 
     for field in cosmo_fields:
         for field_name in field:
@@ -593,8 +626,7 @@ def process_hzt_lookup_table(procstatus, dscfg, radar_list=None):
                 'y': hzt_data['y']
             }
             hzt_ind_field = hzt2radar_coord(radar, hzt_coord)
-            hzt_radar = deepcopy(radar)
-            hzt_radar.fields = dict()
+            hzt_radar = create_empty_radar(radar)
             hzt_radar.add_field('hzt_index', hzt_ind_field)
 
         dscfg['global_data'] = {
@@ -640,12 +672,10 @@ def process_hzt_lookup_table(procstatus, dscfg, radar_list=None):
     dscfg['global_data']['hzt_fname'] = fname
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     if not regular_grid:
-        radar_aux = deepcopy(dscfg['global_data']['hzt_radar'])
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(dscfg['global_data']['hzt_radar'])
 
     try:
         if regular_grid:
@@ -721,8 +751,7 @@ def process_cosmo_coord(procstatus, dscfg, radar_list=None):
         radar, cosmo_coord, slice_xy=True, slice_z=False)
 
     # prepare for exit
-    radar_obj = deepcopy(radar)
-    radar_obj.fields = dict()
+    radar_obj = create_empty_radar(radar)
     radar_obj.add_field('cosmo_index', cosmo_ind_field)
 
     new_dataset = {
@@ -791,8 +820,7 @@ def process_hzt_coord(procstatus, dscfg, radar_list=None):
     hzt_ind_field = hzt2radar_coord(radar, hzt_coord)
 
     # prepare for exit
-    radar_obj = deepcopy(radar)
-    radar_obj.fields = dict()
+    radar_obj = create_empty_radar(radar)
     radar_obj.add_field('hzt_index', hzt_ind_field)
 
     new_dataset = {
@@ -802,3 +830,100 @@ def process_hzt_coord(procstatus, dscfg, radar_list=None):
     dscfg['initialized'] = 1
 
     return new_dataset, ind_rad
+
+
+def _get_geometry_key(radar):
+    """
+    Computes a key identifying the scan geometry of a radar: the radar
+    position, the range of the gates, the fixed angles and the number of rays
+    of each sweep. The actual ray angles vary slightly from volume to volume
+    and are compared with a tolerance by _same_ray_angles
+
+    Parameters
+    ----------
+    radar : Radar object
+        radar object
+
+    Returns
+    -------
+    key : str
+        hexadecimal digest of the scan geometry
+
+    """
+    key = hashlib.md5()
+    key.update(repr((
+        float(radar.latitude['data'][0]), float(radar.longitude['data'][0]),
+        float(radar.altitude['data'][0]), radar.scan_type, radar.nrays,
+        radar.ngates)).encode())
+    key.update(np.asarray(radar.range['data'], dtype=np.float64).tobytes())
+    key.update(np.round(np.asarray(
+        radar.fixed_angle['data'], dtype=np.float64), 1).tobytes())
+    key.update(np.asarray(
+        radar.rays_per_sweep['data'], dtype=np.int64).tobytes())
+
+    return key.hexdigest()
+
+
+def _same_ray_angles(radar, azimuth, elevation, tol=0.1):
+    """
+    Checks whether the rays of a radar point in the same direction as a
+    reference set of rays
+
+    Parameters
+    ----------
+    radar : Radar object
+        radar object
+    azimuth, elevation : float arrays
+        the azimuth and elevation of the reference rays [deg]
+    tol : float
+        maximum difference in azimuth and elevation [deg]
+
+    Returns
+    -------
+    same : bool
+        True if all rays are within the tolerance of the reference rays
+
+    """
+    if azimuth is None or azimuth.size != radar.nrays:
+        return False
+
+    daz = np.abs(np.mod(
+        radar.azimuth['data']-azimuth+180., 360.)-180.)
+    dele = np.abs(radar.elevation['data']-elevation)
+
+    return bool(np.all(daz <= tol) and np.all(dele <= tol))
+
+
+def _cosmo_window_covers(cosmo_data, cosmo_ind):
+    """
+    Checks whether the COSMO data in memory contains all the COSMO cells of
+    a set of radar gates
+
+    Parameters
+    ----------
+    cosmo_data : dict or None
+        the COSMO data in memory. If its key 'window' is None the whole
+        COSMO domain has been read
+    cosmo_ind : dict
+        dictionary with the flat indices of the COSMO cells of each radar
+        gate
+
+    Returns
+    -------
+    covers : bool
+        True if the COSMO data contains all the cells
+
+    """
+    if cosmo_data is None:
+        return False
+
+    window = cosmo_data.get('window', None)
+    if window is None:
+        return True
+
+    new_window = _get_cosmo_window(
+        cosmo_ind['data'], cosmo_data['x']['data'].size,
+        cosmo_data['y']['data'].size)
+
+    return (all(new_window[i] >= window[i] for i in range(3)) and
+            all(new_window[i] <= window[i] for i in range(3, 6)))
@@ -30,6 +30,7 @@ import numpy as np
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..util.radar_utils import create_empty_radar
 
 
 def process_echo_id(procstatus, dscfg, radar_list=None):
@@ -113,8 +114,7 @@ def process_echo_id(procstatus, dscfg, radar_list=None):
     id_field.update({'_FillValue': 0})
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('radar_echo_id', id_field)
 
     return new_dataset, ind_rad
@@ -203,8 +203,7 @@ def process_birds_id(procstatus, dscfg, radar_list=None):
     id_field['data'] = echo_id
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('radar_echo_id', id_field)
 
     return new_dataset, ind_rad
@@ -264,8 +263,7 @@ def process_clt_to_echo_id(procstatus, dscfg, radar_list=None):
     id_field['data'] = echo_id
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('radar_echo_id', id_field)
 
     return new_dataset, ind_rad
@@ -323,8 +321,7 @@ def process_echo_filter(procstatus, dscfg, radar_list=None):
     echo_type = dscfg.get('echo_type', 3)
     mask = radar.fields[echoid_field]['data'] != echo_type
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     for datatypedescr in dscfg['datatype']:
         radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
@@ -409,8 +406,7 @@ def process_cdf(procstatus, dscfg, radar_list=None):
         warn('Unable to compute CDF. Missing field')
         return None, None
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].add_field(field_name, radar.fields[field_name])
     if echoid_field is not None:
@@ -479,8 +475,7 @@ def process_filter_snr(procstatus, dscfg, radar_list=None):
         return None, None
     radar = radar_list[ind_rad]
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     if snr_field not in radar.fields:
         warn('Unable to filter dataset according to SNR. Missing SNR field')
@@ -566,8 +561,7 @@ def process_filter_vel_diff(procstatus, dscfg, radar_list=None):
         return None, None
     radar = radar_list[ind_rad]
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     if vel_diff_field not in radar.fields:
         warn('Unable to filter dataset according to valid velocity. ' +
@@ -649,8 +643,7 @@ def process_filter_visibility(procstatus, dscfg, radar_list=None):
         return None, None
     radar = radar_list[ind_rad]
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     if vis_field not in radar.fields:
         warn('Unable to filter dataset according to visibility. ' +
@@ -812,8 +805,7 @@ def process_outlier_filter(procstatus, dscfg, radar_list=None):
     else:
         new_field_name = 'corrected_'+field_name
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(new_field_name, field_out)
 
     return new_dataset, ind_rad
@@ -1065,8 +1057,7 @@ def process_hydroclass(procstatus, dscfg, radar_list=None):
             dscfg['HYDRO_METHOD'])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(
         'radar_echo_classification', fields_dict['hydro'])
 
@@ -1331,8 +1322,7 @@ def process_melting_layer(procstatus, dscfg, radar_list=None):
     if ml_dict is None:
         return None, None
 
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('melting_layer', ml_dict)
     if iso0_dict is not None:
         new_dataset['radar_out'].add_field('height_over_iso0', iso0_dict)
@@ -13,6 +13,7 @@ Functions used in the inter-comparison between radars
     process_colocated_gates
     process_intercomp
     process_intercomp_time_avg
+    _get_max_flag
 
 """
 
@@ -28,10 +29,13 @@ from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
 from ..io.io_aux import get_save_dir, make_filename
 from ..io.read_data_other import read_colocated_gates, read_colocated_data
 from ..io.read_data_other import read_colocated_data_time_avg
-from ..io.read_data_radar import interpol_field
 
 from ..util.radar_utils import time_avg_range, get_range_bins_to_avg
-from ..util.radar_utils import find_colocated_indexes
+from ..util.radar_utils import find_colocated_indexes, get_range_bins_window
+from ..util.radar_utils import create_empty_radar
+
+from .accumulators import RadarAccumulator, TimeAvgAccumulator
+from .accumulators import WeightedTimeAvgAccumulator
 
 
 def process_time_avg(procstatus, dscfg, radar_list=None):
@@ -95,14 +99,17 @@ def process_time_avg(procstatus, dscfg, radar_list=None):
         field['data'] = field['data'].filled(fill_value=0.)
         field['data'] = np.ma.asarray(field['data'])
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.add_field(field_name, field)
         npoints_dict = pyart.config.get_metadata('number_of_samples')
         npoints_dict['data'] = np.ma.ones(
             (radar.nrays, radar.ngates), dtype=int)
         radar_aux.add_field('number_of_samples', npoints_dict)
 
+        # accumulation starting with the current volume
+        new_acc = TimeAvgAccumulator(field_name, lin_trans=lin_trans)
+        new_acc.init(radar_aux, timeinfo=dscfg['timeinfo'])
+
         # first volume: initialize start and end time of averaging
         if dscfg['initialized'] == 0:
             start_average = 0.  # seconds from midnight
@@ -127,8 +134,8 @@ def process_time_avg(procstatus, dscfg, radar_list=None):
             return None, None
 
         dscfg['global_data']['timeinfo'] = dscfg['timeinfo']
-        # no radar object in global data: create it
-        if 'radar_out' not in dscfg['global_data']:
+        # no accumulation in global data: create it
+        if 'accumulator' not in dscfg['global_data']:
             # get start and stop times of new radar object
             (dscfg['global_data']['starttime'],
              dscfg['global_data']['endtime']) = (
@@ -138,46 +145,29 @@ def process_time_avg(procstatus, dscfg, radar_list=None):
 
             # check if volume time older than starttime
             if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-                dscfg['global_data'].update({'radar_out': radar_aux})
+                dscfg['global_data'].update({'accumulator': new_acc})
 
             return None, None
 
         # still accumulating: add field to global field
         if dscfg['timeinfo'] < dscfg['global_data']['endtime']:
-            field_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, field_name)
-            npoints_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux,
-                'number_of_samples')
-            dscfg['global_data']['radar_out'].fields[field_name]['data'] += (
-                field_interp['data'].filled(fill_value=0))
-            dscfg['global_data']['radar_out'].fields[
-                'number_of_samples']['data'] += (
-                    npoints_interp['data'].filled(fill_value=0)).astype('int')
+            dscfg['global_data']['accumulator'].update(
+                radar_aux, timeinfo=dscfg['timeinfo'])
 
             return None, None
 
         # we have reached the end of the accumulation period: do the averaging
         # and start a new object
-        dscfg['global_data']['radar_out'].fields[field_name]['data'] /= (
-            dscfg['global_data']['radar_out'].fields[
-                'number_of_samples']['data'])
-        if lin_trans:
-            dscfg['global_data']['radar_out'].fields[field_name]['data'] = (
-                10.*np.ma.log10(
-                    dscfg['global_data']['radar_out'].fields[
-                        field_name]['data']))
-
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         dscfg['global_data']['starttime'] += datetime.timedelta(
             seconds=period)
         dscfg['global_data']['endtime'] += datetime.timedelta(seconds=period)
 
-        # remove old radar object from global_data dictionary
-        dscfg['global_data'].pop('radar_out', None)
+        # remove old accumulation from global_data dictionary
+        dscfg['global_data'].pop('accumulator', None)
 
         # get start and stop times of new radar object
         dscfg['global_data']['starttime'], dscfg['global_data']['endtime'] = (
@@ -187,7 +177,7 @@ def process_time_avg(procstatus, dscfg, radar_list=None):
 
         # check if volume time older than starttime
         if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-            dscfg['global_data'].update({'radar_out': radar_aux})
+            dscfg['global_data'].update({'accumulator': new_acc})
 
         return new_dataset, ind_rad
 
@@ -195,21 +185,11 @@ def process_time_avg(procstatus, dscfg, radar_list=None):
     if procstatus == 2:
         if dscfg['initialized'] == 0:
             return None, None
-        if 'radar_out' not in dscfg['global_data']:
+        if 'accumulator' not in dscfg['global_data']:
             return None, None
 
-        (dscfg['global_data']['radar_out'].fields[field_name][
-            'data']) /= (
-                dscfg['global_data']['radar_out'].fields[
-                    'number_of_samples']['data'])
-        if lin_trans:
-            dscfg['global_data']['radar_out'].fields[field_name]['data'] = (
-                10.*np.ma.log10(
-                    dscfg['global_data']['radar_out'].fields[
-                        field_name]['data']))
-
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         return new_dataset, ind_rad
@@ -280,11 +260,14 @@ def process_weighted_time_avg(procstatus, dscfg, radar_list=None):
 
         field['data'] *= refl_field['data']
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.add_field(field_name, field)
         radar_aux.add_field(refl_name, refl_field)
 
+        # accumulation starting with the current volume
+        new_acc = WeightedTimeAvgAccumulator(field_name, refl_name)
+        new_acc.init(radar_aux, timeinfo=dscfg['timeinfo'])
+
         # first volume: initialize start and end time of averaging
         if dscfg['initialized'] == 0:
             start_average = 0.  # seconds from midnight
@@ -309,8 +292,8 @@ def process_weighted_time_avg(procstatus, dscfg, radar_list=None):
             return None, None
 
         dscfg['global_data']['timeinfo'] = dscfg['timeinfo']
-        # no radar object in global data: create it
-        if 'radar_out' not in dscfg['global_data']:
+        # no accumulation in global data: create it
+        if 'accumulator' not in dscfg['global_data']:
             # get start and stop times of new radar object
             (dscfg['global_data']['starttime'],
              dscfg['global_data']['endtime']) = (
@@ -320,39 +303,29 @@ def process_weighted_time_avg(procstatus, dscfg, radar_list=None):
 
             # check if volume time older than starttime
             if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-                dscfg['global_data'].update({'radar_out': radar_aux})
+                dscfg['global_data'].update({'accumulator': new_acc})
 
             return None, None
 
         # still accumulating: add field to global field
         if dscfg['timeinfo'] < dscfg['global_data']['endtime']:
-            field_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, field_name)
-            dscfg['global_data']['radar_out'].fields[field_name]['data'] += (
-                field_interp['data'].filled(fill_value=0))
-
-            refl_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, refl_name)
-            dscfg['global_data']['radar_out'].fields[refl_name]['data'] += (
-                refl_interp['data'].filled(fill_value=0))
+            dscfg['global_data']['accumulator'].update(
+                radar_aux, timeinfo=dscfg['timeinfo'])
 
             return None, None
 
         # we have reached the end of the accumulation period: do the averaging
         # and start a new object
-        dscfg['global_data']['radar_out'].fields[field_name]['data'] /= (
-            dscfg['global_data']['radar_out'].fields[refl_name]['data'])
-
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         dscfg['global_data']['starttime'] += datetime.timedelta(
             seconds=period)
         dscfg['global_data']['endtime'] += datetime.timedelta(seconds=period)
 
-        # remove old radar object from global_data dictionary
-        dscfg['global_data'].pop('radar_out', None)
+        # remove old accumulation from global_data dictionary
+        dscfg['global_data'].pop('accumulator', None)
 
         # get start and stop times of new radar object
         dscfg['global_data']['starttime'], dscfg['global_data']['endtime'] = (
@@ -362,7 +335,7 @@ def process_weighted_time_avg(procstatus, dscfg, radar_list=None):
 
         # check if volume time older than starttime
         if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-            dscfg['global_data'].update({'radar_out': radar_aux})
+            dscfg['global_data'].update({'accumulator': new_acc})
 
         return new_dataset, ind_rad
 
@@ -370,14 +343,11 @@ def process_weighted_time_avg(procstatus, dscfg, radar_list=None):
     if procstatus == 2:
         if dscfg['initialized'] == 0:
             return None, None
-        if 'radar_out' not in dscfg['global_data']:
+        if 'accumulator' not in dscfg['global_data']:
             return None, None
 
-        dscfg['global_data']['radar_out'].fields[field_name]['data'] /= (
-            dscfg['global_data']['radar_out'].fields[refl_name]['data'])
-
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         return new_dataset, ind_rad
@@ -518,10 +488,13 @@ def process_time_avg_flag(procstatus, dscfg, radar_list=None):
                     temp_ref='height_over_iso0')
                 time_avg_flag['data'][mask_fzl] += 10000
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.add_field('time_avg_flag', time_avg_flag)
 
+        # accumulation starting with the current volume
+        new_acc = RadarAccumulator(['time_avg_flag'])
+        new_acc.init(radar_aux, timeinfo=dscfg['timeinfo'])
+
         # first volume: initialize start and end time of averaging
         if dscfg['initialized'] == 0:
             start_average = 0.  # seconds from midnight
@@ -546,8 +519,8 @@ def process_time_avg_flag(procstatus, dscfg, radar_list=None):
             return None, None
 
         dscfg['global_data']['timeinfo'] = dscfg['timeinfo']
-        # no radar object in global data: create it
-        if 'radar_out' not in dscfg['global_data']:
+        # no accumulation in global data: create it
+        if 'accumulator' not in dscfg['global_data']:
             # get start and stop times of new radar object
             (dscfg['global_data']['starttime'],
              dscfg['global_data']['endtime']) = (
@@ -557,31 +530,28 @@ def process_time_avg_flag(procstatus, dscfg, radar_list=None):
 
             # check if volume time older than starttime
             if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-                dscfg['global_data'].update({'radar_out': radar_aux})
+                dscfg['global_data'].update({'accumulator': new_acc})
 
             return None, None
 
         # still accumulating: add field to global field
         if dscfg['timeinfo'] < dscfg['global_data']['endtime']:
-            flag_interp = interpol_field(
-                dscfg['global_data']['radar_out'], radar_aux, 'time_avg_flag')
-            dscfg['global_data']['radar_out'].fields[
-                'time_avg_flag']['data'] += (
-                    flag_interp['data'].filled(fill_value=0)).astype(int)
+            dscfg['global_data']['accumulator'].update(
+                radar_aux, timeinfo=dscfg['timeinfo'])
 
             return None, None
 
         # we have reached the end of the accumulation: start a new object
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         dscfg['global_data']['starttime'] += datetime.timedelta(
             seconds=period)
         dscfg['global_data']['endtime'] += datetime.timedelta(seconds=period)
 
-        # remove old radar object from global_data dictionary
-        dscfg['global_data'].pop('radar_out', None)
+        # remove old accumulation from global_data dictionary
+        dscfg['global_data'].pop('accumulator', None)
 
         # get start and stop times of new radar object
         dscfg['global_data']['starttime'], dscfg['global_data']['endtime'] = (
@@ -591,7 +561,7 @@ def process_time_avg_flag(procstatus, dscfg, radar_list=None):
 
         # check if volume time older than starttime
         if dscfg['timeinfo'] > dscfg['global_data']['starttime']:
-            dscfg['global_data'].update({'radar_out': radar_aux})
+            dscfg['global_data'].update({'accumulator': new_acc})
 
         return new_dataset, ind_rad
 
@@ -599,11 +569,11 @@ def process_time_avg_flag(procstatus, dscfg, radar_list=None):
     if procstatus == 2:
         if dscfg['initialized'] == 0:
             return None, None
-        if 'radar_out' not in dscfg['global_data']:
+        if 'accumulator' not in dscfg['global_data']:
             return None, None
 
         new_dataset = {
-            'radar_out': deepcopy(dscfg['global_data']['radar_out']),
+            'radar_out': dscfg['global_data']['accumulator'].finalize(),
             'timeinfo': dscfg['global_data']['endtime']}
 
         return new_dataset, ind_rad
@@ -749,12 +719,10 @@ def process_colocated_gates(procstatus, dscfg, radar_list=None):
         elmin=elmin, elmax=elmax, azmin=azrad2min, azmax=azrad2max,
         visib_field=visib_field, intersec_field=coloc_gates_field)
 
-    new_rad1 = deepcopy(radar1)
-    new_rad1.fields = dict()
+    new_rad1 = create_empty_radar(radar1)
     new_rad1.add_field('colocated_gates', gate_coloc_rad1_dict)
 
-    new_rad2 = deepcopy(radar2)
-    new_rad2.fields = dict()
+    new_rad2 = create_empty_radar(radar2)
     new_rad2.add_field('colocated_gates', gate_coloc_rad2_dict)
 
     coloc_rad1_dict, new_rad1.fields['colocated_gates'] = (
@@ -943,7 +911,7 @@ def process_intercomp(procstatus, dscfg, radar_list=None):
 
         # keep only indices of valid gates
         val1_vec = rad1_field[rad1_ray_ind, rad1_rng_ind]
-        val2_vec = rad2_field[rad1_ray_ind, rad1_rng_ind]
+        val2_vec = rad2_field[rad2_ray_ind, rad2_rng_ind]
 
         mask_val1 = np.ma.getmaskarray(val1_vec)
         mask_val2 = np.ma.getmaskarray(val2_vec)
@@ -955,63 +923,34 @@ def process_intercomp(procstatus, dscfg, radar_list=None):
         rad2_ray_ind = rad2_ray_ind[isvalid]
         rad2_rng_ind = rad2_rng_ind[isvalid]
 
-        # if averaging required loop over valid gates and average
+        # if averaging required average all valid gates at once. Only
+        # windows fully within range and without masked gates are kept
         if avg_rad1:
-            ngates_valid = len(rad1_ray_ind)
-            val1_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            is_valid_avg = np.zeros(ngates_valid, dtype=bool)
-            for i in range(ngates_valid):
-                if rad1_rng_ind[i]+avg_rad_lim[1] >= radar1.ngates:
-                    continue
-                if rad1_rng_ind[i]+avg_rad_lim[0] < 0:
-                    continue
-                ind_rng = list(range(rad1_rng_ind[i]+avg_rad_lim[0],
-                                     rad1_rng_ind[i]+avg_rad_lim[1]+1))
-
-                if np.any(np.ma.getmaskarray(
-                        rad1_field[rad1_ray_ind[i], ind_rng])):
-                    continue
-
-                val1_vec[i] = np.ma.asarray(np.ma.mean(
-                    rad1_field[rad1_ray_ind[i], ind_rng]))
-
-                is_valid_avg[i] = True
+            val1_window, is_valid_avg = get_range_bins_window(
+                rad1_field, rad1_ray_ind, rad1_rng_ind, avg_rad_lim)
+            is_valid_avg[np.any(
+                np.ma.getmaskarray(val1_window), axis=1)] = False
 
             rad1_ray_ind = rad1_ray_ind[is_valid_avg]
             rad1_rng_ind = rad1_rng_ind[is_valid_avg]
             rad2_ray_ind = rad2_ray_ind[is_valid_avg]
             rad2_rng_ind = rad2_rng_ind[is_valid_avg]
 
-            val1_vec = val1_vec[is_valid_avg]
+            val1_vec = np.ma.mean(val1_window[is_valid_avg], axis=1)
             val2_vec = rad2_field[rad2_ray_ind, rad2_rng_ind]
 
         elif avg_rad2:
-            ngates_valid = len(rad2_ray_ind)
-            val2_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            is_valid_avg = np.zeros(ngates_valid, dtype=bool)
-            for i in range(ngates_valid):
-                if rad2_rng_ind[i]+avg_rad_lim[1] >= radar2.ngates:
-                    continue
-                if rad2_rng_ind[i]+avg_rad_lim[0] < 0:
-                    continue
-                ind_rng = list(range(rad2_rng_ind[i]+avg_rad_lim[0],
-                                     rad2_rng_ind[i]+avg_rad_lim[1]+1))
-
-                if np.any(np.ma.getmaskarray(
-                        rad2_field[rad2_ray_ind[i], ind_rng])):
-                    continue
-
-                val2_vec[i] = np.ma.asarray(np.ma.mean(
-                    rad2_field[rad2_ray_ind[i], ind_rng]))
-
-                is_valid_avg[i] = True
+            val2_window, is_valid_avg = get_range_bins_window(
+                rad2_field, rad2_ray_ind, rad2_rng_ind, avg_rad_lim)
+            is_valid_avg[np.any(
+                np.ma.getmaskarray(val2_window), axis=1)] = False
 
             rad1_ray_ind = rad1_ray_ind[is_valid_avg]
             rad1_rng_ind = rad1_rng_ind[is_valid_avg]
             rad2_ray_ind = rad2_ray_ind[is_valid_avg]
             rad2_rng_ind = rad2_rng_ind[is_valid_avg]
 
-            val2_vec = val2_vec[is_valid_avg]
+            val2_vec = np.ma.mean(val2_window[is_valid_avg], axis=1)
             val1_vec = rad1_field[rad1_ray_ind, rad1_rng_ind]
         else:
             val1_vec = val1_vec[isvalid]
@@ -1304,107 +1243,51 @@ def process_intercomp_time_avg(procstatus, dscfg, radar_list=None):
         rad2_ray_ind = rad2_ray_ind[isvalid]
         rad2_rng_ind = rad2_rng_ind[isvalid]
 
-        # if averaging required loop over valid gates and average
-        # only if all gates valid
+        # if averaging required average all valid gates at once. Only
+        # windows fully within range and without masked gates are kept
         if avg_rad1:
-            ngates_valid = len(rad1_ray_ind)
-            refl1_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            phidp1_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            flag1_vec = np.ma.masked_all(ngates_valid, dtype=int)
-            is_valid_avg = np.zeros(ngates_valid, dtype=bool)
-            for i in range(ngates_valid):
-                if rad1_rng_ind[i]+avg_rad_lim[1] >= radar1.ngates:
-                    continue
-                if rad1_rng_ind[i]+avg_rad_lim[0] < 0:
-                    continue
-                ind_rng = list(range(rad1_rng_ind[i]+avg_rad_lim[0],
-                                     rad1_rng_ind[i]+avg_rad_lim[1]+1))
-
-                if np.any(np.ma.getmaskarray(
-                        refl1[rad1_ray_ind[i], ind_rng])):
-                    continue
-                if np.any(np.ma.getmaskarray(
-                        phidp1[rad1_ray_ind[i], ind_rng])):
-                    continue
-
-                refl1_vec[i] = np.ma.asarray(np.ma.mean(
-                    refl1[rad1_ray_ind[i], ind_rng]))
-                phidp1_vec[i] = np.ma.asarray(np.ma.mean(
-                    phidp1[rad1_ray_ind[i], ind_rng]))
-
-                rad1_flag = flag1[rad1_ray_ind[i], ind_rng]
-
-                rad1_excess_phi = rad1_flag % 100
-                rad1_clt = ((rad1_flag-rad1_excess_phi) % 10000) / 100
-                rad1_prec = (
-                    ((rad1_flag-rad1_clt*100-rad1_excess_phi) % 1000000) /
-                    10000)
-
-                flag1_vec[i] = int(
-                    10000*np.max(rad1_prec)+100*np.max(rad1_clt) +
-                    np.max(rad1_excess_phi))
-                is_valid_avg[i] = True
+            refl1_window, is_valid_avg = get_range_bins_window(
+                refl1, rad1_ray_ind, rad1_rng_ind, avg_rad_lim)
+            phidp1_window, _ = get_range_bins_window(
+                phidp1, rad1_ray_ind, rad1_rng_ind, avg_rad_lim)
+            flag1_window, _ = get_range_bins_window(
+                flag1, rad1_ray_ind, rad1_rng_ind, avg_rad_lim)
+            is_valid_avg[np.logical_or(
+                np.any(np.ma.getmaskarray(refl1_window), axis=1),
+                np.any(np.ma.getmaskarray(phidp1_window), axis=1))] = False
 
             rad1_ray_ind = rad1_ray_ind[is_valid_avg]
             rad1_rng_ind = rad1_rng_ind[is_valid_avg]
             rad2_ray_ind = rad2_ray_ind[is_valid_avg]
             rad2_rng_ind = rad2_rng_ind[is_valid_avg]
 
-            refl1_vec = refl1_vec[is_valid_avg]
-            phidp1_vec = phidp1_vec[is_valid_avg]
-            flag1_vec = flag1_vec[is_valid_avg]
+            refl1_vec = np.ma.mean(refl1_window[is_valid_avg], axis=1)
+            phidp1_vec = np.ma.mean(phidp1_window[is_valid_avg], axis=1)
+            flag1_vec = _get_max_flag(flag1_window[is_valid_avg])
 
             refl2_vec = refl2[rad2_ray_ind, rad2_rng_ind]
             phidp2_vec = phidp2[rad2_ray_ind, rad2_rng_ind]
             flag2_vec = flag2[rad2_ray_ind, rad2_rng_ind]
 
         elif avg_rad2:
-            ngates_valid = len(rad2_ray_ind)
-            refl2_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            phidp2_vec = np.ma.masked_all(ngates_valid, dtype=float)
-            flag2_vec = np.ma.masked_all(ngates_valid, dtype=int)
-            is_valid_avg = np.zeros(ngates_valid, dtype=bool)
-            for i in range(ngates_valid):
-                if rad2_rng_ind[i]+avg_rad_lim[1] >= radar2.ngates:
-                    continue
-                if rad2_rng_ind[i]+avg_rad_lim[0] < 0:
-                    continue
-                ind_rng = list(range(rad2_rng_ind[i]+avg_rad_lim[0],
-                                     rad2_rng_ind[i]+avg_rad_lim[1]+1))
-
-                if np.any(np.ma.getmaskarray(
-                        refl2[rad2_ray_ind[i], ind_rng])):
-                    continue
-                if np.any(np.ma.getmaskarray(
-                        phidp2[rad2_ray_ind[i], ind_rng])):
-                    continue
-
-                refl2_vec[i] = np.ma.asarray(np.ma.mean(
-                    refl2[rad2_ray_ind[i], ind_rng]))
-                phidp2_vec[i] = np.ma.asarray(np.ma.mean(
-                    phidp2[rad2_ray_ind[i], ind_rng]))
-
-                rad2_flag = flag2[rad2_ray_ind[i], ind_rng]
-
-                rad2_excess_phi = rad2_flag % 100
-                rad2_clt = ((rad2_flag-rad2_excess_phi) % 10000) / 100
-                rad2_prec = (
-                    ((rad2_flag-rad2_clt*100-rad2_excess_phi) % 1000000) /
-                    10000)
-
-                flag2_vec[i] = int(
-                    10000*np.max(rad2_prec)+100*np.max(rad2_clt) +
-                    np.max(rad2_excess_phi))
-                is_valid_avg[i] = True
+            refl2_window, is_valid_avg = get_range_bins_window(
+                refl2, rad2_ray_ind, rad2_rng_ind, avg_rad_lim)
+            phidp2_window, _ = get_range_bins_window(
+                phidp2, rad2_ray_ind, rad2_rng_ind, avg_rad_lim)
+            flag2_window, _ = get_range_bins_window(
+                flag2, rad2_ray_ind, rad2_rng_ind, avg_rad_lim)
+            is_valid_avg[np.logical_or(
+                np.any(np.ma.getmaskarray(refl2_window), axis=1),
+                np.any(np.ma.getmaskarray(phidp2_window), axis=1))] = False
 
             rad1_ray_ind = rad1_ray_ind[is_valid_avg]
             rad1_rng_ind = rad1_rng_ind[is_valid_avg]
             rad2_ray_ind = rad2_ray_ind[is_valid_avg]
             rad2_rng_ind = rad2_rng_ind[is_valid_avg]
 
-            refl2_vec = refl2_vec[is_valid_avg]
-            phidp2_vec = phidp2_vec[is_valid_avg]
-            flag2_vec = flag2_vec[is_valid_avg]
+            refl2_vec = np.ma.mean(refl2_window[is_valid_avg], axis=1)
+            phidp2_vec = np.ma.mean(phidp2_window[is_valid_avg], axis=1)
+            flag2_vec = _get_max_flag(flag2_window[is_valid_avg])
 
             refl1_vec = refl1[rad1_ray_ind, rad1_rng_ind]
             phidp1_vec = phidp1[rad1_ray_ind, rad1_rng_ind]
@@ -1525,3 +1408,29 @@ def process_intercomp_time_avg(procstatus, dscfg, radar_list=None):
                        'final': True}
 
         return new_dataset, None
+
+
+def _get_max_flag(flag_window):
+    """
+    Combines the time average flags of the gates in a range window. The
+    resulting flag contains the maximum number of samples with excess PhiDP,
+    clutter and no precipitation found in any gate of the window
+
+    Parameters
+    ----------
+    flag_window : 2D array of ints
+        the flags of the gates in each window (ngates x nbins)
+
+    Returns
+    -------
+    flag_vec : array of ints
+        the combined flag of each window
+
+    """
+    excess_phi = flag_window % 100
+    clt = ((flag_window-excess_phi) % 10000) / 100
+    prec = ((flag_window-clt*100-excess_phi) % 1000000) / 10000
+
+    return (
+        10000*np.max(prec, axis=1)+100*np.max(clt, axis=1) +
+        np.max(excess_phi, axis=1)).astype(int)
@@ -25,9 +25,11 @@ import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
 from ..io.read_data_other import read_selfconsistency
-from ..io.read_data_radar import interpol_field
 
 from ..util.radar_utils import get_histogram_bins
+from ..util.radar_utils import create_empty_radar
+
+from .accumulators import RadarAccumulator
 
 
 def process_selfconsistency_kdp_phidp(procstatus, dscfg, radar_list=None):
@@ -201,8 +203,7 @@ def process_selfconsistency_kdp_phidp(procstatus, dscfg, radar_list=None):
             phidpsim_field=phidpsim_field, temp_ref=temp_ref)
 
         # prepare for exit
-        new_dataset = {'radar_out': deepcopy(radar)}
-        new_dataset['radar_out'].fields = dict()
+        new_dataset = {'radar_out': create_empty_radar(radar)}
 
         new_dataset['radar_out'].add_field(kdpsim_field, kdpsim)
         new_dataset['radar_out'].add_field(phidpsim_field, phidpsim)
@@ -396,8 +397,7 @@ def process_selfconsistency_bias(procstatus, dscfg, radar_list=None):
             iso0_field=iso0, rhohv_field=rhohv, temp_ref=temp_ref)
 
         # prepare for exit
-        new_dataset = {'radar_out': deepcopy(radar)}
-        new_dataset['radar_out'].fields = dict()
+        new_dataset = {'radar_out': create_empty_radar(radar)}
 
         new_dataset['radar_out'].add_field('reflectivity_bias', refl_bias)
 
@@ -477,8 +477,7 @@ def process_estimate_phidp0(procstatus, dscfg, radar_list=None):
         refl_field=refl_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].add_field('system_differential_phase', phidp0)
     new_dataset['radar_out'].add_field(
@@ -620,8 +619,7 @@ def process_rhohv_rain(procstatus, dscfg, radar_list=None):
         refl_field=refl_field, temp_ref=temp_ref)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(
         'cross_correlation_ratio_in_rain', rhohv_rain)
 
@@ -804,8 +802,7 @@ def process_zdr_precip(procstatus, dscfg, radar_list=None):
         temp_ref=temp_ref)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].add_field(
         'differential_reflectivity_in_precipitation', zdr_precip)
@@ -956,8 +953,7 @@ def process_zdr_snow(procstatus, dscfg, radar_list=None):
         kdp_field=kdp_field, refl_field=refl_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].add_field(
         'differential_reflectivity_in_snow', zdr_snow)
@@ -1019,8 +1015,7 @@ def process_monitoring(procstatus, dscfg, radar_list=None):
         step = bin_edges[1]-bin_edges[0]
         bin_centers = bin_edges[:-1]+step/2.
 
-        radar_aux = deepcopy(radar)
-        radar_aux.fields = dict()
+        radar_aux = create_empty_radar(radar)
         radar_aux.range['data'] = bin_centers
         radar_aux.ngates = nbins
 
@@ -1046,15 +1041,13 @@ def process_monitoring(procstatus, dscfg, radar_list=None):
 
         # keep histogram in Memory or add to existing histogram
         if dscfg['initialized'] == 0:
-            dscfg['global_data'] = {'hist_obj': radar_aux,
-                                    'timeinfo': start_time}
+            acc = RadarAccumulator([field_name], fill_value=0)
+            acc.init(radar_aux, timeinfo=start_time)
+            dscfg['global_data'] = {'accumulator': acc}
             dscfg['initialized'] = 1
         else:
-            field_interp = interpol_field(
-                dscfg['global_data']['hist_obj'], radar_aux, field_name,
-                fill_value=0)
-            dscfg['global_data']['hist_obj'].fields[field_name]['data'] += (
-                field_interp['data'].filled(fill_value=0)).astype('int64')
+            dscfg['global_data']['accumulator'].update(
+                radar_aux, timeinfo=start_time)
 
         #    dscfg['global_data']['timeinfo'] = dscfg['timeinfo']
 
@@ -1075,9 +1068,11 @@ def process_monitoring(procstatus, dscfg, radar_list=None):
             break
         ind_rad = int(radarnr[5:8])-1
 
+        acc = dscfg['global_data']['accumulator']
+
         dataset = dict()
-        dataset.update({'hist_obj': dscfg['global_data']['hist_obj']})
+        dataset.update({'hist_obj': acc.finalize()})
         dataset.update({'hist_type': 'cumulative'})
-        dataset.update({'timeinfo': dscfg['global_data']['timeinfo']})
+        dataset.update({'timeinfo': acc.starttime})
 
         return dataset, ind_rad
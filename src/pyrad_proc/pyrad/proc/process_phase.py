@@ -30,6 +30,8 @@ import numpy as np
 import pyart
 
 from ..io.io_aux import get_datatype_fields
+from ..util.radar_utils import create_empty_radar
+from .ray_chunks import apply_ray_chunked
 
 
 def process_correct_phidp0(procstatus, dscfg, radar_list=None):
@@ -56,6 +58,8 @@ def process_correct_phidp0(procstatus, dscfg, radar_list=None):
             The minimum reflectivity [dBZ]
         Zmax : float. Dataset keyword
             The maximum reflectivity [dBZ]
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -106,14 +110,17 @@ def process_correct_phidp0(procstatus, dscfg, radar_list=None):
     else:
         phidp_field = 'corrected_'+psidp_field
 
-    phidp = pyart.correct.correct_sys_phase(
-        radar, ind_rmin=ind_rmin, ind_rmax=ind_rmax, min_rcons=min_rcons,
-        zmin=dscfg['Zmin'], zmax=dscfg['Zmax'], psidp_field=psidp_field,
-        refl_field=refl_field, phidp_field=phidp_field)
+    phidp = apply_ray_chunked(
+        pyart.correct.correct_sys_phase, radar, kwargs={
+            'ind_rmin': ind_rmin, 'ind_rmax': ind_rmax,
+            'min_rcons': min_rcons, 'zmin': dscfg['Zmin'],
+            'zmax': dscfg['Zmax'], 'psidp_field': psidp_field,
+            'refl_field': refl_field, 'phidp_field': phidp_field},
+        nchunks=dscfg.get('ray_chunks', 1),
+        field_names=[psidp_field, refl_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(phidp_field, phidp)
 
     return new_dataset, ind_rad
@@ -145,6 +152,8 @@ def process_smooth_phidp_single_window(procstatus, dscfg, radar_list=None):
             The minimum reflectivity [dBZ]
         Zmax : float. Dataset keyword
             The maximum reflectivity [dBZ]
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -197,15 +206,18 @@ def process_smooth_phidp_single_window(procstatus, dscfg, radar_list=None):
     else:
         phidp_field = 'corrected_'+psidp_field
 
-    phidp = pyart.correct.smooth_phidp_single_window(
-        radar, ind_rmin=ind_rmin, ind_rmax=ind_rmax, min_rcons=min_rcons,
-        zmin=dscfg['Zmin'], zmax=dscfg['Zmax'], wind_len=wind_len,
-        min_valid=min_valid, psidp_field=psidp_field, refl_field=refl_field,
-        phidp_field=phidp_field)
+    phidp = apply_ray_chunked(
+        pyart.correct.smooth_phidp_single_window, radar, kwargs={
+            'ind_rmin': ind_rmin, 'ind_rmax': ind_rmax,
+            'min_rcons': min_rcons, 'zmin': dscfg['Zmin'],
+            'zmax': dscfg['Zmax'], 'wind_len': wind_len,
+            'min_valid': min_valid, 'psidp_field': psidp_field,
+            'refl_field': refl_field, 'phidp_field': phidp_field},
+        nchunks=dscfg.get('ray_chunks', 1),
+        field_names=[psidp_field, refl_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(phidp_field, phidp)
 
     return new_dataset, ind_rad
@@ -241,6 +253,8 @@ def process_smooth_phidp_double_window(procstatus, dscfg, radar_list=None):
             The maximum reflectivity [dBZ]
         Zthr : float. Dataset keyword
             The threshold defining wich smoothed data to used [dBZ]
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -295,16 +309,20 @@ def process_smooth_phidp_double_window(procstatus, dscfg, radar_list=None):
     else:
         phidp_field = 'corrected_'+psidp_field
 
-    phidp = pyart.correct.smooth_phidp_double_window(
-        radar, ind_rmin=ind_rmin, ind_rmax=ind_rmax, min_rcons=min_rcons,
-        zmin=dscfg['Zmin'], zmax=dscfg['Zmax'], swind_len=swind_len,
-        smin_valid=smin_valid, lwind_len=lwind_len, lmin_valid=lmin_valid,
-        zthr=dscfg['Zthr'], psidp_field=psidp_field, refl_field=refl_field,
-        phidp_field=phidp_field)
+    phidp = apply_ray_chunked(
+        pyart.correct.smooth_phidp_double_window, radar, kwargs={
+            'ind_rmin': ind_rmin, 'ind_rmax': ind_rmax,
+            'min_rcons': min_rcons, 'zmin': dscfg['Zmin'],
+            'zmax': dscfg['Zmax'], 'swind_len': swind_len,
+            'smin_valid': smin_valid, 'lwind_len': lwind_len,
+            'lmin_valid': lmin_valid, 'zthr': dscfg['Zthr'],
+            'psidp_field': psidp_field, 'refl_field': refl_field,
+            'phidp_field': phidp_field},
+        nchunks=dscfg.get('ray_chunks', 1),
+        field_names=[psidp_field, refl_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(phidp_field, phidp)
 
     return new_dataset, ind_rad
@@ -468,8 +486,7 @@ def process_phidp_kdp_Maesaka(procstatus, dscfg, radar_list=None):
     phidpf['data'] = np.ma.masked_where(mask, phidpf['data'])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar_aux)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar_aux)}
     new_dataset['radar_out'].add_field(phidp_field, phidpf)
     new_dataset['radar_out'].add_field(kdp_field, kdp)
 
@@ -495,6 +512,8 @@ def process_phidp_kdp_lp(procstatus, dscfg, radar_list=None):
             The freezing level height [m]. Default 2000.
         ml_thickness : float. Dataset keyword
             The melting layer thickness in meters. Default 700.
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -612,21 +631,25 @@ def process_phidp_kdp_lp(procstatus, dscfg, radar_list=None):
     phidp_field = 'corrected_differential_phase'
     kdp_field = 'corrected_specific_differential_phase'
 
-    phidp, kdp = pyart.correct.phase_proc_lp(
-        radar_aux, 0, debug=False, self_const=60000.0,
-        low_z=10.0, high_z=53.0, min_phidp=0.01, min_ncp=10.,
-        min_rhv=0.6, fzl=4000.0, sys_phase=0.0,
-        overide_sys_phase=True, nowrap=None, really_verbose=False,
-        LP_solver=LP_solver, refl_field=refl_field, ncp_field=snr_field,
-        rhv_field=rhv_field, phidp_field=psidp_field, kdp_field=kdp_field,
-        unf_field=phidp_field, window_len=35, proc=1)
+    phidp, kdp = apply_ray_chunked(
+        pyart.correct.phase_proc_lp, radar_aux, args=(0, ), kwargs={
+            'debug': False, 'self_const': 60000.0, 'low_z': 10.0,
+            'high_z': 53.0, 'min_phidp': 0.01, 'min_ncp': 10.,
+            'min_rhv': 0.6, 'fzl': 4000.0, 'sys_phase': 0.0,
+            'overide_sys_phase': True, 'nowrap': None,
+            'really_verbose': False, 'LP_solver': LP_solver,
+            'refl_field': refl_field, 'ncp_field': snr_field,
+            'rhv_field': rhv_field, 'phidp_field': psidp_field,
+            'kdp_field': kdp_field, 'unf_field': phidp_field,
+            'window_len': 35, 'proc': 1},
+        nchunks=dscfg.get('ray_chunks', 1),
+        field_names=[psidp_field, refl_field, snr_field, rhv_field])
 
     kdp['data'] = np.ma.masked_where(mask, kdp['data'])
     phidp['data'] = np.ma.masked_where(mask, phidp['data'])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(phidp_field, phidp)
     new_dataset['radar_out'].add_field(kdp_field, kdp)
 
@@ -651,6 +674,8 @@ def process_kdp_leastsquare_single_window(procstatus, dscfg, radar_list=None):
             The length of the segment for the least square method [m]
         vectorize : bool. Dataset keyword
             Whether to vectorize the KDP processing. Default false
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -691,13 +716,15 @@ def process_kdp_leastsquare_single_window(procstatus, dscfg, radar_list=None):
     kdp_field = 'corrected_specific_differential_phase'
     vectorize = dscfg.get('vectorize', False)
 
-    kdp = pyart.retrieve.kdp_leastsquare_single_window(
-        radar, wind_len=wind_len, min_valid=min_valid, phidp_field=phidp_field,
-        kdp_field=kdp_field, vectorize=vectorize)
+    kdp = apply_ray_chunked(
+        pyart.retrieve.kdp_leastsquare_single_window, radar, kwargs={
+            'wind_len': wind_len, 'min_valid': min_valid,
+            'phidp_field': phidp_field, 'kdp_field': kdp_field,
+            'vectorize': vectorize},
+        nchunks=dscfg.get('ray_chunks', 1), field_names=[phidp_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(kdp_field, kdp)
 
     return new_dataset, ind_rad
@@ -725,6 +752,8 @@ def process_kdp_leastsquare_double_window(procstatus, dscfg, radar_list=None):
             The threshold defining which estimated data to use [dBZ]
         vectorize : Bool. Dataset keyword
             Whether to vectorize the KDP processing. Default false
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -772,15 +801,18 @@ def process_kdp_leastsquare_double_window(procstatus, dscfg, radar_list=None):
 
     kdp_field = 'corrected_specific_differential_phase'
 
-    kdp = pyart.retrieve.kdp_leastsquare_double_window(
-        radar, swind_len=swind_len, smin_valid=smin_valid,
-        lwind_len=lwind_len, lmin_valid=lmin_valid, zthr=dscfg['Zthr'],
-        phidp_field=phidp_field, refl_field=refl_field, kdp_field=kdp_field,
-        vectorize=vectorize)
+    kdp = apply_ray_chunked(
+        pyart.retrieve.kdp_leastsquare_double_window, radar, kwargs={
+            'swind_len': swind_len, 'smin_valid': smin_valid,
+            'lwind_len': lwind_len, 'lmin_valid': lmin_valid,
+            'zthr': dscfg['Zthr'], 'phidp_field': phidp_field,
+            'refl_field': refl_field, 'kdp_field': kdp_field,
+            'vectorize': vectorize},
+        nchunks=dscfg.get('ray_chunks', 1),
+        field_names=[phidp_field, refl_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(kdp_field, kdp)
 
     return new_dataset, ind_rad
@@ -814,6 +846,8 @@ def process_phidp_kdp_Vulpiani(procstatus, dscfg, radar_list=None):
         get_phidp : boolean. Datset keyword
             if set the PhiDP computed by integrating the resultant KDP is
             added to the radar field
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -868,6 +902,10 @@ def process_phidp_kdp_Vulpiani(procstatus, dscfg, radar_list=None):
     parallel = 1
     if 'parallel' in dscfg:
         parallel = dscfg['parallel']
+    ray_chunks = dscfg.get('ray_chunks', 1)
+    if ray_chunks > 1:
+        # the blocks of rays are already processed in parallel
+        parallel = 0
 
     # get PhiDP computed from KDP?
     get_phidp = 0
@@ -893,15 +931,18 @@ def process_phidp_kdp_Vulpiani(procstatus, dscfg, radar_list=None):
     kdp_field = 'corrected_specific_differential_phase'
     phidpr_field = 'corrected_differential_phase'
 
-    kdp_dict, phidpr_dict = pyart.retrieve.kdp_vulpiani(
-        radar, gatefilter=None, fill_value=None, psidp_field=phidp_field,
-        kdp_field=kdp_field, phidp_field=phidpr_field, band=band,
-        windsize=wind_len, n_iter=n_iter, interp=interp,
-        prefilter_psidp=False, filter_opt=None, parallel=parallel)
+    kdp_dict, phidpr_dict = apply_ray_chunked(
+        pyart.retrieve.kdp_vulpiani, radar, kwargs={
+            'gatefilter': None, 'fill_value': None,
+            'psidp_field': phidp_field, 'kdp_field': kdp_field,
+            'phidp_field': phidpr_field, 'band': band,
+            'windsize': wind_len, 'n_iter': n_iter, 'interp': interp,
+            'prefilter_psidp': False, 'filter_opt': None,
+            'parallel': parallel},
+        nchunks=ray_chunks, field_names=[phidp_field])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(kdp_field, kdp_dict)
     if get_phidp:
         new_dataset['radar_out'].add_field(phidpr_field, phidpr_dict)
@@ -993,8 +1034,7 @@ def process_phidp_kdp_Kalman(procstatus, dscfg, radar_list=None):
         pcov=0, prefilter_psidp=False, filter_opt=None, parallel=parallel)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(kdp_field, kdp_dict)
     if get_phidp:
         new_dataset['radar_out'].add_field(phidpr_field, phidpr_dict)
@@ -1024,6 +1064,8 @@ def process_attenuation(procstatus, dscfg, radar_list=None):
             The default freezing level height. It will be used if no
             temperature field name is specified or the temperature field is
             not in the radar object. Default 2000.
+        ray_chunks : int. Dataset keyword
+            The number of blocks of rays processed in parallel. Default 1
     radar_list : list of Radar objects
         Optional. list of radar objects
 
@@ -1107,27 +1149,38 @@ def process_attenuation(procstatus, dscfg, radar_list=None):
             'Unknown attenuation correction method. ' +
             'Must be one of the following: [ZPhi, Philin]')
 
+    field_names = [refl, phidp, zdr]
+    if temp_ref == 'temperature':
+        field_names.append(temp)
+    elif temp_ref == 'height_over_iso0':
+        field_names.append(iso0)
+
     if att_method == 'ZPhi':
-        spec_at, pia, cor_z, spec_diff_at, pida, cor_zdr = (
-            pyart.correct.calculate_attenuation_zphi(
-                radar, doc=15, fzl=fzl, smooth_window_len=0, a_coef=None,
-                beta=None, c=None, d=None, refl_field=refl, phidp_field=phidp,
-                zdr_field=zdr, temp_field=temp, iso0_field=iso0,
-                spec_at_field=None, pia_field=None, corr_refl_field=None,
-                spec_diff_at_field=None, pida_field=None, corr_zdr_field=None,
-                temp_ref=temp_ref))
+        spec_at, pia, cor_z, spec_diff_at, pida, cor_zdr = apply_ray_chunked(
+            pyart.correct.calculate_attenuation_zphi, radar, kwargs={
+                'doc': 15, 'fzl': fzl, 'smooth_window_len': 0,
+                'a_coef': None, 'beta': None, 'c': None, 'd': None,
+                'refl_field': refl, 'phidp_field': phidp, 'zdr_field': zdr,
+                'temp_field': temp, 'iso0_field': iso0,
+                'spec_at_field': None, 'pia_field': None,
+                'corr_refl_field': None, 'spec_diff_at_field': None,
+                'pida_field': None, 'corr_zdr_field': None,
+                'temp_ref': temp_ref},
+            nchunks=dscfg.get('ray_chunks', 1), field_names=field_names)
     elif att_method == 'Philin':
-        spec_at, pia, cor_z, spec_diff_at, pida, cor_zdr = (
-            pyart.correct.calculate_attenuation_philinear(
-                radar, doc=15, fzl=fzl, pia_coef=None, pida_coef=None,
-                refl_field=refl, phidp_field=phidp, zdr_field=zdr,
-                temp_field=temp, iso0_field=iso0, spec_at_field=None,
-                pia_field=None, corr_refl_field=None, spec_diff_at_field=None,
-                pida_field=None, corr_zdr_field=None, temp_ref=temp_ref))
+        spec_at, pia, cor_z, spec_diff_at, pida, cor_zdr = apply_ray_chunked(
+            pyart.correct.calculate_attenuation_philinear, radar, kwargs={
+                'doc': 15, 'fzl': fzl, 'pia_coef': None, 'pida_coef': None,
+                'refl_field': refl, 'phidp_field': phidp, 'zdr_field': zdr,
+                'temp_field': temp, 'iso0_field': iso0,
+                'spec_at_field': None, 'pia_field': None,
+                'corr_refl_field': None, 'spec_diff_at_field': None,
+                'pida_field': None, 'corr_zdr_field': None,
+                'temp_ref': temp_ref},
+            nchunks=dscfg.get('ray_chunks', 1), field_names=field_names)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
 
     new_dataset['radar_out'].add_field('specific_attenuation', spec_at)
     new_dataset['radar_out'].add_field('path_integrated_attenuation', pia)
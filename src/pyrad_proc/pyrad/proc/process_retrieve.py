@@ -16,16 +16,19 @@ Functions for retrieving new moments and products
     process_cdr
     process_rainrate
     process_bird_density
-
+    process_fused_retrieval
+    _get_fused_steps
 
 """
 
-from copy import deepcopy
 from warnings import warn
 
+import numpy as np
+
 import pyart
 
 from ..io.io_aux import get_datatype_fields, get_fieldname_pyart
+from ..util.radar_utils import create_empty_radar, subset_radar_rays
 
 
 def process_signal_power(procstatus, dscfg, radar_list=None):
@@ -134,8 +137,7 @@ def process_signal_power(procstatus, dscfg, radar_list=None):
         lradome=lradome, refl_field=refl_field, pwr_field=pwr_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(pwr_field, s_pwr)
 
     return new_dataset, ind_rad
@@ -273,8 +275,7 @@ def process_rcs_pr(procstatus, dscfg, radar_list=None):
         lradome=lradome, refl_field=refl_field, rcs_field=rcs_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(rcs_field, rcs_dict)
 
     return new_dataset, ind_rad
@@ -364,8 +365,7 @@ def process_rcs(procstatus, dscfg, radar_list=None):
         refl_field=refl_field, rcs_field=rcs_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(rcs_field, rcs_dict)
 
     return new_dataset, ind_rad
@@ -443,8 +443,7 @@ def process_vol_refl(procstatus, dscfg, radar_list=None):
         vol_refl_field=vol_refl_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(vol_refl_field, vol_refl_dict)
 
     return new_dataset, ind_rad
@@ -517,8 +516,7 @@ def process_snr(procstatus, dscfg, radar_list=None):
         snr_field=snr_field)
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(snr_field, snr)
 
     return new_dataset, ind_rad
@@ -571,8 +569,7 @@ def process_l(procstatus, dscfg, radar_list=None):
         l_field='logarithmic_cross_correlation_ratio')
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field(
         'logarithmic_cross_correlation_ratio', l)
 
@@ -637,8 +634,7 @@ def process_cdr(procstatus, dscfg, radar_list=None):
         cdr_field='circular_depolarization_ratio')
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('circular_depolarization_ratio', cdr)
 
     return new_dataset, ind_rad
@@ -915,8 +911,7 @@ def process_rainrate(procstatus, dscfg, radar_list=None):
             dscfg['RR_METHOD'])
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('radar_estimated_rain_rate', rain)
 
     return new_dataset, ind_rad
@@ -975,8 +970,199 @@ def process_bird_density(procstatus, dscfg, radar_list=None):
         bird_density_field='bird_density')
 
     # prepare for exit
-    new_dataset = {'radar_out': deepcopy(radar)}
-    new_dataset['radar_out'].fields = dict()
+    new_dataset = {'radar_out': create_empty_radar(radar)}
     new_dataset['radar_out'].add_field('bird_density', bird_density_dict)
 
     return new_dataset, ind_rad
+
+
+def process_fused_retrieval(procstatus, dscfg, radar_list=None):
+    """
+    Applies a chain of gate by gate retrievals (e.g. SNR, signal power,
+    rainfall rate) in a single pass over the volume. The volume is processed
+    in blocks of rays: all retrieval steps are applied to a block before
+    moving to the next one so that the intermediate fields only exist for
+    the current block. Only the requested output fields are kept for the
+    whole volume.
+
+    Parameters
+    ----------
+    procstatus : int
+        Processing status: 0 initializing, 1 processing volume,
+        2 post-processing
+    dscfg : dictionary of dictionaries
+        data set configuration. Accepted Configuration Keywords::
+
+        datatype : list of string. Dataset keyword
+            The input data types
+        steps : dict of dicts. Dataset keyword
+            The retrieval steps. Each step is configured as a dataset of one
+            of the following types: BIRD_DENSITY, CDR, L, PWR, RAINRATE, RCS,
+            RCS_PR, SNR, VOL_REFL. The data types of a step can be the input
+            data types or the output of a previous step and must include the
+            radar (e.g. RADAR001:dBZ). The step inherits the global keywords
+            and the keywords of the fused dataset
+        step_order : list of string. Dataset keyword
+            The names of the steps in the order in which they are applied.
+            Mandatory if there is more than one step
+        outputs : list of string. Dataset keyword
+            The data types to keep. By default the output of the last step
+        nrays_block : int. Dataset keyword
+            The number of rays processed in each block. Default 360
+    radar_list : list of Radar objects
+        Optional. list of radar objects
+
+    Returns
+    -------
+    new_dataset : dict
+        dictionary containing the output
+    ind_rad : int
+        radar index
+
+    """
+    if procstatus != 1:
+        return None, None
+
+    field_names = []
+    for datatypedescr in dscfg['datatype']:
+        radarnr, _, datatype, _, _ = get_datatype_fields(datatypedescr)
+        field_names.append(get_fieldname_pyart(datatype))
+
+    ind_rad = int(radarnr[5:8])-1
+    if radar_list[ind_rad] is None:
+        warn('No valid radar')
+        return None, None
+    radar = radar_list[ind_rad]
+
+    for field_name in field_names:
+        if field_name not in radar.fields:
+            warn('Unable to compute fused retrieval. Missing field ' +
+                 field_name)
+            return None, None
+
+    step_list = _get_fused_steps(dscfg)
+    output_fields = [
+        get_fieldname_pyart(datatype)
+        for datatype in dscfg.get('outputs', [])]
+    nrays_block = dscfg.get('nrays_block', 360)
+
+    radar_out = create_empty_radar(radar)
+    block_radar_list = [None]*len(radar_list)
+    nblocks = int(np.ceil(radar.nrays/nrays_block))
+    for ind_rays in np.array_split(np.arange(radar.nrays), nblocks):
+        block_radar = subset_radar_rays(
+            radar, ind_rays, field_names=field_names)
+        block_radar_list[ind_rad] = block_radar
+
+        for step_name, step_func, step_dscfg in step_list:
+            step_dataset, _ = step_func(
+                1, step_dscfg, radar_list=block_radar_list)
+            if step_dataset is None:
+                warn('Unable to compute fused retrieval. Step '+step_name +
+                     ' failed')
+                return None, None
+            for field_name, field_dict in (
+                    step_dataset['radar_out'].fields.items()):
+                block_radar.add_field(
+                    field_name, field_dict, replace_existing=True)
+
+        if not output_fields:
+            output_fields = list(step_dataset['radar_out'].fields.keys())
+
+        for field_name in output_fields:
+            if field_name not in block_radar.fields:
+                warn('Unable to compute fused retrieval. Output field ' +
+                     field_name+' not computed by any step')
+                return None, None
+            block_dict = block_radar.fields[field_name]
+            if field_name not in radar_out.fields:
+                field_dict = {
+                    key: value for key, value in block_dict.items()
+                    if key != 'data'}
+                field_dict['data'] = np.ma.masked_all(
+                    (radar.nrays, radar.ngates),
+                    dtype=block_dict['data'].dtype)
+                radar_out.add_field(field_name, field_dict)
+            radar_out.fields[field_name]['data'][
+                ind_rays[0]:ind_rays[-1]+1, :] = block_dict['data']
+
+    # prepare for exit
+    new_dataset = {'radar_out': radar_out}
+
+    return new_dataset, ind_rad
+
+
+def _get_fused_steps(dscfg):
+    """
+    Gets the processing function and the configuration of each step of a
+    fused retrieval
+
+    Parameters
+    ----------
+    dscfg : dict
+        the fused retrieval dataset configuration
+
+    Returns
+    -------
+    step_list : list of tuples
+        the name, the processing function and the configuration of each step
+
+    """
+    fusable_funcs = {
+        'BIRD_DENSITY': process_bird_density,
+        'CDR': process_cdr,
+        'L': process_l,
+        'PWR': process_signal_power,
+        'RAINRATE': process_rainrate,
+        'RCS': process_rcs,
+        'RCS_PR': process_rcs_pr,
+        'SNR': process_snr,
+        'VOL_REFL': process_vol_refl}
+
+    if 'steps' not in dscfg:
+        raise ValueError(
+            "ERROR: Undefined parameter 'steps' for dataset '%s'"
+            % dscfg['dsname'])
+
+    # the order of the keys of the steps dictionary is not guaranteed
+    step_order = dscfg.get('step_order', None)
+    if step_order is None:
+        if len(dscfg['steps']) > 1:
+            raise ValueError(
+                "ERROR: Undefined parameter 'step_order' for dataset '%s'"
+                % dscfg['dsname'])
+        step_order = list(dscfg['steps'].keys())
+    if isinstance(step_order, str):
+        step_order = [step_order]
+    if sorted(step_order) != sorted(dscfg['steps'].keys()):
+        raise ValueError(
+            "ERROR: Parameter 'step_order' of dataset '%s' does not list "
+            "each step once" % dscfg['dsname'])
+
+    base_dscfg = {
+        key: value for key, value in dscfg.items()
+        if key not in ('type', 'datatype', 'steps', 'step_order', 'outputs',
+                       'nrays_block', 'products')}
+
+    step_list = []
+    for step_name in step_order:
+        step_cfg = dscfg['steps'][step_name]
+        if step_cfg.get('type') not in fusable_funcs:
+            raise ValueError(
+                "ERROR: Step '%s' of dataset '%s' of type '%s' is not a gate "
+                "by gate retrieval" % (
+                    step_name, dscfg['dsname'], step_cfg.get('type')))
+        step_dscfg = dict(base_dscfg)
+        step_dscfg.update(step_cfg)
+        if isinstance(step_dscfg['datatype'], str):
+            step_dscfg['datatype'] = [step_dscfg['datatype']]
+        for datatypedescr in step_dscfg['datatype']:
+            if not datatypedescr.startswith('RADAR'):
+                raise ValueError(
+                    "ERROR: Data type '%s' of step '%s' of dataset '%s' does "
+                    "not specify the radar" % (
+                        datatypedescr, step_name, dscfg['dsname']))
+        step_list.append(
+            (step_name, fusable_funcs[step_cfg['type']], step_dscfg))
+
+    return step_list
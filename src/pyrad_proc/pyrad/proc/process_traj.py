@@ -40,6 +40,7 @@ from ..io.read_data_other import read_antenna_pattern
 
 from ..util.stat_utils import quantiles_weighted
 from ..util.radar_utils import belongs_roi_indices, find_nearest_gate
+from ..util.radar_utils import create_empty_radar
 
 
 def process_trajectory(procstatus, dscfg, radar_list=None, trajectory=None):
@@ -142,8 +143,7 @@ def process_traj_trt(procstatus, dscfg, radar_list=None, trajectory=None):
         return None, None
 
     # keep locally only field of interest in radar object
-    radar = deepcopy(radar_list[ind_rad])
-    radar.fields = dict()
+    radar = create_empty_radar(radar_list[ind_rad])
     nfields_available = 0
     for field_name in field_names:
         if field_name not in radar_list[ind_rad].fields:
@@ -172,7 +172,7 @@ def process_traj_trt(procstatus, dscfg, radar_list=None, trajectory=None):
         return None, None
 
     # prepare new radar object output
-    radar_roi = deepcopy(radar)
+    radar_roi = create_empty_radar(radar)
 
     radar_roi.range['data'] = radar.range['data'][inds_rng]
     radar_roi.ngates = inds_rng.size
@@ -219,13 +219,15 @@ def process_traj_trt(procstatus, dscfg, radar_list=None, trajectory=None):
     radar_roi.gate_y['data'][0, :] = radar.gate_y['data'][inds_ray, inds_rng]
     radar_roi.gate_z['data'][0, :] = radar.gate_z['data'][inds_ray, inds_rng]
 
-    radar_roi.fields = dict()
     for field_name in field_names:
         if field_name not in radar.fields:
             warn("Datatype '%s' not available in radar data" % field_name)
             continue
 
-        field_dict = deepcopy(radar.fields[field_name])
+        field_dict = {
+            key: deepcopy(value)
+            for key, value in radar.fields[field_name].items()
+            if key != 'data'}
         field_dict['data'] = np.ma.empty(
             (radar_roi.nrays, radar_roi.ngates), dtype=float)
         field_dict['data'][0, :] = radar.fields[field_name]['data'][inds_ray, inds_rng]
@@ -302,8 +304,7 @@ def process_traj_lightning(procstatus, dscfg, radar_list=None,
         return None, None
 
     # keep locally only field of interest in radar object
-    radar = deepcopy(radar_list[ind_rad])
-    radar.fields = dict()
+    radar = create_empty_radar(radar_list[ind_rad])
     nfields_available = 0
     for field_name in field_names:
         if field_name not in radar_list[ind_rad].fields:
@@ -540,8 +541,7 @@ def process_traj_atplane(procstatus, dscfg, radar_list=None, trajectory=None):
         return None, None
 
     # keep locally only field of interest in radar object
-    radar = deepcopy(radar_list[ind_rad])
-    radar.fields = dict()
+    radar = create_empty_radar(radar_list[ind_rad])
     nfields_available = 0
     for field_name in field_names:
         if field_name not in radar_list[ind_rad].fields:
@@ -822,8 +822,7 @@ def process_traj_antenna_pattern(procstatus, dscfg, radar_list=None,
         return None, None
 
     # keep locally only field of interest in radar object
-    radar = deepcopy(radar_list[ind_rad])
-    radar.fields = dict()
+    radar = create_empty_radar(radar_list[ind_rad])
     nfields_available = 0
     for field_name in field_names:
         if field_name not in radar_list[ind_rad].fields:
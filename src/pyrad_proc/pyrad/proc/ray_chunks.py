@@ -0,0 +1,182 @@
+"""
+pyrad.proc.ray_chunks
+=====================
+
+Parallel execution of the algorithms that process each ray independently.
+The radar volume is split into blocks of rays, the algorithm is applied to
+each block by a pool of processes and the output fields are stitched back
+together.
+
+.. autosummary::
+    :toctree: generated/
+
+    apply_ray_chunked
+    get_ray_chunks
+    _get_executor
+    _apply_to_chunk
+    _merge_ray_chunks
+
+"""
+
+from multiprocessing import current_process
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..util.radar_utils import subset_radar_rays
+
+# pool of processes reused from volume to volume
+_EXECUTOR = {'nworkers': 0, 'executor': None}
+
+
+def apply_ray_chunked(func, radar, args=(), kwargs=None, nchunks=1,
+                      field_names=None):
+    """
+    Applies an algorithm independent for each ray to blocks of rays in
+    parallel. The algorithm is called as func(radar, *args, **kwargs) and
+    must return a field dictionary or a tuple of field dictionaries with one
+    row per ray. If nchunks is smaller than 2 or the current process cannot
+    start processes the algorithm is applied to the whole volume
+
+    Parameters
+    ----------
+    func : function
+        the algorithm. It must be defined at module level
+    radar : Radar object
+        the radar object to process
+    args : tuple
+        positional arguments passed to the algorithm after the radar object
+    kwargs : dict or None
+        keyword arguments passed to the algorithm
+    nchunks : int
+        number of blocks of rays processed in parallel
+    field_names : list of str or None
+        the fields used by the algorithm. Only these fields are sent to the
+        processes. If None all fields are sent
+
+    Returns
+    -------
+    output : dict or tuple
+        the output of the algorithm for the whole volume
+
+    """
+    if kwargs is None:
+        kwargs = dict()
+
+    # daemonic processes are not allowed to have children
+    if nchunks < 2 or radar.nrays < 2 or current_process().daemon:
+        return func(radar, *args, **kwargs)
+
+    chunk_list = get_ray_chunks(radar, nchunks)
+    executor = _get_executor(len(chunk_list))
+    futures = [
+        executor.submit(
+            _apply_to_chunk, func,
+            subset_radar_rays(radar, ind_rays, field_names=field_names),
+            args, kwargs)
+        for ind_rays in chunk_list]
+
+    return _merge_ray_chunks([fut.result() for fut in futures])
+
+
+def get_ray_chunks(radar, nchunks):
+    """
+    Splits the rays of a radar volume into contiguous blocks of similar size
+
+    Parameters
+    ----------
+    radar : Radar object
+        the radar object
+    nchunks : int
+        number of blocks
+
+    Returns
+    -------
+    chunk_list : list of int arrays
+        the indices of the rays of each block
+
+    """
+    nchunks = max(1, min(nchunks, radar.nrays))
+    return np.array_split(np.arange(radar.nrays), nchunks)
+
+
+def _get_executor(nworkers):
+    """
+    Gets the pool of processes. The pool is created the first time it is
+    needed and recreated if the number of processes changes
+
+    Parameters
+    ----------
+    nworkers : int
+        number of processes
+
+    Returns
+    -------
+    executor : ProcessPoolExecutor object
+        the pool of processes
+
+    """
+    if _EXECUTOR['executor'] is None or _EXECUTOR['nworkers'] != nworkers:
+        if _EXECUTOR['executor'] is not None:
+            _EXECUTOR['executor'].shutdown(wait=True)
+        _EXECUTOR['executor'] = ProcessPoolExecutor(max_workers=nworkers)
+        _EXECUTOR['nworkers'] = nworkers
+
+    return _EXECUTOR['executor']
+
+
+def _apply_to_chunk(func, radar_chunk, args, kwargs):
+    """
+    Applies the algorithm to a block of rays in a worker process
+
+    Parameters
+    ----------
+    func : function
+        the algorithm
+    radar_chunk : Radar object
+        radar object containing the block of rays
+    args : tuple
+        positional arguments of the algorithm
+    kwargs : dict
+        keyword arguments of the algorithm
+
+    Returns
+    -------
+    output : dict or tuple
+        the output of the algorithm for the block of rays
+
+    """
+    return func(radar_chunk, *args, **kwargs)
+
+
+def _merge_ray_chunks(chunk_outputs):
+    """
+    Stitches together the outputs of the algorithm for each block of rays
+
+    Parameters
+    ----------
+    chunk_outputs : list
+        the output of each block of rays in the order of the rays
+
+    Returns
+    -------
+    output : dict or tuple
+        the output for the whole volume. The metadata of the fields is taken
+        from the first block
+
+    """
+    first_output = chunk_outputs[0]
+    if isinstance(first_output, tuple):
+        return tuple(
+            _merge_ray_chunks([output[i] for output in chunk_outputs])
+            for i in range(len(first_output)))
+
+    if isinstance(first_output, dict) and 'data' in first_output:
+        field_dict = {
+            key: value for key, value in first_output.items()
+            if key != 'data'}
+        field_dict['data'] = np.ma.concatenate(
+            [output['data'] for output in chunk_outputs], axis=0)
+        return field_dict
+
+    return first_output
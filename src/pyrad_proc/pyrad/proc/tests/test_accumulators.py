@@ -0,0 +1,185 @@
+""" Unit Tests for Pyrad's proc/accumulators.py module. """
+
+import datetime
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+import pyart
+
+from pyrad.proc import RadarAccumulator, TimeAvgAccumulator
+from pyrad.proc import OccurrenceAccumulator, load_accumulator
+
+VOLTIME = datetime.datetime(2020, 1, 1, 23, 0)
+NVOLUMES = 6
+
+
+def _make_radar(ind_vol, field_names, rays_per_sweep=36):
+    """ Radar object with random fields. Masked data every 5 gates """
+    radar = pyart.testing.make_empty_ppi_radar(20, rays_per_sweep, 1)
+    rng = np.random.RandomState(ind_vol)
+    for field_name in field_names:
+        field_dict = pyart.config.get_metadata(field_name)
+        field_dict['data'] = np.ma.masked_array(
+            rng.uniform(0., 60., (radar.nrays, radar.ngates)))
+        field_dict['data'][:, ::5] = np.ma.masked
+        radar.add_field(field_name, field_dict)
+    return radar
+
+
+def _time_avg_volume(ind_vol):
+    """ Volume prepared as in process_time_avg """
+    radar = _make_radar(ind_vol, ['reflectivity'])
+    field = radar.fields['reflectivity']
+    field['data'] = np.ma.asarray(field['data'].filled(fill_value=0.))
+    npoints_dict = pyart.config.get_metadata('number_of_samples')
+    npoints_dict['data'] = np.ma.ones((radar.nrays, radar.ngates), dtype=int)
+    radar.add_field('number_of_samples', npoints_dict)
+    return radar
+
+
+def _occurrence_volume(ind_vol):
+    """ Volume prepared as in process_occurrence """
+    radar = _make_radar(ind_vol, ['reflectivity'])
+    mask = np.ma.getmaskarray(radar.fields['reflectivity']['data'])
+    mask = np.logical_or(mask, radar.fields['reflectivity']['data'] < 30.)
+    npoints_dict = pyart.config.get_metadata('number_of_samples')
+    npoints_dict['data'] = np.ma.ones((radar.nrays, radar.ngates), dtype=int)
+    radar.add_field('number_of_samples', npoints_dict)
+    occu_dict = pyart.config.get_metadata('occurrence')
+    occu_dict['data'] = np.ma.zeros((radar.nrays, radar.ngates), dtype=int)
+    occu_dict['data'][np.logical_not(mask)] = 1
+    radar.add_field('occurrence', occu_dict)
+    return radar
+
+
+def _histogram_volume(ind_vol, rays_per_sweep=36):
+    """ Histogram of each ray prepared as in process_monitoring """
+    radar = _make_radar(
+        ind_vol, ['reflectivity'], rays_per_sweep=rays_per_sweep)
+    bin_edges = np.arange(0., 61., 5.)
+    field_dict = pyart.config.get_metadata('reflectivity')
+    field_dict['data'] = np.ma.zeros(
+        (radar.nrays, bin_edges.size-1), dtype=int)
+    for ray in range(radar.nrays):
+        field_dict['data'][ray, :], _ = np.histogram(
+            radar.fields['reflectivity']['data'][ray, :].compressed(),
+            bins=bin_edges)
+    radar.fields = dict()
+    radar.range['data'] = bin_edges[:-1]+2.5
+    radar.ngates = bin_edges.size-1
+    radar.add_field('reflectivity', field_dict)
+    return radar
+
+
+def _accumulate(acc, get_volume, ind_vols):
+    """ Accumulates the volumes as the processing functions do """
+    for ind_vol in ind_vols:
+        timeinfo = VOLTIME+datetime.timedelta(minutes=30*ind_vol)
+        acc.update(get_volume(ind_vol), timeinfo=timeinfo)
+    return acc
+
+
+def _check_merge(make_acc, get_volume):
+    """
+    Checks that two partial accumulations merged give the same output as a
+    single accumulation of all the volumes
+
+    """
+    acc_all = _accumulate(make_acc(), get_volume, range(NVOLUMES))
+    acc_day1 = _accumulate(make_acc(), get_volume, range(NVOLUMES//2))
+    acc_day2 = _accumulate(
+        make_acc(), get_volume, range(NVOLUMES//2, NVOLUMES))
+
+    acc_merged = make_acc()
+    assert acc_merged.merge(acc_day1)
+    assert acc_merged.merge(acc_day2)
+
+    assert acc_merged.nvolumes == acc_all.nvolumes
+    assert acc_merged.starttime == acc_all.starttime
+    assert acc_merged.endtime == acc_all.endtime
+
+    radar_all = acc_all.finalize()
+    radar_merged = acc_merged.finalize()
+    assert sorted(radar_merged.fields) == sorted(radar_all.fields)
+    for field_name in radar_all.fields:
+        data_all = radar_all.fields[field_name]['data']
+        data_merged = radar_merged.fields[field_name]['data']
+        assert_array_equal(
+            np.ma.getmaskarray(data_merged), np.ma.getmaskarray(data_all))
+        assert_allclose(data_merged.compressed(), data_all.compressed())
+
+
+def test_merge_time_avg():
+    _check_merge(
+        lambda: TimeAvgAccumulator('reflectivity', regular_grid=True),
+        _time_avg_volume)
+
+
+def test_merge_time_avg_interpolated():
+    _check_merge(
+        lambda: TimeAvgAccumulator('reflectivity', regular_grid=False),
+        _time_avg_volume)
+
+
+def test_merge_occurrence():
+    _check_merge(
+        lambda: OccurrenceAccumulator(regular_grid=True),
+        _occurrence_volume)
+
+
+def test_merge_occurrence_interpolated():
+    _check_merge(
+        lambda: OccurrenceAccumulator(regular_grid=False),
+        _occurrence_volume)
+
+
+def test_merge_histogram():
+    _check_merge(
+        lambda: RadarAccumulator(['reflectivity'], regular_grid=True),
+        _histogram_volume)
+
+
+def test_merge_histogram_interpolated():
+    _check_merge(
+        lambda: RadarAccumulator(['reflectivity'], fill_value=0),
+        _histogram_volume)
+
+
+def test_merge_empty():
+    acc = _accumulate(
+        OccurrenceAccumulator(), _occurrence_volume, range(NVOLUMES))
+    nvolumes = acc.nvolumes
+    assert acc.merge(OccurrenceAccumulator())
+    assert acc.nvolumes == nvolumes
+    assert OccurrenceAccumulator().finalize() is None
+
+
+def test_merge_different_nrays():
+    acc = _accumulate(
+        RadarAccumulator(['reflectivity'], regular_grid=True),
+        _histogram_volume, range(2))
+    other = RadarAccumulator(['reflectivity'], regular_grid=True)
+    other.init(_histogram_volume(2, rays_per_sweep=18))
+    assert not acc.merge(other)
+    assert acc.nvolumes == 2
+
+
+def test_dump_load(tmpdir):
+    acc = _accumulate(
+        TimeAvgAccumulator('reflectivity', lin_trans=True),
+        _time_avg_volume, range(NVOLUMES))
+    fname = acc.dump(str(tmpdir.join('time_avg.acc')))
+    acc_loaded = load_accumulator(fname)
+
+    assert isinstance(acc_loaded, TimeAvgAccumulator)
+    assert acc_loaded.lin_trans
+    assert acc_loaded.nvolumes == acc.nvolumes
+    assert acc_loaded.starttime == acc.starttime
+    assert_allclose(
+        acc_loaded.finalize().fields['reflectivity']['data'].compressed(),
+        acc.finalize().fields['reflectivity']['data'].compressed())
+
+
+def test_load_missing_file(tmpdir):
+    assert load_accumulator(str(tmpdir.join('missing.acc'))) is None
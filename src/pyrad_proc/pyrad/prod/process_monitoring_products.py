@@ -11,7 +11,6 @@ Functions for obtaining Pyrad products from monitoring datasets
 
 """
 
-from copy import deepcopy
 from warnings import warn
 import os
 
@@ -33,6 +32,7 @@ from ..graph.plots_timeseries import plot_monitoring_ts
 from ..graph.plots_aux import get_colobar_label, get_field_name
 
 from ..util.radar_utils import compute_quantiles_from_hist
+from ..util.radar_utils import create_empty_radar
 
 
 def generate_monitoring_products(dataset, prdcfg):
@@ -769,8 +769,7 @@ def generate_monitoring_products(dataset, prdcfg):
                 prdcfg['type'])
             return None
 
-        new_dataset = deepcopy(hist_obj)
-        new_dataset.fields = dict()
+        new_dataset = create_empty_radar(hist_obj)
         new_dataset.add_field(field_name, hist_obj.fields[field_name])
 
         savedir = get_save_dir(
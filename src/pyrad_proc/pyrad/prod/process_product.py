@@ -15,7 +15,6 @@ Functions for obtaining Pyrad products from the datasets
 
 """
 
-from copy import deepcopy
 from warnings import warn
 
 import numpy as np
@@ -38,6 +37,7 @@ from ..graph.plots_timeseries import plot_sun_retrieval_ts, plot_ml_ts
 
 from ..util.radar_utils import create_sun_hits_field
 from ..util.radar_utils import create_sun_retrieval_field
+from ..util.radar_utils import create_empty_radar
 
 
 def generate_occurrence_products(dataset, prdcfg):
@@ -177,8 +177,7 @@ def generate_cosmo_coord_products(dataset, prdcfg):
                 prdcfg['type'])
             return None
 
-        new_dataset = deepcopy(radar_obj)
-        new_dataset.fields = dict()
+        new_dataset = create_empty_radar(radar_obj)
         new_dataset.add_field(field_name, radar_obj.fields[field_name])
 
         savedir = prdcfg['cosmopath'][ind_rad]+'rad2cosmo1/'
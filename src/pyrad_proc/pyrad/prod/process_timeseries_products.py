@@ -11,6 +11,7 @@ Functions for obtaining Pyrad products from a time series datasets
 
 """
 
+import datetime
 from copy import deepcopy
 from warnings import warn
 
@@ -21,9 +22,9 @@ from ..io.io_aux import get_save_dir, make_filename, get_fieldname_pyart
 from ..io.io_aux import generate_field_name_str
 
 from ..io.read_data_sensor import get_sensor_data
-from ..io.read_data_other import read_timeseries
+from ..io.timeseries_buffer import get_timeseries_buffer
 
-from ..io.write_data import write_ts_polar_data, write_ts_cum
+from ..io.write_data import write_ts_cum
 
 from ..graph.plots_timeseries import plot_timeseries, plot_timeseries_comp
 from ..graph.plots_vol import plot_cappi, plot_traj
@@ -195,10 +196,12 @@ def generate_timeseries_products(dataset, prdcfg):
 
         csvfname = savedir+csvfname
 
-        write_ts_polar_data(dataset, csvfname)
+        # the CSV file is only appended. The time series is kept in memory
+        ts_buffer = get_timeseries_buffer()
+        ts_buffer.append(dataset, csvfname)
         print('saved CSV file: '+csvfname)
 
-        date, value = read_timeseries(csvfname)
+        date, value = ts_buffer.read(csvfname)
 
         if date is None:
             warn(
@@ -253,7 +256,7 @@ def generate_timeseries_products(dataset, prdcfg):
 
         csvfname = savedir+csvfname
 
-        date, value = read_timeseries(csvfname)
+        date, value = get_timeseries_buffer().read(csvfname)
 
         if date is None:
             warn(
@@ -304,7 +307,7 @@ def generate_timeseries_products(dataset, prdcfg):
 
         csvfname = savedir_ts+csvfname
 
-        radardate, radarvalue = read_timeseries(csvfname)
+        radardate, radarvalue = get_timeseries_buffer().read(csvfname)
         if radardate is None:
             warn(
                 'Unable to plot sensor comparison at point of interest. ' +
@@ -312,7 +315,8 @@ def generate_timeseries_products(dataset, prdcfg):
             return None
 
         sensordate, sensorvalue, sensortype, _ = get_sensor_data(
-            radardate[0], dataset['datatype'], prdcfg)
+            radardate[0], dataset['datatype'], prdcfg,
+            starttime=min(radardate), endtime=max(radardate))
         if sensordate is None:
             warn(
                 'Unable to plot sensor comparison at point of interest. ' +
@@ -369,7 +373,7 @@ def generate_timeseries_products(dataset, prdcfg):
 
         csvfname = savedir_ts+csvfname
 
-        radardate, radarvalue = read_timeseries(csvfname)
+        radardate, radarvalue = get_timeseries_buffer().read(csvfname)
         if radardate is None:
             warn(
                 'Unable to plot sensor comparison at point of interest. ' +
@@ -377,7 +381,8 @@ def generate_timeseries_products(dataset, prdcfg):
             return None
 
         sensordate, sensorvalue, sensortype, period2 = get_sensor_data(
-            radardate[0], dataset['datatype'], prdcfg)
+            radardate[0], dataset['datatype'], prdcfg,
+            starttime=min(radardate), endtime=max(radardate))
         if sensordate is None:
             warn(
                 'Unable to plot sensor comparison at point of interest. ' +
@@ -435,24 +440,28 @@ def generate_timeseries_products(dataset, prdcfg):
             prdcfginfo=gateinfo, timeinfo=dataset['time'],
             timeformat='%Y%m%d')[0]
 
-        radardate, radarvalue = read_timeseries(savedir_ts+csvfname)
+        radardate, radarvalue = get_timeseries_buffer().read(
+            savedir_ts+csvfname)
         if radardate is None:
             warn(
                 'Unable to compared time averaged data at POI. ' +
                 'No valid radar data')
             return None
 
+        cum_time = prdcfg.get('cum_time', 3600)
+        base_time = prdcfg.get('base_time', 0)
+
+        # the sensor data of the accumulation periods containing radar data
         sensordate, sensorvalue, sensortype, period2 = get_sensor_data(
-            radardate[0], dataset['datatype'], prdcfg)
+            radardate[0], dataset['datatype'], prdcfg,
+            starttime=min(radardate)-datetime.timedelta(seconds=cum_time),
+            endtime=max(radardate)+datetime.timedelta(seconds=cum_time))
         if sensordate is None:
             warn(
                 'Unable to compared time averaged data at POI. ' +
                 'No valid sensor data')
             return None
 
-        cum_time = prdcfg.get('cum_time', 3600)
-        base_time = prdcfg.get('base_time', 0)
-
         sensordate_cum, sensorvalue_cum, np_sensor_cum = rainfall_accumulation(
             sensordate, sensorvalue, cum_time=cum_time, base_time=base_time,
             dropnan=False)
@@ -22,6 +22,7 @@ from ..io.io_aux import get_save_dir, make_filename, get_fieldname_pyart
 
 from ..io.write_data import write_cdf, write_rhi_profile, write_field_coverage
 from ..io.write_data import write_last_state, write_histogram, write_quantiles
+from ..io.write_data import get_hdf5_compression
 
 from ..graph.plots_vol import plot_ppi, plot_ppi_map, plot_rhi, plot_cappi
 from ..graph.plots_vol import plot_bscope, plot_rhi_profile, plot_along_coord
@@ -29,6 +30,7 @@ from ..graph.plots_vol import plot_field_coverage, plot_time_range
 from ..graph.plots_vol import plot_rhi_contour, plot_ppi_contour
 from ..graph.plots_vol import plot_fixed_rng
 from ..graph.plots import plot_quantiles, plot_histogram
+from ..graph.plots_anim import add_animation_frame
 from ..graph.plots_aux import get_colobar_label, get_field_name
 
 from ..util.radar_utils import get_ROI, compute_profile_stats
@@ -36,6 +38,7 @@ from ..util.radar_utils import compute_histogram, compute_quantiles
 from ..util.radar_utils import get_data_along_rng, get_data_along_azi
 from ..util.radar_utils import get_data_along_ele
 from ..util.stat_utils import quantiles_weighted
+from ..util.radar_utils import create_empty_radar
 
 
 def generate_vol_products(dataset, prdcfg):
@@ -147,6 +150,17 @@ def generate_vol_products(dataset, prdcfg):
                 RngTol: float
                     The tolerance to match the radar range to the fixed ranges
                     Default 50.
+        'PPI_ANIMATION': Adds a PPI image as a frame of an animation. The
+            animation file is created with the first frame, named after its
+            time, and closed at the end of the processing
+            User defined parameters:
+                anglenr: float
+                    The elevation angle number
+                animformat: str
+                    The animation file format (e.g. 'gif', 'mp4'). Default
+                    'gif'
+                fps: float
+                    The number of frames per second. Default 1
         'PPI_CONTOUR': Plots a PPI countour plot
             User defined parameters:
                 contour_values: list of floats or None
@@ -334,6 +348,17 @@ def generate_vol_products(dataset, prdcfg):
                     If fixed_span is set, the minimum and maximum values of
                     the Y-axis. If None, they are obtained from the Py-ART
                     config file
+        'RHI_ANIMATION': Adds an RHI image as a frame of an animation. The
+            animation file is created with the first frame, named after its
+            time, and closed at the end of the processing
+            User defined parameters:
+                anglenr: int
+                    The azimuth angle number
+                animformat: str
+                    The animation file format (e.g. 'gif', 'mp4'). Default
+                    'gif'
+                fps: float
+                    The number of frames per second. Default 1
         'RHI_CONTOUR': Plots an RHI countour plot
             User defined parameters:
                 contour_values: list of floats or None
@@ -418,8 +443,9 @@ def generate_vol_products(dataset, prdcfg):
                     Otherwise it will be quantized and saved as binary
                 compression: str
                     For ODIM file formats, the type of compression. Can be any
-                    of the allowed compression types for hdf5 files. Default
-                    gzip
+                    of the allowed compression types for hdf5 files or one of
+                    the compressors 'lz4', 'zstd' or 'blosc' (requires
+                    package hdf5plugin). Default gzip
                 compression_opts: any
                     The compression options allowed by the hdf5. Depends on
                     the type of compression. Default 6 (The gzip compression
@@ -437,8 +463,9 @@ def generate_vol_products(dataset, prdcfg):
                     Otherwise it will be quantized and saved as binary
                 compression: str
                     For ODIM file formats, the type of compression. Can be any
-                    of the allowed compression types for hdf5 files. Default
-                    gzip
+                    of the allowed compression types for hdf5 files or one of
+                    the compressors 'lz4', 'zstd' or 'blosc' (requires
+                    package hdf5plugin). Default gzip
                 compression_opts: any
                     The compression options allowed by the hdf5. Depends on
                     the type of compression. Default 6 (The gzip compression
@@ -491,6 +518,46 @@ def generate_vol_products(dataset, prdcfg):
     if 'dssavename' in prdcfg:
         dssavedir = prdcfg['dssavename']
 
+    if prdcfg['type'] == 'PPI_ANIMATION':
+        field_name = get_fieldname_pyart(prdcfg['voltype'])
+        if field_name not in dataset['radar_out'].fields:
+            warn(
+                ' Field type ' + field_name +
+                ' not available in data set. Skipping product ' +
+                prdcfg['type'])
+            return None
+
+        el_vec = np.sort(dataset['radar_out'].fixed_angle['data'])
+        el = el_vec[prdcfg['anglenr']]
+        ind_el = np.where(dataset['radar_out'].fixed_angle['data'] == el)[0][0]
+
+        # file name used if the animation does not exist yet
+        savedir = get_save_dir(
+            prdcfg['basepath'], prdcfg['procname'], dssavedir,
+            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'], create_dir=False)
+
+        fname = savedir+make_filename(
+            'ppi_anim', prdcfg['dstype'], prdcfg['voltype'],
+            [prdcfg.get('animformat', 'gif')],
+            prdcfginfo='el'+'{:.1f}'.format(el),
+            timeinfo=prdcfg['timeinfo'])[0]
+
+        fig, _ = plot_ppi(
+            dataset['radar_out'], field_name, ind_el, prdcfg, None,
+            save_fig=False)
+
+        fname = add_animation_frame(
+            fig, (prdcfg['procname'], dssavedir, prdcfg['prdname']), fname,
+            fps=prdcfg.get('fps', 1),
+            dpi=prdcfg['ppiImageConfig'].get('dpi', 72))
+
+        if fname is None:
+            return None
+
+        print('----- frame added to '+fname)
+
+        return [fname]
+
     if prdcfg['type'] == 'PPI_IMAGE':
         field_name = get_fieldname_pyart(prdcfg['voltype'])
         if field_name not in dataset['radar_out'].fields:
@@ -804,6 +871,46 @@ def generate_vol_products(dataset, prdcfg):
 
             return None
 
+    if prdcfg['type'] == 'RHI_ANIMATION':
+        field_name = get_fieldname_pyart(prdcfg['voltype'])
+        if field_name not in dataset['radar_out'].fields:
+            warn(
+                ' Field type ' + field_name +
+                ' not available in data set. Skipping product ' +
+                prdcfg['type'])
+            return None
+
+        az_vec = np.sort(dataset['radar_out'].fixed_angle['data'])
+        az = az_vec[prdcfg['anglenr']]
+        ind_az = np.where(dataset['radar_out'].fixed_angle['data'] == az)[0][0]
+
+        # file name used if the animation does not exist yet
+        savedir = get_save_dir(
+            prdcfg['basepath'], prdcfg['procname'], dssavedir,
+            prdcfg['prdname'], timeinfo=prdcfg['timeinfo'], create_dir=False)
+
+        fname = savedir+make_filename(
+            'rhi_anim', prdcfg['dstype'], prdcfg['voltype'],
+            [prdcfg.get('animformat', 'gif')],
+            prdcfginfo='az'+'{:.1f}'.format(az),
+            timeinfo=prdcfg['timeinfo'])[0]
+
+        fig, _ = plot_rhi(
+            dataset['radar_out'], field_name, ind_az, prdcfg, None,
+            save_fig=False)
+
+        fname = add_animation_frame(
+            fig, (prdcfg['procname'], dssavedir, prdcfg['prdname']), fname,
+            fps=prdcfg.get('fps', 1),
+            dpi=prdcfg['ppiImageConfig'].get('dpi', 72))
+
+        if fname is None:
+            return None
+
+        print('----- frame added to '+fname)
+
+        return [fname]
+
     if prdcfg['type'] == 'RHI_IMAGE':
         field_name = get_fieldname_pyart(prdcfg['voltype'])
         if field_name not in dataset['radar_out'].fields:
@@ -2404,11 +2511,11 @@ def generate_vol_products(dataset, prdcfg):
 
         file_type = prdcfg.get('file_type', 'nc')
         physical = prdcfg.get('physical', True)
-        compression = prdcfg.get('compression', 'gzip')
-        compression_opts = prdcfg.get('compression_opts', 6)
+        compression, compression_opts = get_hdf5_compression(
+            prdcfg.get('compression', 'gzip'),
+            prdcfg.get('compression_opts', 6))
 
-        new_dataset = deepcopy(dataset['radar_out'])
-        new_dataset.fields = dict()
+        new_dataset = create_empty_radar(dataset['radar_out'])
         new_dataset.add_field(
             field_name, dataset['radar_out'].fields[field_name])
 
@@ -2441,8 +2548,9 @@ def generate_vol_products(dataset, prdcfg):
         file_type = prdcfg.get('file_type', 'nc')
         datatypes = prdcfg.get('datatypes', None)
         physical = prdcfg.get('physical', True)
-        compression = prdcfg.get('compression', 'gzip')
-        compression_opts = prdcfg.get('compression_opts', 6)
+        compression, compression_opts = get_hdf5_compression(
+            prdcfg.get('compression', 'gzip'),
+            prdcfg.get('compression_opts', 6))
 
         savedir = get_save_dir(
             prdcfg['basepath'], prdcfg['procname'], dssavedir,
@@ -2462,8 +2570,7 @@ def generate_vol_products(dataset, prdcfg):
 
         if file_type == 'nc':
             if field_names is not None:
-                radar_aux = deepcopy(dataset['radar_out'])
-                radar_aux.fields = dict()
+                radar_aux = create_empty_radar(dataset['radar_out'])
                 for field_name in field_names:
                     if field_name not in dataset['radar_out'].fields:
                         warn(field_name+' not in radar object')
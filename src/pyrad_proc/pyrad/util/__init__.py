@@ -21,15 +21,22 @@ Radar Utilities
     time_series_statistics
     join_time_series
     get_range_bins_to_avg
+    get_range_bins_window
     find_ray_index
+    find_ray_indices
     find_rng_index
+    find_rng_indices
     find_nearest_gate
     find_neighbour_gates
     find_colocated_indexes
     get_target_elevations
+    create_empty_radar
+    subset_radar_rays
+    convert_field_dtypes
     get_fixed_rng_data
     time_avg_range
     get_closest_solar_flux
+    compute_sun_position
     create_sun_hits_field
     create_sun_retrieval_field
     compute_quantiles
@@ -44,17 +51,32 @@ Radar Utilities
     compute_profile_stats
     compute_directional_stats
     project_to_vertical
+    compute_grid_weights
+    apply_grid_weights
 
     quantiles_weighted
+
+Sparse fields
+=============
+
+.. autosummary::
+    :toctree: generated/
+
+    SparseField
+    sparsify_radar
+    densify_radar
+    densify_dataset
 """
 
 from .radar_utils import time_avg_range, get_closest_solar_flux
+from .radar_utils import compute_sun_position
 from .radar_utils import create_sun_hits_field, create_sun_retrieval_field
 from .radar_utils import compute_histogram, compute_histogram_sweep
 from .radar_utils import compute_quantiles, compute_quantiles_sweep
 from .radar_utils import compute_quantiles_from_hist, get_range_bins_to_avg
 from .radar_utils import find_ray_index, find_rng_index, find_nearest_gate
-from .radar_utils import find_colocated_indexes
+from .radar_utils import find_colocated_indexes, get_range_bins_window
+from .radar_utils import find_ray_indices, find_rng_indices
 from .radar_utils import compute_2d_hist, compute_1d_stats, compute_2d_stats
 from .radar_utils import time_series_statistics, join_time_series
 from .radar_utils import rainfall_accumulation, get_ROI, belongs_roi_indices
@@ -62,8 +84,13 @@ from .radar_utils import compute_profile_stats, compute_directional_stats
 from .radar_utils import project_to_vertical, find_neighbour_gates
 from .radar_utils import get_target_elevations, get_data_along_rng
 from .radar_utils import get_data_along_azi, get_data_along_ele
-from .radar_utils import get_fixed_rng_data
+from .radar_utils import get_fixed_rng_data, create_empty_radar
+from .radar_utils import subset_radar_rays, convert_field_dtypes
+from .radar_utils import compute_grid_weights, apply_grid_weights
 
 from .stat_utils import quantiles_weighted
 
+from .sparse_field import SparseField, sparsify_radar, densify_radar
+from .sparse_field import densify_dataset
+
 __all__ = [s for s in dir() if not s.startswith('_')]
@@ -15,15 +15,22 @@ Miscellaneous functions dealing with radar data
     time_series_statistics
     join_time_series
     get_range_bins_to_avg
+    get_range_bins_window
     belongs_roi_indices
     find_ray_index
+    find_ray_indices
     find_rng_index
+    find_rng_indices
     find_nearest_gate
     find_neighbour_gates
     find_colocated_indexes
     get_target_elevations
+    create_empty_radar
+    subset_radar_rays
+    convert_field_dtypes
     time_avg_range
     get_closest_solar_flux
+    compute_sun_position
     get_fixed_rng_data
     create_sun_hits_field
     create_sun_retrieval_field
@@ -40,14 +47,20 @@ Miscellaneous functions dealing with radar data
     compute_profile_stats
     compute_directional_stats
     project_to_vertical
+    compute_grid_weights
+    apply_grid_weights
 
 """
 from warnings import warn
-from copy import deepcopy
+from copy import copy, deepcopy
+from collections.abc import MutableMapping
 import datetime
 
 import numpy as np
 import scipy
+from netCDF4 import date2num
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
 
 try:
     import shapely
@@ -67,6 +80,11 @@ import pyart
 
 from .stat_utils import quantiles_weighted
 
+# fields containing class labels
+CLASS_FIELD_NAMES = (
+    'radar_echo_classification', 'radar_echo_id', 'clutter_exit_code',
+    'melting_layer')
+
 
 def get_data_along_rng(radar, field_name, fix_elevations, fix_azimuths,
                        ang_tol=1., rmin=None, rmax=None):
@@ -549,6 +567,39 @@ def get_range_bins_to_avg(rad1_rng, rad2_rng):
     return avg_rad1, avg_rad2, avg_rad_lim
 
 
+def get_range_bins_window(field, ind_ray, ind_rng, avg_rad_lim):
+    """
+    Gets the data of the range window centered on each gate of a set of gates
+
+    Parameters
+    ----------
+    field : 2D masked array
+        the radar field (nrays x nrng)
+    ind_ray, ind_rng : array of ints
+        the ray and range indices of the central gates
+    avg_rad_lim : array with two elements
+        the limits of the window (relative to each central gate)
+
+    Returns
+    -------
+    window : 2D masked array
+        the field data in the window (ngates x nbins)
+    is_valid : array of bools
+        True if the whole window is within the radar range
+
+    """
+    nrng = field.shape[1]
+    offsets = np.arange(avg_rad_lim[0], avg_rad_lim[1]+1)
+
+    is_valid = np.logical_and(
+        ind_rng+avg_rad_lim[0] >= 0, ind_rng+avg_rad_lim[1] < nrng)
+
+    ind_rng_window = np.clip(ind_rng[:, np.newaxis]+offsets, 0, nrng-1)
+    window = np.ma.asarray(field)[ind_ray[:, np.newaxis], ind_rng_window]
+
+    return window, is_valid
+
+
 def belongs_roi_indices(lat, lon, roi):
     """
     Get the indices of points that belong to roi in a list of points
@@ -679,6 +730,104 @@ def find_rng_index(rng_vec, rng, rng_tol=0.):
     return ind_rng
 
 
+def find_ray_indices(ele_vec, azi_vec, ele, azi, ele_tol=0., azi_tol=0.,
+                     nearest='azi', block_size=1000):
+    """
+    Find the ray indices corresponding to a set of elevations and azimuths.
+    Vectorized version of find_ray_index
+
+    Parameters
+    ----------
+    ele_vec, azi_vec : float arrays
+        The elevation and azimuth data arrays where to look for
+    ele, azi : float arrays
+        The elevations and azimuths to search
+    ele_tol, azi_tol : floats
+        Tolerances [deg]
+    nearest : str
+        criteria to define wich ray to keep if multiple rays are within
+        tolerance. azi: nearest azimuth, ele: nearest elevation
+    block_size : int
+        maximum number of positions compared at once against all rays
+
+    Returns
+    -------
+    ind_ray : masked array of ints
+        The ray indices. Masked where no ray was found within tolerance
+
+    """
+    ele = np.asarray(ele, dtype=float)
+    azi = np.asarray(azi, dtype=float)
+    if ele.size == 0:
+        return np.ma.masked_all(0, dtype=int)
+
+    # many of the searched positions share the same ray. Search only once
+    # for each unique (ele, azi) pair
+    ang_pairs, ind_inverse = np.unique(
+        np.stack((ele, azi), axis=-1), axis=0, return_inverse=True)
+    ind_inverse = ind_inverse.reshape(-1)
+
+    # process the positions in blocks to limit the memory used by the
+    # (npositions x nrays) comparison matrices
+    ind_ray_u = np.ma.masked_all(ang_pairs.shape[0], dtype=int)
+    for ind_start in range(0, ang_pairs.shape[0], block_size):
+        ind_end = ind_start+block_size
+        ele_u = ang_pairs[ind_start:ind_end, 0, np.newaxis]
+        azi_u = ang_pairs[ind_start:ind_end, 1, np.newaxis]
+
+        is_candidate = np.logical_and(
+            np.logical_and(ele_vec <= ele_u+ele_tol, ele_vec >= ele_u-ele_tol),
+            np.logical_and(
+                azi_vec <= azi_u+azi_tol, azi_vec >= azi_u-azi_tol))
+
+        if nearest == 'azi':
+            dist = np.abs(azi_vec-azi_u)
+        else:
+            dist = np.abs(ele_vec-ele_u)
+        dist[np.logical_not(is_candidate)] = np.inf
+
+        ind_ray_u[ind_start:ind_end] = np.ma.masked_where(
+            np.logical_not(np.any(is_candidate, axis=1)),
+            np.argmin(dist, axis=1))
+
+    return ind_ray_u[ind_inverse]
+
+
+def find_rng_indices(rng_vec, rng, rng_tol=0.):
+    """
+    Find the range indices corresponding to a set of ranges. Vectorized
+    version of find_rng_index. The range data array is assumed to be sorted
+
+    Parameters
+    ----------
+    rng_vec : float array
+        The range data array where to look for
+    rng : float array
+        The ranges to search
+    rng_tol : float
+        Tolerance [m]
+
+    Returns
+    -------
+    ind_rng : masked array of ints
+        The range indices. Masked where no range bin was found within
+        tolerance
+
+    """
+    rng = np.asarray(rng, dtype=float)
+    nrng = rng_vec.size
+
+    # closest of the two neighbouring range bins
+    ind_right = np.clip(np.searchsorted(rng_vec, rng), 0, nrng-1)
+    ind_left = np.clip(ind_right-1, 0, nrng-1)
+    dist_left = np.abs(rng_vec[ind_left]-rng)
+    dist_right = np.abs(rng_vec[ind_right]-rng)
+    ind_rng = np.where(dist_left <= dist_right, ind_left, ind_right)
+    dist = np.minimum(dist_left, dist_right)
+
+    return np.ma.masked_where(dist > rng_tol, ind_rng)
+
+
 def find_ang_index(ang_vec, ang, ang_tol=0.):
     """
     Find the angle index corresponding to a particular fixed angle
@@ -829,41 +978,26 @@ def find_colocated_indexes(radar1, radar2, rad1_ele, rad1_azi, rad1_rng,
         the ray and range indexes of each radar gate
 
     """
-    ngates = len(rad1_ele)
-    ind_ray_rad1 = np.ma.masked_all(ngates, dtype=int)
-    ind_rng_rad1 = np.ma.masked_all(ngates, dtype=int)
-    ind_ray_rad2 = np.ma.masked_all(ngates, dtype=int)
-    ind_rng_rad2 = np.ma.masked_all(ngates, dtype=int)
-    for i in range(ngates):
-        ind_ray_rad1_aux = find_ray_index(
-            radar1.elevation['data'], radar1.azimuth['data'], rad1_ele[i],
-            rad1_azi[i], ele_tol=ele_tol, azi_tol=azi_tol)
-        if ind_ray_rad1_aux is None:
-            continue
-        ind_rng_rad1_aux = find_rng_index(
-            radar1.range['data'], rad1_rng[i], rng_tol=rng_tol)
-        if ind_rng_rad1_aux is None:
-            continue
+    ind_ray_rad1 = find_ray_indices(
+        radar1.elevation['data'], radar1.azimuth['data'], rad1_ele, rad1_azi,
+        ele_tol=ele_tol, azi_tol=azi_tol)
+    ind_rng_rad1 = find_rng_indices(
+        radar1.range['data'], rad1_rng, rng_tol=rng_tol)
+    ind_ray_rad2 = find_ray_indices(
+        radar2.elevation['data'], radar2.azimuth['data'], rad2_ele, rad2_azi,
+        ele_tol=ele_tol, azi_tol=azi_tol)
+    ind_rng_rad2 = find_rng_indices(
+        radar2.range['data'], rad2_rng, rng_tol=rng_tol)
 
-        ind_ray_rad2_aux = find_ray_index(
-            radar2.elevation['data'], radar2.azimuth['data'], rad2_ele[i],
-            rad2_azi[i], ele_tol=ele_tol, azi_tol=azi_tol)
-        if ind_ray_rad2_aux is None:
-            continue
-        ind_rng_rad2_aux = find_rng_index(
-            radar2.range['data'], rad2_rng[i], rng_tol=rng_tol)
-        if ind_rng_rad2_aux is None:
-            continue
-
-        ind_ray_rad1[i] = ind_ray_rad1_aux
-        ind_rng_rad1[i] = ind_rng_rad1_aux
-        ind_ray_rad2[i] = ind_ray_rad2_aux
-        ind_rng_rad2[i] = ind_rng_rad2_aux
+    # keep only the gates found in both radars
+    is_valid = np.logical_not(np.logical_or.reduce((
+        np.ma.getmaskarray(ind_ray_rad1), np.ma.getmaskarray(ind_rng_rad1),
+        np.ma.getmaskarray(ind_ray_rad2), np.ma.getmaskarray(ind_rng_rad2))))
 
-    ind_ray_rad1 = ind_ray_rad1.compressed()
-    ind_rng_rad1 = ind_rng_rad1.compressed()
-    ind_ray_rad2 = ind_ray_rad2.compressed()
-    ind_rng_rad2 = ind_rng_rad2.compressed()
+    ind_ray_rad1 = ind_ray_rad1.data[is_valid]
+    ind_rng_rad1 = ind_rng_rad1.data[is_valid]
+    ind_ray_rad2 = ind_ray_rad2.data[is_valid]
+    ind_rng_rad2 = ind_rng_rad2.data[is_valid]
 
     return ind_ray_rad1, ind_rng_rad1, ind_ray_rad2, ind_rng_rad2
 
@@ -893,6 +1027,196 @@ def get_target_elevations(radar_in):
     return target_elevations, el_tol
 
 
+def create_empty_radar(radar):
+    """
+    Creates a radar object with the same geometry and metadata as the input
+    radar but without fields. The data arrays of the input radar are shared,
+    not copied: only the dictionaries holding them are duplicated so that
+    replacing an entry in the new object does not affect the input radar.
+    This avoids the cost of a deep copy of all radar fields when only the
+    radar geometry is needed.
+
+    Parameters
+    ----------
+    radar : Radar object
+        the input radar object
+
+    Returns
+    -------
+    new_radar : Radar object
+        radar object with the same geometry as the input radar and an empty
+        fields dictionary. The geometry arrays must not be modified in place
+
+    """
+    new_radar = copy(radar)
+    for attr, value in vars(radar).items():
+        if attr == 'fields':
+            continue
+        if isinstance(value, MutableMapping):
+            # lazy load dictionaries are copied without being evaluated
+            setattr(new_radar, attr, value.copy())
+    for attr in ('instrument_parameters', 'radar_calibration'):
+        par_dict = getattr(radar, attr, None)
+        if par_dict is not None:
+            setattr(new_radar, attr, {
+                key: dict(value) for key, value in par_dict.items()})
+    new_radar.fields = dict()
+
+    return new_radar
+
+
+def subset_radar_rays(radar, ind_rays, field_names=None):
+    """
+    Creates a radar object containing only the selected rays. Sweeps without
+    any selected ray are removed
+
+    Parameters
+    ----------
+    radar : Radar object
+        the input radar object
+    ind_rays : int array
+        sorted indices of the rays to keep
+    field_names : list of str or None
+        the fields to keep. If None all fields are kept
+
+    Returns
+    -------
+    new_radar : Radar object
+        radar object containing only the selected rays
+
+    """
+    ind_rays = np.asarray(ind_rays, dtype=int)
+    if field_names is None:
+        field_names = list(radar.fields.keys())
+
+    new_radar = create_empty_radar(radar)
+    new_radar.time['data'] = radar.time['data'][ind_rays]
+    new_radar.azimuth['data'] = radar.azimuth['data'][ind_rays]
+    new_radar.elevation['data'] = radar.elevation['data'][ind_rays]
+    for attr in ('scan_rate', 'antenna_transition'):
+        attr_dict = getattr(new_radar, attr)
+        if attr_dict is not None:
+            attr_dict['data'] = attr_dict['data'][ind_rays]
+    if new_radar.instrument_parameters is not None:
+        for par_dict in new_radar.instrument_parameters.values():
+            if (np.ndim(par_dict['data']) > 0 and
+                    np.shape(par_dict['data'])[0] == radar.nrays):
+                par_dict['data'] = par_dict['data'][ind_rays]
+
+    # sweep to which each selected ray belongs
+    ray_sweep = np.searchsorted(
+        radar.sweep_end_ray_index['data'], ind_rays, side='left')
+    ind_sweeps, rays_per_sweep = np.unique(ray_sweep, return_counts=True)
+    sweep_end = np.cumsum(rays_per_sweep)-1
+    new_radar.sweep_start_ray_index['data'] = (
+        sweep_end-rays_per_sweep+1).astype('int32')
+    new_radar.sweep_end_ray_index['data'] = sweep_end.astype('int32')
+    for attr in ('sweep_number', 'sweep_mode', 'fixed_angle',
+                 'target_scan_rate', 'rays_are_indexed', 'ray_angle_res'):
+        attr_dict = getattr(new_radar, attr)
+        if attr_dict is not None:
+            attr_dict['data'] = attr_dict['data'][ind_sweeps]
+    new_radar.nrays = ind_rays.size
+    new_radar.nsweeps = ind_sweeps.size
+
+    new_radar.init_rays_per_sweep()
+    new_radar.init_gate_x_y_z()
+    new_radar.init_gate_longitude_latitude()
+    new_radar.init_gate_altitude()
+
+    for field_name in field_names:
+        if field_name not in radar.fields:
+            warn('Field '+field_name+' not available')
+            continue
+        field_dict = {
+            key: value for key, value in radar.fields[field_name].items()
+            if key != 'data'}
+        field_dict['data'] = radar.fields[field_name]['data'][ind_rays, :]
+        new_radar.add_field(field_name, field_dict)
+
+    return new_radar
+
+
+def convert_field_dtypes(radar, float_dtype=None, class_dtype=None):
+    """
+    Converts the data type of the radar fields. Floating point fields are
+    converted to float_dtype and class label fields to class_dtype. Class
+    fields with values that cannot be represented by class_dtype and other
+    fields are not converted. The field dictionaries of the converted fields
+    are replaced so the input data arrays are not modified
+
+    Parameters
+    ----------
+    radar : Radar object
+        the radar object. Modified in place
+    float_dtype : str or None
+        data type of the floating point fields (e.g. float32). If None the
+        fields are not converted
+    class_dtype : str or None
+        data type of the class label fields (e.g. uint8). If None the fields
+        are not converted
+
+    Returns
+    -------
+    radar : Radar object
+        the radar object with the converted fields
+
+    """
+    if radar is None or (float_dtype is None and class_dtype is None):
+        return radar
+
+    for field_name, field_dict in list(radar.fields.items()):
+        data = field_dict['data']
+        if not isinstance(data, np.ndarray):
+            continue
+
+        if field_name in CLASS_FIELD_NAMES:
+            if class_dtype is None or data.dtype == np.dtype(class_dtype):
+                continue
+            if np.issubdtype(np.dtype(class_dtype), np.integer):
+                # the class values and the fill value must be representable
+                dtype_info = np.iinfo(class_dtype)
+                valid_data = np.ma.compressed(np.ma.asarray(data))
+                if valid_data.size > 0 and (
+                        valid_data.min() < dtype_info.min or
+                        valid_data.max() > dtype_info.max or
+                        np.any(np.mod(valid_data, 1) != 0)):
+                    warn('Unable to convert field '+field_name+' to ' +
+                         str(class_dtype)+'. Values out of range')
+                    continue
+                fill_value = field_dict.get('_FillValue', dtype_info.max)
+                if fill_value < dtype_info.min or fill_value > dtype_info.max:
+                    fill_value = dtype_info.max
+            else:
+                fill_value = field_dict.get('_FillValue', None)
+            new_dtype = class_dtype
+        elif np.issubdtype(data.dtype, np.floating):
+            if float_dtype is None or data.dtype == np.dtype(float_dtype):
+                continue
+            new_dtype = float_dtype
+            fill_value = field_dict.get('_FillValue', None)
+        else:
+            continue
+
+        new_field_dict = dict(field_dict)
+        mask = np.ma.getmaskarray(data)
+        if np.issubdtype(np.dtype(new_dtype), np.integer):
+            new_data = np.ma.masked_array(
+                np.ma.filled(data, fill_value=0).astype(new_dtype),
+                mask=mask)
+        else:
+            new_data = np.ma.masked_array(
+                np.ma.getdata(data).astype(new_dtype), mask=mask)
+        if fill_value is not None:
+            new_data.set_fill_value(fill_value)
+            if '_FillValue' in field_dict:
+                new_field_dict['_FillValue'] = fill_value
+        new_field_dict['data'] = new_data
+        radar.fields[field_name] = new_field_dict
+
+    return radar
+
+
 def time_avg_range(timeinfo, avg_starttime, avg_endtime, period):
     """
     finds the new start and end time of an averaging
@@ -974,6 +1298,94 @@ def get_closest_solar_flux(hit_datetime_list, flux_datetime_list,
     return flux_datetime_closest_list, flux_value_closest_list
 
 
+def compute_sun_position(radar, refraction=True):
+    """
+    Computes the position of the sun at the time of each radar ray. The
+    computation is vectorised over all rays and follows the NOAA solar
+    position algorithm (accuracy of about 0.01 deg)
+
+    Parameters
+    ----------
+    radar : Radar object
+        radar object
+    refraction : bool
+        If True the sun elevation is corrected for atmospheric refraction
+
+    Returns
+    -------
+    sun_el, sun_az : float arrays
+        the sun elevation and azimuth at each ray [deg]
+
+    """
+    lat = float(radar.latitude['data'][0])
+    lon = float(radar.longitude['data'][0])
+
+    # julian centuries since J2000
+    t_j2000 = date2num(
+        datetime.datetime(2000, 1, 1, 12), radar.time['units'],
+        radar.time.get('calendar', 'standard'))
+    days = (np.asarray(radar.time['data'], dtype=float)-t_j2000)/86400.
+    jc = days/36525.
+
+    geom_mean_long = np.mod(
+        280.46646+jc*(36000.76983+jc*0.0003032), 360.)
+    geom_mean_anom = 357.52911+jc*(35999.05029-0.0001537*jc)
+    ecc = 0.016708634-jc*(0.000042037+0.0000001267*jc)
+    anom_rad = np.deg2rad(geom_mean_anom)
+    eq_ctr = (
+        np.sin(anom_rad)*(1.914602-jc*(0.004817+0.000014*jc)) +
+        np.sin(2.*anom_rad)*(0.019993-0.000101*jc) +
+        np.sin(3.*anom_rad)*0.000289)
+    omega = np.deg2rad(125.04-1934.136*jc)
+    app_long = geom_mean_long+eq_ctr-0.00569-0.00478*np.sin(omega)
+    mean_obliq = 23.+(26.+(
+        21.448-jc*(46.815+jc*(0.00059-jc*0.001813)))/60.)/60.
+    obliq_rad = np.deg2rad(mean_obliq+0.00256*np.cos(omega))
+    decl_rad = np.arcsin(np.sin(obliq_rad)*np.sin(np.deg2rad(app_long)))
+
+    long_rad = np.deg2rad(geom_mean_long)
+    var_y = np.tan(obliq_rad/2.)**2.
+    eq_time = 4.*np.rad2deg(
+        var_y*np.sin(2.*long_rad)-2.*ecc*np.sin(anom_rad) +
+        4.*ecc*var_y*np.sin(anom_rad)*np.cos(2.*long_rad) -
+        0.5*var_y*var_y*np.sin(4.*long_rad) -
+        1.25*ecc*ecc*np.sin(2.*anom_rad))
+
+    # true solar time [min] and hour angle
+    day_min = np.mod(days+0.5, 1.)*1440.
+    true_solar_time = np.mod(day_min+eq_time+4.*lon, 1440.)
+    hour_angle_rad = np.deg2rad(true_solar_time/4.-180.)
+
+    lat_rad = np.deg2rad(lat)
+    cos_zen = (
+        np.sin(lat_rad)*np.sin(decl_rad) +
+        np.cos(lat_rad)*np.cos(decl_rad)*np.cos(hour_angle_rad))
+    zen_rad = np.arccos(np.clip(cos_zen, -1., 1.))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_az = (
+            (np.sin(lat_rad)*np.cos(zen_rad)-np.sin(decl_rad)) /
+            (np.cos(lat_rad)*np.sin(zen_rad)))
+    az_aux = np.rad2deg(np.arccos(np.clip(cos_az, -1., 1.)))
+    sun_az = np.where(
+        hour_angle_rad > 0., np.mod(az_aux+180., 360.),
+        np.mod(540.-az_aux, 360.))
+    sun_el = 90.-np.rad2deg(zen_rad)
+
+    if refraction:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tan_el = np.tan(np.deg2rad(sun_el))
+            refr = np.select(
+                [sun_el > 85., sun_el > 5., sun_el > -0.575],
+                [0.,
+                 58.1/tan_el-0.07/tan_el**3.+0.000086/tan_el**5.,
+                 1735.+sun_el*(-518.2+sun_el*(
+                     103.4+sun_el*(-12.79+sun_el*0.711)))],
+                default=-20.772/tan_el)
+        sun_el = sun_el+refr/3600.
+
+    return sun_el, sun_az
+
+
 def get_fixed_rng_data(radar, field_names, fixed_rng, rng_tol=50.,
                        ele_min=None, ele_max=None, azi_min=None,
                        azi_max=None):
@@ -1884,3 +2296,169 @@ def project_to_vertical(data_in, data_height, grid_height, interp_kind='none',
         data_out = np.ma.masked_values(f(grid_height), fill_value)
 
     return data_out
+
+
+def compute_grid_weights(radar, grid_shape, grid_limits, grid_origin=None,
+                         grid_origin_alt=None, wfunc='NEAREST_NEIGHBOUR',
+                         roi_func='dist_beam', constant_roi=500., h_factor=1.,
+                         nb=1., bsp=1., min_radius=500.):
+    """
+    Computes the weights with which each radar gate contributes to each
+    point of a Cartesian grid. The weights depend only on the radar geometry
+    and the grid definition and can therefore be reused for all volumes with
+    the same geometry. The definition of the parameters follows
+    pyart.map.grid_from_radars
+
+    Parameters
+    ----------
+    radar : radar object
+        the radar object defining the gate geometry
+    grid_shape : 3-tuple of ints
+        number of points in the grid (nz, ny, nx)
+    grid_limits : 3-tuple of 2-tuples
+        minimum and maximum grid location (inclusive) in meters for the z, y
+        and x coordinates
+    grid_origin : 2-tuple of floats or None
+        latitude and longitude of the grid origin. If None the radar
+        location is used
+    grid_origin_alt : float or None
+        altitude of the grid origin [m MSL]. If None the radar altitude is
+        used
+    wfunc : str
+        the weighting function. Can be BARNES, BARNES2, CRESSMAN or
+        NEAREST_NEIGHBOUR
+    roi_func : str
+        the function used to compute the region of interest. Can be
+        dist_beam or constant
+    constant_roi : float
+        radius of the region of interest if roi_func is constant [m]
+    h_factor, nb, bsp, min_radius : floats
+        parameters of the dist_beam region of interest function
+
+    Returns
+    -------
+    weights : scipy sparse CSR matrix
+        matrix (ngrid_points x ngates) with the weight of each gate for each
+        grid point. Gates are ordered as in the flattened radar field. With
+        NEAREST_NEIGHBOUR all the gates within the region of interest are
+        kept with a weight decreasing with the distance, so that the closest
+        valid gate can be selected by apply_grid_weights
+
+    """
+    radar_lat = float(radar.latitude['data'][0])
+    radar_lon = float(radar.longitude['data'][0])
+    radar_alt = float(radar.altitude['data'][0])
+    if grid_origin is None:
+        grid_origin = (radar_lat, radar_lon)
+    if grid_origin_alt is None:
+        grid_origin_alt = radar_alt
+
+    # position of the radar with respect to the grid origin
+    x_offset, y_offset = pyart.core.geographic_to_cartesian_aeqd(
+        radar_lon, radar_lat, grid_origin[1], grid_origin[0])
+    x_offset = float(np.squeeze(x_offset))
+    y_offset = float(np.squeeze(y_offset))
+    z_offset = radar_alt-grid_origin_alt
+
+    gates = np.column_stack((
+        np.ravel(radar.gate_z['data'])+z_offset,
+        np.ravel(radar.gate_y['data'])+y_offset,
+        np.ravel(radar.gate_x['data'])+x_offset))
+
+    nz, ny, nx = grid_shape
+    z_grid, y_grid, x_grid = np.meshgrid(
+        np.linspace(grid_limits[0][0], grid_limits[0][1], nz),
+        np.linspace(grid_limits[1][0], grid_limits[1][1], ny),
+        np.linspace(grid_limits[2][0], grid_limits[2][1], nx), indexing='ij')
+    points = np.column_stack(
+        (z_grid.ravel(), y_grid.ravel(), x_grid.ravel()))
+    npoints = points.shape[0]
+
+    if roi_func == 'constant':
+        roi = np.full(npoints, constant_roi, dtype=float)
+    else:
+        roi = (
+            h_factor*(points[:, 0]-z_offset)/20. +
+            np.sqrt((points[:, 1]-y_offset)**2+(points[:, 2]-x_offset)**2) *
+            np.tan(nb*bsp*np.pi/180.))
+        roi = np.maximum(roi, min_radius)
+
+    # gates within the region of interest of each grid point
+    neighbours = cKDTree(gates).query_ball_point(points, roi)
+    nneighbours = np.array([len(ind_gates) for ind_gates in neighbours])
+    indptr = np.append(0, np.cumsum(nneighbours))
+    indices = np.fromiter(
+        (ind_gate for ind_gates in neighbours for ind_gate in ind_gates),
+        dtype=int, count=indptr[-1])
+    ind_points = np.repeat(np.arange(npoints), nneighbours)
+
+    dist2 = np.sum((gates[indices]-points[ind_points])**2, axis=1)
+    roi2 = roi[ind_points]**2
+
+    wfunc = wfunc.upper()
+    if wfunc == 'NEAREST_NEIGHBOUR':
+        # the closest gate has the largest weight
+        data = (roi2-dist2)/roi2+1e-5
+    elif wfunc == 'CRESSMAN':
+        data = (roi2-dist2)/(roi2+dist2)
+    elif wfunc == 'BARNES':
+        data = np.exp(-dist2/(2.*roi2))+1e-5
+    elif wfunc == 'BARNES2':
+        data = np.exp(-dist2/(roi2/4.))+1e-5
+    else:
+        raise ValueError('Unknown weighting function '+wfunc)
+
+    return csr_matrix(
+        (data, indices, indptr), shape=(npoints, gates.shape[0]))
+
+
+def apply_grid_weights(weights, field_data, grid_shape, nearest=False):
+    """
+    Maps a radar field onto a grid using precomputed weights. Masked and
+    non finite gates do not contribute to the grid points and the weights of
+    the remaining gates are normalized. If nearest is set each grid point
+    takes the value of the closest valid gate
+
+    Parameters
+    ----------
+    weights : scipy sparse CSR matrix
+        matrix (ngrid_points x ngates) as computed by compute_grid_weights
+    field_data : 2D masked array
+        the radar field data (nrays x nrng)
+    grid_shape : 3-tuple of ints
+        number of points in the grid (nz, ny, nx)
+    nearest : bool
+        if True the weights have been computed with NEAREST_NEIGHBOUR and
+        only the valid gate with the largest weight is used
+
+    Returns
+    -------
+    grid_data : 3D masked array
+        the gridded field. Masked where no valid gate contributes
+
+    """
+    values = np.ma.getdata(field_data).ravel().astype(float)
+    is_valid = np.logical_and(
+        np.logical_not(np.ma.getmaskarray(field_data)).ravel(),
+        np.isfinite(values))
+    values = np.where(is_valid, values, 0.)
+
+    if nearest:
+        weights = csr_matrix(weights.multiply(
+            is_valid.astype(float)[np.newaxis, :]))
+        weights.eliminate_zeros()
+        has_data = np.diff(weights.indptr) > 0
+        ind_nearest = np.asarray(weights.argmax(axis=1)).ravel()
+        grid_data = np.ma.masked_all(weights.shape[0], dtype=float)
+        grid_data[has_data] = values[ind_nearest[has_data]]
+
+        return grid_data.reshape(grid_shape)
+
+    weights_sum = weights.dot(is_valid.astype(float))
+    values_sum = weights.dot(values)
+
+    has_data = weights_sum > 0.
+    grid_data = np.ma.masked_all(weights.shape[0], dtype=float)
+    grid_data[has_data] = values_sum[has_data]/weights_sum[has_data]
+
+    return grid_data.reshape(grid_shape)
@@ -0,0 +1,261 @@
+"""
+pyrad.util.sparse_field
+=======================
+
+Sparse representation of radar fields where most gates are masked (e.g. sun
+hits, colocated gates, trajectory samples). Only the valid gates are stored.
+The sparse fields travel with the dataset and are converted back into dense
+masked arrays when they are added to the radar objects used by other
+datasets or when the products are generated.
+
+.. autosummary::
+    :toctree: generated/
+
+    SparseField
+    sparsify_radar
+    densify_radar
+    densify_dataset
+
+"""
+
+import numpy as np
+
+from .radar_utils import create_empty_radar
+
+
+class SparseField(object):
+    """
+    Field data stored as the flat indices and values of its valid gates
+
+    Attributes
+    ----------
+    shape : tuple
+        shape of the dense data (nrays, ngates)
+    dtype : data type
+        data type of the values
+    ind : int array
+        flat indices of the valid gates
+    values : array
+        values of the valid gates
+    fill_value : scalar or None
+        fill value of the dense masked array
+
+    Methods:
+    --------
+    from_masked : Create a sparse field from a dense masked array
+    from_rays : Create a sparse field from the data of some rays
+    to_masked : Get the dense masked array
+
+    """
+
+    def __init__(self, shape, ind, values, fill_value=None):
+        """
+        Initalize the object.
+
+        Parameters
+        ----------
+        shape : tuple
+            shape of the dense data
+        ind : int array
+            flat indices of the valid gates
+        values : array
+            values of the valid gates
+        fill_value : scalar or None
+            fill value of the dense masked array
+
+        """
+        self.shape = tuple(shape)
+        self.ind = np.asarray(ind, dtype=np.int64)
+        self.values = np.asarray(values)
+        self.dtype = self.values.dtype
+        self.fill_value = fill_value
+
+    @classmethod
+    def from_masked(cls, data):
+        """
+        Create a sparse field from a dense masked array
+
+        Parameters
+        ----------
+        data : masked array
+            the dense data
+
+        Returns
+        -------
+        sparse_field : SparseField object
+            the sparse field
+
+        """
+        data = np.ma.asarray(data)
+        ind = np.flatnonzero(~np.ma.getmaskarray(data))
+        return cls(
+            data.shape, ind, np.ma.getdata(data).ravel()[ind],
+            fill_value=data.fill_value)
+
+    @classmethod
+    def from_rays(cls, shape, ind_rays, data):
+        """
+        Create a sparse field from the data of some rays. The remaining rays
+        are masked
+
+        Parameters
+        ----------
+        shape : tuple
+            shape of the dense data (nrays, ngates)
+        ind_rays : int array
+            indices of the rays contained in data
+        data : masked array
+            the data of the rays (len(ind_rays), ngates)
+
+        Returns
+        -------
+        sparse_field : SparseField object
+            the sparse field
+
+        """
+        data = np.ma.asarray(data)
+        ray_ind, rng_ind = np.nonzero(~np.ma.getmaskarray(data))
+        ind = np.asarray(ind_rays, dtype=np.int64)[ray_ind]*shape[1]+rng_ind
+        order = np.argsort(ind, kind='mergesort')
+        return cls(
+            shape, ind[order], np.ma.getdata(data)[ray_ind, rng_ind][order],
+            fill_value=data.fill_value)
+
+    @property
+    def ndim(self):
+        """ number of dimensions of the dense data """
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        """ size of the stored indices and values [bytes] """
+        return self.ind.nbytes+self.values.nbytes
+
+    @property
+    def density(self):
+        """ fraction of valid gates """
+        return self.ind.size/max(1, int(np.prod(self.shape)))
+
+    def to_masked(self):
+        """
+        Get the dense masked array
+
+        Returns
+        -------
+        data : masked array
+            the dense data
+
+        """
+        nvalues = int(np.prod(self.shape))
+        values = np.zeros(nvalues, dtype=self.dtype)
+        mask = np.ones(nvalues, dtype=bool)
+        values[self.ind] = self.values
+        mask[self.ind] = False
+
+        return np.ma.masked_array(
+            values.reshape(self.shape), mask=mask.reshape(self.shape),
+            fill_value=self.fill_value)
+
+
+def sparsify_radar(radar, max_density=0.1):
+    """
+    Gets a radar object where the fields with few valid gates are stored as
+    sparse fields. The other fields are shared with the input radar object
+
+    Parameters
+    ----------
+    radar : Radar object
+        the input radar object
+    max_density : float
+        maximum fraction of valid gates of a field stored as sparse field
+
+    Returns
+    -------
+    new_radar : Radar object
+        the radar object with sparse fields. The input radar object if no
+        field is sparse enough
+
+    """
+    sparse_fields = dict()
+    for field_name, field_dict in radar.fields.items():
+        data = field_dict['data']
+        if isinstance(data, SparseField) or np.ndim(data) != 2:
+            continue
+        nvalid = data.size-np.count_nonzero(np.ma.getmaskarray(data))
+        if nvalid > max_density*data.size:
+            continue
+        sparse_dict = {
+            key: value for key, value in field_dict.items() if key != 'data'}
+        sparse_dict['data'] = SparseField.from_masked(data)
+        sparse_fields[field_name] = sparse_dict
+
+    if not sparse_fields:
+        return radar
+
+    new_radar = create_empty_radar(radar)
+    new_radar.fields = dict(radar.fields)
+    new_radar.fields.update(sparse_fields)
+
+    return new_radar
+
+
+def densify_radar(radar):
+    """
+    Gets a radar object where all fields are dense masked arrays. The fields
+    that are already dense are shared with the input radar object
+
+    Parameters
+    ----------
+    radar : Radar object
+        the input radar object
+
+    Returns
+    -------
+    new_radar : Radar object
+        the radar object with dense fields. The input radar object if it
+        does not contain sparse fields
+
+    """
+    sparse_names = [
+        field_name for field_name, field_dict in radar.fields.items()
+        if isinstance(field_dict['data'], SparseField)]
+    if not sparse_names:
+        return radar
+
+    new_radar = create_empty_radar(radar)
+    new_radar.fields = dict(radar.fields)
+    for field_name in sparse_names:
+        field_dict = dict(radar.fields[field_name])
+        field_dict['data'] = field_dict['data'].to_masked()
+        new_radar.fields[field_name] = field_dict
+
+    return new_radar
+
+
+def densify_dataset(dataset):
+    """
+    Gets a dataset where the radar object does not contain sparse fields
+
+    Parameters
+    ----------
+    dataset : object
+        the dataset object
+
+    Returns
+    -------
+    new_dataset : object
+        the dataset with dense fields. The input dataset if it does not
+        contain sparse fields
+
+    """
+    if not isinstance(dataset, dict) or 'radar_out' not in dataset:
+        return dataset
+
+    radar = densify_radar(dataset['radar_out'])
+    if radar is dataset['radar_out']:
+        return dataset
+
+    new_dataset = dict(dataset)
+    new_dataset['radar_out'] = radar
+
+    return new_dataset
@@ -0,0 +1,40 @@
+""" Unit Tests for the grid weights of Pyrad's util/radar_utils.py module. """
+
+import numpy as np
+from numpy.testing import assert_allclose
+from scipy.sparse import csr_matrix
+
+from pyrad.util import apply_grid_weights
+
+# 2 grid points and 3 gates. The first grid point sees the first gate
+# (closest) and the second gate. The second grid point sees the third gate
+WEIGHTS = csr_matrix(np.array([[0.9, 0.5, 0.], [0., 0., 0.7]]))
+
+
+def test_nearest_skips_masked_gate():
+    field_data = np.ma.array([[1., 2., 3.]], mask=[[True, False, False]])
+    grid_data = apply_grid_weights(
+        WEIGHTS, field_data, (2, 1, 1), nearest=True)
+    assert_allclose(grid_data.ravel(), [2., 3.])
+
+
+def test_nearest_uses_closest_gate():
+    field_data = np.ma.array([[1., 2., 3.]])
+    grid_data = apply_grid_weights(
+        WEIGHTS, field_data, (2, 1, 1), nearest=True)
+    assert_allclose(grid_data.ravel(), [1., 3.])
+
+
+def test_no_valid_gate_is_masked():
+    field_data = np.ma.array([[1., 2., np.nan]])
+    for nearest in (False, True):
+        grid_data = apply_grid_weights(
+            WEIGHTS, field_data, (2, 1, 1), nearest=nearest)
+        assert np.ma.getmaskarray(grid_data).ravel().tolist() == [
+            False, True]
+
+
+def test_weighted_average_of_valid_gates():
+    field_data = np.ma.array([[1., 2., 3.]], mask=[[False, True, False]])
+    grid_data = apply_grid_weights(WEIGHTS, field_data, (2, 1, 1))
+    assert_allclose(grid_data.ravel(), [1., 3.])
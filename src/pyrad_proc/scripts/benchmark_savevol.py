@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+================================================
+benchmark_savevol
+================================================
+
+This program compares the writing time and the file size of a radar volume
+saved with the writer options of the SAVEVOL and SAVEALL products
+
+To run the benchmark type:
+    python benchmark_savevol.py [volume_file] --outpath [outpath] \
+--nrepetitions [nrepetitions]
+
+The volume file can be of any format readable by Py-ART. The compressors
+of the package hdf5plugin (lz4, zstd, blosc) are only tested if the package
+is available
+
+Example:
+    python benchmark_savevol.py 'PLD1915000007U.003' --outpath '/tmp/'
+
+"""
+
+# License: BSD 3 clause
+
+import argparse
+import os
+import time
+
+import pyart
+
+from pyrad.io import get_hdf5_compression
+
+print(__doc__)
+
+# file type, physical units, compression, compression options. The first
+# two are the current defaults of SAVEVOL/SAVEALL
+WRITER_OPTIONS = [
+    ('nc', True, None, None),
+    ('h5', True, 'gzip', 6),
+    ('h5', False, 'gzip', 6),
+    ('h5', False, 'gzip', 1),
+    ('h5', False, 'lzf', None),
+    ('h5', False, 'lz4', None),
+    ('h5', False, 'zstd', 3),
+    ('h5', False, 'blosc', 5)]
+
+
+def main():
+    """
+    """
+
+    # parse the arguments
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the radar volume writers')
+
+    # positional arguments
+    parser.add_argument(
+        'volume_file', type=str, help='name of the radar volume file')
+
+    # keyword arguments
+    parser.add_argument(
+        '--outpath', type=str, default='/tmp/',
+        help='path where to write the test files')
+    parser.add_argument(
+        '--nrepetitions', type=int, default=3,
+        help='number of times each file is written. The fastest is kept')
+
+    args = parser.parse_args()
+
+    radar = pyart.io.read(args.volume_file)
+    print('- Volume with %d rays, %d gates and %d fields' %
+          (radar.nrays, radar.ngates, len(radar.fields)))
+
+    print('%-4s %-9s %-6s %-6s %10s %10s' % (
+        'type', 'physical', 'compr', 'opts', 'time [s]', 'size [MB]'))
+    for file_type, physical, compression, compression_opts in WRITER_OPTIONS:
+        compression_h5, compression_opts_h5 = get_hdf5_compression(
+            compression, compression_opts)
+        if compression is not None and compression_h5 == 'gzip' and (
+                compression != 'gzip'):
+            # hdf5plugin compressor not available
+            continue
+
+        fname = os.path.join(
+            args.outpath, 'benchmark_savevol.'+file_type)
+        write_time = None
+        for _ in range(args.nrepetitions):
+            tstart = time.time()
+            if file_type == 'nc':
+                pyart.io.write_cfradial(fname, radar, physical=physical)
+            else:
+                pyart.aux_io.write_odim_h5(
+                    fname, radar, physical=physical,
+                    compression=compression_h5,
+                    compression_opts=compression_opts_h5)
+            elapsed = time.time()-tstart
+            if write_time is None or elapsed < write_time:
+                write_time = elapsed
+
+        print('%-4s %-9s %-6s %-6s %10.3f %10.2f' % (
+            file_type, str(physical), str(compression),
+            str(compression_opts), write_time,
+            os.path.getsize(fname)/1e6))
+        os.remove(fname)
+
+
+# ---------------------------------------------------------
+# Start main:
+# ---------------------------------------------------------
+if __name__ == "__main__":
+    main()
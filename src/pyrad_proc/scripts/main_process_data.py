@@ -13,7 +13,8 @@ This program processes and post-processes data over a time span
 To run the processing framework type:
     python main_process_data.py \
 [config_file] --starttime [process_start_time] --endtime [process_end_time] \
---postproc_cfgfile [postproc_config_file] --cfgpath [cfgpath]
+--postproc_cfgfile [postproc_config_file] --cfgpath [cfgpath] \
+--nprocesses [nprocesses]
 
 If startime and endtime are not specified the program determines them from
 the trajectory file or the last processed volume.
@@ -22,6 +23,13 @@ cfgpath is an optional argument with default: \
 '$HOME/pyrad/config/processing/'
 The trajectory file can be of type plane or type lightning. If it is of type \
 lightning the flash number can be specified
+nprocesses is an optional argument with default: 1. If larger than 1 the time
+span is split in days that are processed in parallel. The accumulations of
+the datasets aggregating the data of the whole time span (monitoring
+histograms, frequency of occurrence) are merged and post-processed at the
+end. Other datasets, e.g. time averages, are computed for each day
+separately. Requires the start and end time and cannot be used with a
+trajectory file
 
 Example:
     python main_process_data.py 'paradiso_fvj_vol.txt' --starttime \
@@ -37,8 +45,13 @@ import datetime
 import argparse
 import atexit
 import os
+import shutil
+import tempfile
+from warnings import warn
+from multiprocessing import Pool
 
 from pyrad.flow.flow_control import main as pyrad_main
+from pyrad.flow.flow_control import main_merge as pyrad_main_merge
 
 print(__doc__)
 
@@ -93,6 +106,9 @@ def main():
                         "dataset will be parallelized")
     parser.add_argument("--PROFILE_MULTIPROCESSING", type=int, default=0,
                         help="If 1 the multiprocessing is profiled")
+    parser.add_argument(
+        '--nprocesses', type=int, default=1,
+        help='number of days processed in parallel')
 
     args = parser.parse_args()
 
@@ -133,6 +149,20 @@ def main():
     else:
         infostr = args.infostr
 
+    if args.nprocesses > 1 and (
+            proc_starttime is None or proc_endtime is None or args.trajfile):
+        warn('The time span can only be split in days if the start and end ' +
+             'time are given and there is no trajectory file. ' +
+             'It will be processed by a single process')
+        args.nprocesses = 1
+    if args.nprocesses > 1:
+        print('Days will be processed in parallel by ' +
+              str(args.nprocesses)+' processes')
+        _process_days(
+            args.cfgpath, args.proc_cfgfile, args.postproc_cfgfile,
+            proc_starttime, proc_endtime, infostr, args.nprocesses)
+        return
+
     pyrad_main(cfgfile_proc, starttime=proc_starttime, endtime=proc_endtime,
                trajfile=args.trajfile, infostr=infostr,
                trajtype=args.trajtype, flashnr=args.flashnr,
@@ -151,6 +181,95 @@ def main():
                    PROFILE_MULTIPROCESSING=args.PROFILE_MULTIPROCESSING)
 
 
+def _process_days(cfgpath, proc_cfgfile, postproc_cfgfile, proc_starttime,
+                  proc_endtime, infostr, nprocesses):
+    """
+    processes the days of the time span in parallel and merges their
+    accumulators
+
+    Parameters
+    ----------
+    cfgpath : str
+        configuration file path
+    proc_cfgfile, postproc_cfgfile : str or None
+        name of the main processing and post-processing configuration files
+    proc_starttime, proc_endtime : datetime object
+        start and end time of the data to be processed
+    infostr : str
+        Information string about the actual data processing
+    nprocesses : int
+        number of days processed in parallel
+
+    Returns
+    -------
+    Nothing
+
+    """
+    chunk_list = []
+    chunk_starttime = proc_starttime
+    while chunk_starttime <= proc_endtime:
+        next_day = chunk_starttime.replace(
+            hour=0, minute=0, second=0, microsecond=0)+datetime.timedelta(
+                days=1)
+        chunk_endtime = min(
+            proc_endtime, next_day-datetime.timedelta(seconds=1))
+        chunk_list.append((chunk_starttime, chunk_endtime))
+        chunk_starttime = next_day
+    print('Number of days to process: '+str(len(chunk_list)))
+
+    accupath = tempfile.mkdtemp(prefix='pyrad_accumulators_')
+    for cfgfile, cfgname in ((proc_cfgfile, 'proc'),
+                             (postproc_cfgfile, 'postproc')):
+        if cfgfile is None:
+            continue
+        chunk_args_list = []
+        for chunk_starttime, chunk_endtime in chunk_list:
+            chunk_args_list.append((
+                cfgpath+cfgfile, chunk_starttime, chunk_endtime, infostr,
+                os.path.join(
+                    accupath, cfgname, chunk_starttime.strftime('%Y%m%d'))))
+
+        # A new process is used for each day so that the memory is released
+        # once the day has been processed
+        with Pool(processes=nprocesses, maxtasksperchild=1) as pool:
+            pool.starmap(_process_chunk, chunk_args_list, chunksize=1)
+
+        # days without data do not have accumulators
+        accupath_list = [
+            chunk_args[-1] for chunk_args in chunk_args_list
+            if os.path.isdir(chunk_args[-1])]
+        if accupath_list:
+            pyrad_main_merge(cfgpath+cfgfile, accupath_list, infostr=infostr)
+    shutil.rmtree(accupath, ignore_errors=True)
+
+
+def _process_chunk(cfgfile, starttime, endtime, infostr, accupath):
+    """
+    processes the data of one day and stores its accumulators
+
+    Parameters
+    ----------
+    cfgfile : str
+        path of the main configuration file
+    starttime, endtime : datetime object
+        start and end time of the data to be processed
+    infostr : str
+        Information string about the actual data processing
+    accupath : str
+        directory where the accumulators are stored
+
+    Returns
+    -------
+    Nothing
+
+    """
+    try:
+        pyrad_main(cfgfile, starttime=starttime, endtime=endtime,
+                   infostr=infostr, accupath=accupath)
+    except ValueError as ee:
+        print(ee)
+
+
 def _print_end_msg(text):
     """
     prints end message
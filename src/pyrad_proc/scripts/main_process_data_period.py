@@ -14,13 +14,27 @@ To run the processing framework type:
     python main_process_data_period.py \
 [config_file] [process_start_date] [process_end_date] \
 --starttime [process_start_time] --endtime [process_end_time] \
---postproc_cfgfile [postproc_config_file] --cfgpath [cfgpath]
+--postproc_cfgfile [postproc_config_file] --cfgpath [cfgpath] \
+--nprocesses [nprocesses] --merge_days [merge_days]
 
 starttime is an optional argument with default: '000000'
 endtime is an optional argument with default: '235959'
 postproc_cfgfile is an optional argument with default: None
 cfgpath is an optional argument with default: \
 '$HOME/pyrad/config/processing/'
+nprocesses is an optional argument with default: 1. If larger than 1 the
+days are processed in parallel. Each day is processed by a new process.
+The accumulators of the datasets aggregating data over time (monitoring
+histograms, frequency of occurrence) are then stored and post-processed
+day by day in chronological order, so that the output is the same as if
+the days had been processed sequentially. The days are processed
+sequentially if the configuration contains outputs spanning several days
+that cannot be merged (sun retrieval time series or sun hits datasets using
+the hits of previous days).
+merge_days is an optional argument with default: 0. If 1 the accumulations
+of all the days are merged and post-processed once at the end, i.e. the
+monitoring histograms and the frequency of occurrence are computed over the
+whole period instead of for each day.
 
 Example:
     python main_process_data_period.py 'paradiso_fvj_vol.txt' '20140523' \
@@ -37,11 +51,21 @@ import datetime
 import argparse
 import atexit
 import os
+import shutil
+import tempfile
+from warnings import warn
+from multiprocessing import Pool
 
 from pyrad.flow import main as pyrad_main
+from pyrad.flow import main_merge as pyrad_main_merge
+from pyrad.io import read_config, get_dataset_fields
 
 print(__doc__)
 
+# products writing files that gather the data of several days and that
+# cannot be generated from merged accumulators
+CROSS_DAY_PRODUCT_TYPES = ('WRITE_SUN_RETRIEVAL', 'PLOT_SUN_RETRIEVAL_TS')
+
 
 def main():
     """
@@ -91,6 +115,14 @@ def main():
         default=os.path.expanduser('~')+'/pyrad/config/processing/',
         help='configuration file path')
 
+    parser.add_argument(
+        '--nprocesses', type=int, default=1,
+        help='number of days processed in parallel')
+    parser.add_argument(
+        '--merge_days', type=int, default=0,
+        help='If 1 the accumulations of all days are merged and '
+        'post-processed once at the end')
+
     args = parser.parse_args()
 
     print("====== PYRAD data processing started: %s" %
@@ -111,6 +143,28 @@ def main():
         print('Product generation will be parallelized')
     if args.PROFILE_MULTIPROCESSING:
         print('Parallel processing performance will be profiled')
+    if args.nprocesses > 1:
+        cross_day_outputs = _get_cross_day_outputs(
+            args.cfgpath+args.proc_cfgfile)
+        if args.postproc_cfgfile is not None:
+            cross_day_outputs += _get_cross_day_outputs(
+                args.cfgpath+args.postproc_cfgfile)
+        if cross_day_outputs:
+            warn('The following outputs span several days and cannot be ' +
+                 'merged: '+', '.join(cross_day_outputs) +
+                 '. Days will be processed sequentially')
+            args.nprocesses = 1
+    if args.nprocesses > 1:
+        print('Days will be processed in parallel by ' +
+              str(args.nprocesses)+' processes')
+        if (args.MULTIPROCESSING_DSET or args.MULTIPROCESSING_PROD or
+                args.PROFILE_MULTIPROCESSING):
+            print('Dataset and product generation will not be parallelized')
+            args.MULTIPROCESSING_DSET = 0
+            args.MULTIPROCESSING_PROD = 0
+            args.PROFILE_MULTIPROCESSING = 0
+    if args.merge_days:
+        print('The accumulations of all days will be merged')
 
     proc_startdate = datetime.datetime.strptime(
         args.startdate, '%Y%m%d')
@@ -124,6 +178,7 @@ def main():
         seconds=float(args.endtime[4:6]))
 
     cfgfile_proc = args.cfgpath+args.proc_cfgfile
+    cfgfile_postproc = None
     if args.postproc_cfgfile is not None:
         cfgfile_postproc = args.cfgpath+args.postproc_cfgfile
 
@@ -135,26 +190,183 @@ def main():
     else:
         infostr = args.infostr
 
-    for day in range(ndays):
-        current_date = proc_startdate + datetime.timedelta(days=day)
-        proc_startdatetime = current_date + proc_starttime
-        proc_enddatetime = current_date + proc_endtime
-        try:
-            pyrad_main(cfgfile_proc, starttime=proc_startdatetime,
+    date_list = [
+        proc_startdate + datetime.timedelta(days=day) for day in range(ndays)]
+
+    if args.nprocesses == 1 and not args.merge_days:
+        for current_date in date_list:
+            _process_day(
+                cfgfile_proc, cfgfile_postproc,
+                current_date + proc_starttime, current_date + proc_endtime,
+                infostr, args.MULTIPROCESSING_DSET,
+                args.MULTIPROCESSING_PROD, args.PROFILE_MULTIPROCESSING)
+        return
+
+    # The accumulators of each day are stored and post-processed at the end
+    # in chronological order. The post-processing configuration uses the
+    # output of the processing of all the days
+    accupath = tempfile.mkdtemp(prefix='pyrad_accumulators_')
+    for cfgfile, cfgname in ((cfgfile_proc, 'proc'),
+                             (cfgfile_postproc, 'postproc')):
+        if cfgfile is None:
+            continue
+        day_args_list = []
+        accupath_list = []
+        for current_date in date_list:
+            accupath_list.append(os.path.join(
+                accupath, cfgname, current_date.strftime('%Y%m%d')))
+            day_args_list.append((
+                cfgfile, None, current_date + proc_starttime,
+                current_date + proc_endtime, infostr,
+                args.MULTIPROCESSING_DSET, args.MULTIPROCESSING_PROD,
+                args.PROFILE_MULTIPROCESSING, accupath_list[-1]))
+
+        if args.nprocesses > 1:
+            # A new process is used for each day so that the memory is
+            # released once the day has been processed
+            with Pool(processes=args.nprocesses, maxtasksperchild=1) as pool:
+                pool.starmap(_process_day, day_args_list, chunksize=1)
+        else:
+            for day_args in day_args_list:
+                _process_day(*day_args)
+
+        _postprocess_days(
+            cfgfile, accupath_list, infostr, merge_days=args.merge_days)
+    shutil.rmtree(accupath, ignore_errors=True)
+
+
+def _process_day(cfgfile_proc, cfgfile_postproc, proc_startdatetime,
+                 proc_enddatetime, infostr, MULTIPROCESSING_DSET,
+                 MULTIPROCESSING_PROD, PROFILE_MULTIPROCESSING,
+                 accupath=None):
+    """
+    processes and post-processes the data of one day
+
+    Parameters
+    ----------
+    cfgfile_proc : str
+        path of the main processing configuration file
+    cfgfile_postproc : str or None
+        path of the main post-processing configuration file
+    proc_startdatetime, proc_enddatetime : datetime object
+        start and end time of the data to be processed
+    infostr : str
+        Information string about the actual data processing
+    MULTIPROCESSING_DSET, MULTIPROCESSING_PROD : int
+        If 1 the generation of the datasets or of the products is
+        parallelized
+    PROFILE_MULTIPROCESSING : int
+        If 1 the multiprocessing is profiled
+    accupath : str or None
+        If not None, directory where the accumulators of the processing
+        are stored instead of being post-processed
+
+    Returns
+    -------
+    Nothing
+
+    """
+    try:
+        pyrad_main(cfgfile_proc, starttime=proc_startdatetime,
+                   endtime=proc_enddatetime, infostr=infostr,
+                   MULTIPROCESSING_DSET=MULTIPROCESSING_DSET,
+                   MULTIPROCESSING_PROD=MULTIPROCESSING_PROD,
+                   PROFILE_MULTIPROCESSING=PROFILE_MULTIPROCESSING,
+                   accupath=accupath)
+        if cfgfile_postproc is not None:
+            pyrad_main(cfgfile_postproc, starttime=proc_startdatetime,
                        endtime=proc_enddatetime, infostr=infostr,
-                       MULTIPROCESSING_DSET=args.MULTIPROCESSING_DSET,
-                       MULTIPROCESSING_PROD=args.MULTIPROCESSING_PROD,
-                       PROFILE_MULTIPROCESSING=args.PROFILE_MULTIPROCESSING)
-            if args.postproc_cfgfile is not None:
-                pyrad_main(cfgfile_postproc, starttime=proc_startdatetime,
-                           endtime=proc_enddatetime, infostr=infostr,
-                           MULTIPROCESSING_DSET=args.MULTIPROCESSING_DSET,
-                           MULTIPROCESSING_PROD=args.MULTIPROCESSING_PROD,
-                           PROFILE_MULTIPROCESSING=args.PROFILE_MULTIPROCESSING)
+                       MULTIPROCESSING_DSET=MULTIPROCESSING_DSET,
+                       MULTIPROCESSING_PROD=MULTIPROCESSING_PROD,
+                       PROFILE_MULTIPROCESSING=PROFILE_MULTIPROCESSING)
+    except ValueError:
+        print(ValueError)
+
+
+def _postprocess_days(cfgfile, accupath_list, infostr, merge_days=0):
+    """
+    post-processes the accumulators stored by the processing of each day
+
+    Parameters
+    ----------
+    cfgfile : str
+        path of the main configuration file
+    accupath_list : list of str
+        the directories where the accumulators of each day are stored, in
+        chronological order
+    infostr : str
+        Information string about the actual data processing
+    merge_days : int
+        If 1 the accumulators of all the days are merged and post-processed
+        once. Otherwise the accumulators of each day are post-processed
+        separately
+
+    Returns
+    -------
+    Nothing
+
+    """
+    # days without data do not have accumulators
+    accupath_list = [
+        accupath for accupath in accupath_list if os.path.isdir(accupath)]
+    if not accupath_list:
+        return
+
+    if merge_days:
+        accupath_groups = [accupath_list]
+    else:
+        accupath_groups = [[accupath] for accupath in accupath_list]
+
+    for accupath_group in accupath_groups:
+        try:
+            pyrad_main_merge(cfgfile, accupath_group, infostr=infostr)
         except ValueError:
             print(ValueError)
 
 
+def _get_cross_day_outputs(cfgfile):
+    """
+    gets the outputs of a processing that gather the data of several days
+    and cannot be generated from merged accumulators. Such outputs cannot be
+    generated by processing the days in parallel
+
+    Parameters
+    ----------
+    cfgfile : str
+        path of the main configuration file
+
+    Returns
+    -------
+    cross_day_outputs : list of str
+        the datasets and products (as dataset:product) spanning several
+        days
+
+    """
+    try:
+        cfg = read_config(cfgfile)
+        cfg = read_config(cfg['locationConfigFile'], cfg=cfg)
+        cfg = read_config(cfg['productConfigFile'], cfg=cfg)
+    except Exception as inst:
+        # the error will be reported by the processing
+        print(inst)
+        return []
+
+    cross_day_outputs = []
+    for datasetdescr in cfg.get('dataSetList', []):
+        _, dsname = get_dataset_fields(datasetdescr)
+        dscfg = cfg.get(dsname, None)
+        if not isinstance(dscfg, dict):
+            continue
+        if dscfg.get('type', None) == 'SUN_HITS' and (
+                dscfg.get('ndays', 1) > 1):
+            cross_day_outputs.append(dsname)
+        for prdname, prdcfg in dscfg.get('products', dict()).items():
+            if prdcfg.get('type', None) in CROSS_DAY_PRODUCT_TYPES:
+                cross_day_outputs.append(dsname+':'+prdname)
+
+    return cross_day_outputs
+
+
 def _print_end_msg(text):
     """
     prints end message
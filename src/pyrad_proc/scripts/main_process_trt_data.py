@@ -100,15 +100,17 @@ def main():
     rank_max_list = []
     time_rank_max_list = []
 
-    # List for collection of flashes data
-    cell_ID_list = np.ma.asarray([], dtype=int)
-    time_list = np.ma.asarray([], dtype=datetime.datetime)
-    lon_list = np.ma.asarray([], dtype=float)
-    lat_list = np.ma.asarray([], dtype=float)
-    flash_density_list = np.ma.asarray([], dtype=float)
-    rank_flash_density_list = np.ma.asarray([], dtype=float)
-    area_list = np.ma.asarray([], dtype=float)
-    nflash_list = np.ma.asarray([], dtype=int)
+    # List for collection of flashes data. The data of each cell is kept in
+    # a list of arrays and concatenated once all cells have been read
+    flash_data = {
+        'cell_ID': [np.ma.asarray([], dtype=int)],
+        'time': [np.ma.asarray([], dtype=datetime.datetime)],
+        'lon': [np.ma.asarray([], dtype=float)],
+        'lat': [np.ma.asarray([], dtype=float)],
+        'flash_density': [np.ma.asarray([], dtype=float)],
+        'rank': [np.ma.asarray([], dtype=float)],
+        'area': [np.ma.asarray([], dtype=float)],
+        'nflash': [np.ma.asarray([], dtype=int)]}
 
     for i, time_dir in enumerate(time_dir_list):
         data_input_path = args.trtbase+time_dir+'/TRTC_cell/'
@@ -149,15 +151,14 @@ def main():
             rank_max_list.append(np.max(RANKr))
             time_rank_max_list.append(yyyymmddHHMM[np.argmax(RANKr)])
 
-            cell_ID_list = np.append(cell_ID_list, traj_ID)
-            time_list = np.append(time_list, yyyymmddHHMM)
-            lon_list = np.append(lon_list, lon)
-            lat_list = np.append(lat_list, lat)
-            flash_density_list = np.append(flash_density_list, flash_density)
-            rank_flash_density_list = np.append(
-                rank_flash_density_list, RANKr)
-            area_list = np.append(area_list, area)
-            nflash_list = np.append(nflash_list, CG)
+            flash_data['cell_ID'].append(traj_ID)
+            flash_data['time'].append(yyyymmddHHMM)
+            flash_data['lon'].append(lon)
+            flash_data['lat'].append(lat)
+            flash_data['flash_density'].append(flash_density)
+            flash_data['rank'].append(RANKr)
+            flash_data['area'].append(area)
+            flash_data['nflash'].append(CG)
 
             # Time series plots
             figfname = data_output_path+str(traj_ID[0])+'_flash_density.png'
@@ -234,6 +235,15 @@ def main():
                 titl=str(traj_ID[0])+' Cell Position')
             print('Plotted '+' '.join(figfname))
 
+    cell_ID_list = np.ma.concatenate(flash_data['cell_ID'])
+    time_list = np.ma.concatenate(flash_data['time'])
+    lon_list = np.ma.concatenate(flash_data['lon'])
+    lat_list = np.ma.concatenate(flash_data['lat'])
+    flash_density_list = np.ma.concatenate(flash_data['flash_density'])
+    rank_flash_density_list = np.ma.concatenate(flash_data['rank'])
+    area_list = np.ma.concatenate(flash_data['area'])
+    nflash_list = np.ma.concatenate(flash_data['nflash'])
+
     fname = args.trtbase+'Santis_cell_scores.csv'
     write_trt_cell_scores(
         cell_ID_max_list, time_flash_density_max_list,